@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The scheduler modules import each other as top-level scripts (e.g. "from ali_test import ...")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+sys.exit(main())
@@ -1,6 +1,154 @@
-from constraint import Problem
+from constraint import Problem, Constraint, AllDifferentConstraint
 import random
 import math
+import re
+import time
+from time_grid import TimeGrid, build_time_slots, convert_time_to_float, format_time
+from evaluator import ScheduleEvaluator
+from feasibility import FeasibilityModel, HAVE_NUMPY
+from splitting import plan_splits
+
+class RoomOccupancyConstraint(Constraint):
+    """
+    Global no-double-booking constraint over every subject's (time, room) pair.
+    Variables are passed as [s1_time, s1_room, s2_time, s2_room, ...].
+    Occupancy is kept between checks: each call compares the pairs with the
+    previous call and only updates the cells whose assignment changed, so a
+    check costs one comparison per pair instead of rebuilding every set.
+    """
+
+    def __init__(self):
+        self._reset(0)
+
+    def _reset(self, pairs):
+        self._seen = [None] * pairs  # pair -> (time, room) at the previous check, or None
+        self._cell_count = {}        # (time, room) -> number of pairs on it
+        self._rooms_by_time = {}     # time -> {room: count}
+        self._times_by_room = {}     # room -> {time: count}
+        self._clashes = 0            # cells holding more than one pair
+
+    def _update(self, cell, step):
+        time_slot, room = cell
+        count = self._cell_count.get(cell, 0) + step
+        if count:
+            self._cell_count[cell] = count
+        else:
+            del self._cell_count[cell]
+        if (step > 0 and count == 2) or (step < 0 and count == 1):
+            self._clashes += step
+        for index, key, value in ((self._rooms_by_time, time_slot, room), (self._times_by_room, room, time_slot)):
+            counts = index.setdefault(key, {})
+            counts[value] = counts.get(value, 0) + step
+            if not counts[value]:
+                del counts[value]
+
+    def __call__(self, variables, domains, assignments, forwardcheck=False):
+        if len(self._seen) != len(variables) // 2:
+            self._reset(len(variables) // 2)
+        seen = self._seen
+        for k in range(len(seen)):
+            time_slot = assignments.get(variables[2 * k])
+            room = assignments.get(variables[2 * k + 1])
+            cell = None if time_slot is None or room is None else (time_slot, room)
+            if cell != seen[k]:
+                if seen[k] is not None:
+                    self._update(seen[k], -1)
+                if cell is not None:
+                    self._update(cell, 1)
+                seen[k] = cell
+        if self._clashes:
+            return False
+        rooms_by_time, times_by_room = self._rooms_by_time, self._times_by_room
+        
+        if forwardcheck:
+            # Hide cells that are already taken from half-assigned subjects
+            waiting = {}
+            for i in range(0, len(variables), 2):
+                time_var, room_var = variables[i], variables[i + 1]
+                if time_var in assignments and room_var not in assignments:
+                    taken, domain = rooms_by_time.get(assignments[time_var]), domains[room_var]
+                elif room_var in assignments and time_var not in assignments:
+                    taken, domain = times_by_room.get(assignments[room_var]), domains[time_var]
+                    waiting.setdefault(assignments[room_var], []).append(domain)
+                else:
+                    continue
+                if taken:
+                    for value in domain[:]:
+                        if value in taken:
+                            domain.hideValue(value)
+                    if not domain:
+                        return False
+            
+            # A room cannot take more waiting subjects than the distinct times left to them
+            for room, time_domains in waiting.items():
+                if len(time_domains) > 1 and len(set().union(*time_domains)) < len(time_domains):
+                    return False
+        return True
+
+class DistinctSlotsConstraint(Constraint):
+    """
+    All-different on the time slot of a clique of subjects/groups (one professor/TA
+    or one cohort's lectures). Variables are "<id>_time" slots, or "<id>_slot"
+    (slot, room) cells with combined=True. One constraint per clique instead of a
+    lambda per pair, with forward checking of the slots already taken.
+    """
+
+    def __init__(self, combined=False):
+        self.combined = combined
+
+    def __call__(self, variables, domains, assignments, forwardcheck=False):
+        taken = set()
+        for variable in variables:
+            value = assignments.get(variable)
+            if value is None:
+                continue
+            slot = value[0] if self.combined else value
+            if slot in taken:
+                return False
+            taken.add(slot)
+
+        if forwardcheck and taken:
+            for variable in variables:
+                if variable in assignments:
+                    continue
+                domain = domains[variable]
+                for value in domain[:]:
+                    if (value[0] if self.combined else value) in taken:
+                        domain.hideValue(value)
+                if not domain:
+                    return False
+        return True
+
+class SearchTimeout(Exception):
+    """A python-constraint search ran past the time limit given to its model"""
+
+class DeadlineConstraint(Constraint):
+    """
+    Time budget for a python-constraint search, which has no limit of its own.
+    Posted over every variable, so the solver calls it on each assignment; it
+    never prunes anything and raises SearchTimeout once time_limit seconds have
+    passed since its first check (the start of the search).
+    """
+
+    def __init__(self, time_limit):
+        self.time_limit = time_limit
+        self.deadline = None
+
+    def __call__(self, variables, domains, assignments, forwardcheck=False):
+        now = time.perf_counter()
+        if self.deadline is None:
+            self.deadline = now + self.time_limit
+        elif now > self.deadline:
+            raise SearchTimeout(f"No schedule found within the {self.time_limit:g}s time limit")
+        return True
+
+TIME_PREFERENCE_OPTIONS = {
+    '1': {'name': 'Morning only (9:00-12:00)', 'constraint': 'morning'},
+    '2': {'name': 'Afternoon only (12:00-15:00)', 'constraint': 'afternoon'},
+    '3': {'name': 'No preference', 'constraint': 'any'},
+    '4': {'name': 'Before 11:00', 'constraint': 'before_11'},
+    '5': {'name': 'After 11:00', 'constraint': 'after_11'}
+}
 
 def get_user_input():
     """Dynamically get all input data from the user"""
@@ -11,13 +159,7 @@ def get_user_input():
     print("\nStep 1: Enter Subject Information")
     print("-----------------------------------")
     
-    time_preference_options = {
-        '1': {'name': 'Morning only (9:00-12:00)', 'constraint': 'morning'},
-        '2': {'name': 'Afternoon only (12:00-15:00)', 'constraint': 'afternoon'},
-        '3': {'name': 'No preference', 'constraint': 'any'},
-        '4': {'name': 'Before 11:00', 'constraint': 'before_11'},
-        '5': {'name': 'After 11:00', 'constraint': 'after_11'}
-    }
+    time_preference_options = TIME_PREFERENCE_OPTIONS
     
     while True:
         print(f"\nSubject #{len(subjects) + 1}:")
@@ -38,6 +180,13 @@ def get_user_input():
         pref_choice = input("Enter preference number (1-5): ").strip()
         time_preference = time_preference_options.get(pref_choice, time_preference_options['3'])['constraint']
         
+        sections = input("Number of sections/labs (0 if none): ").strip()
+        sections = int(sections) if sections else 0
+        teaching_assistants = []
+        if sections:
+            names = input("Teaching assistants in priority order (comma separated, blank if none): ")
+            teaching_assistants = [normalize_name(name) for name in names.split(',') if name.strip()]
+        
         professor = normalize_name(professor)
         
         subject = {
@@ -47,7 +196,9 @@ def get_user_input():
             'professor': professor,
             'required_room_type': required_room_type,
             'day_off': day_off if day_off else None,
-            'time_preference': time_preference
+            'time_preference': time_preference,
+            'sections': sections,
+            'teaching_assistants': teaching_assistants
         }
         subjects.append(subject)
         
@@ -81,29 +232,38 @@ def normalize_name(name):
     """Normalize names to Title Case for consistency"""
     return ' '.join(word.capitalize() for word in name.split())
 
-def split_subject_if_needed(subject, rooms):
+def split_subject_if_needed(subject, rooms, sizes=None):
     """
     Split a subject into multiple groups if no single room can accommodate all students.
+    sizes gives the group sizes chosen by splitting.plan_splits(); without it the
+    subject is divided equally by the largest room capacity.
     Returns a list of subject groups.
     """
     max_room_capacity = max(room['capacity'] for room in rooms)
     
-    if subject['students'] <= max_room_capacity:
-        # No splitting needed
-        return [subject]
+    if sizes is None:
+        if subject['students'] <= max_room_capacity:
+            # No splitting needed
+            return [subject]
+        
+        # Calculate how many groups we need
+        groups_needed = math.ceil(subject['students'] / max_room_capacity)
+        students_per_group = math.ceil(subject['students'] / groups_needed)
+        sizes = [students_per_group] * (groups_needed - 1)
+        sizes.append(subject['students'] - students_per_group * (groups_needed - 1))
     
-    # Calculate how many groups we need
-    groups_needed = math.ceil(subject['students'] / max_room_capacity)
-    students_per_group = math.ceil(subject['students'] / groups_needed)
+    if len(sizes) == 1:
+        return [subject]
+    groups_needed = len(sizes)
     
     print(f"NOTE: Subject {subject['subject_id']} has {subject['students']} students.")
-    print(f"      Splitting into {groups_needed} groups of ~{students_per_group} students each.")
+    print(f"      Splitting into {groups_needed} groups of {', '.join(map(str, sizes))} students.")
     
     subject_groups = []
     for i in range(groups_needed):
         group_subject = subject.copy()
         group_subject['subject_id'] = f"{subject['subject_id']}_G{i+1}"
-        group_subject['students'] = students_per_group if i < groups_needed - 1 else subject['students'] - (students_per_group * (groups_needed - 1))
+        group_subject['students'] = sizes[i]
         group_subject['is_split_group'] = True
         group_subject['original_subject_id'] = subject['subject_id']
         group_subject['group_number'] = i + 1
@@ -112,62 +272,175 @@ def split_subject_if_needed(subject, rooms):
     
     return subject_groups
 
-def create_basic_scheduler(subjects, rooms):
-    """Create scheduler with room capacity splitting"""
-    time_slots = generate_time_slots()
-    random.shuffle(time_slots)
-    
-    problem = Problem()
+COURSE_CODE = re.compile(r'^[A-Z]+\s*(\d)\d\d$')
+
+def subject_cohort(subject):
+    """
+    Cohort (year group, الفرقة) of a subject: its 'cohort' field if given, otherwise
+    the first digit of a three-digit course code (CS401 -> '4'), otherwise None.
+    """
+    cohort = subject.get('cohort')
+    if cohort is not None and str(cohort).strip():
+        return str(cohort).strip()
+    match = COURSE_CODE.match(subject['subject_id'].upper())
+    return match.group(1) if match else None
+
+def teaching_assistant_records(subject):
+    """A subject's TAs as dicts with name, day_off, time_preference and priority (lower goes first)"""
+    records = []
+    for position, assistant in enumerate(subject.get('teaching_assistants') or []):
+        if isinstance(assistant, str):
+            assistant = {'name': assistant}
+        record = {
+            'name': assistant['name'],
+            'day_off': assistant.get('day_off'),
+            'time_preference': assistant.get('time_preference') or 'any',
+            'priority': assistant.get('priority', position)
+        }
+        records.append(record)
+    return records
+
+def split_sections(subject, assistant_load):
+    """
+    Sections (labs) of a subject: students divided as evenly as possible across
+    subject['sections'] groups held in labs, each taught by the least loaded of the
+    subject's TAs (ties go to the higher priority) and restricted by that TA's day
+    off and time preference.
+    assistant_load counts sections per TA across subjects and is updated here.
+    """
+    count = int(subject.get('sections') or 0)
+    if count <= 0:
+        return []
+    assistants = teaching_assistant_records(subject)
+    students_per_section, extra = divmod(subject['students'], count)
+
+    sections = []
+    for i in range(count):
+        if assistants:
+            assistant = min(assistants, key=lambda a: (assistant_load.get(a['name'].lower(), 0), a['priority']))
+        else:
+            assistant = {'name': f"TA {subject['subject_id']}", 'day_off': None, 'time_preference': 'any'}
+        assistant_load[assistant['name'].lower()] = assistant_load.get(assistant['name'].lower(), 0) + 1
+        sections.append({
+            'subject_id': f"{subject['subject_id']}_S{i+1}",
+            'subject_name': subject['subject_name'],
+            'students': students_per_section + (1 if i < extra else 0),
+            'professor': assistant['name'],
+            'required_room_type': 'lab',
+            'day_off': assistant['day_off'],
+            'time_preference': assistant['time_preference'],
+            'duration': subject.get('section_duration'),
+            'kind': 'section',
+            'cohort': subject_cohort(subject),
+            'original_subject_id': subject['subject_id'],
+            'section_number': i + 1,
+            'total_sections': count
+        })
+    return sections
+
+def split_all_subjects(subjects, rooms, time_slots=None):
+    """
+    Split every subject that needs it and return the flat list of subjects/groups.
+    Group counts and sizes are planned for all subjects together against the
+    room mix and the time slots (see splitting.plan_splits()).
+    Lecture groups get kind 'lecture' and the subject's cohort; subjects with
+    'sections' also get their section groups (kind 'section', see split_sections()).
+    """
+    grid = TimeGrid(time_slots or generate_time_slots())
     
-    # First, split subjects if needed
-    all_subjects = []
+    lectures = []
+    sections = []
+    assistant_load = {}
     for subject in subjects:
-        split_groups = split_subject_if_needed(subject, rooms)
-        all_subjects.extend(split_groups)
+        lecture = {key: value for key, value in subject.items()
+                   if key not in ('sections', 'teaching_assistants', 'section_duration')}
+        lecture['kind'] = 'lecture'
+        lecture['cohort'] = subject_cohort(subject)
+        if subject.get('sections') and not lecture.get('required_room_type'):
+            lecture['required_room_type'] = 'lecture_hall'
+        lectures.append(lecture)
+        sections.append(split_sections(subject, assistant_load))
+    
+    # Split groups share a day, so a subject can take at most as many groups as it has periods in one day
+    max_groups = {}
+    for lecture in lectures:
+        slots = grid.allowed_slots(lecture.get('day_off'), lecture.get('time_preference', 'any'), lecture.get('duration'))
+        slots = slots or grid.allowed_slots(None, 'any', lecture.get('duration')) or range(len(grid))
+        max_groups[lecture['subject_id']] = max(sum(1 for slot in slots if grid.slot_day[slot] == day)
+                                                for day in range(len(grid.days)))
+    plans = plan_splits(lectures + [section for group in sections for section in group], rooms, len(grid),
+                        max_groups=max_groups)
     
-    print(f"\nDEBUG: After splitting - Total subjects/groups: {len(all_subjects)}")
+    all_subjects = []
+    for lecture, subject_sections in zip(lectures, sections):
+        all_subjects.extend(split_subject_if_needed(lecture, rooms, plans[lecture['subject_id']]))
+        if subject_sections:
+            print(f"NOTE: Subject {lecture['subject_id']} has {len(subject_sections)} sections of ~{subject_sections[0]['students']} students "
+                  f"({', '.join(sorted(set(section['professor'] for section in subject_sections)))})")
+        all_subjects.extend(subject_sections)
+    return all_subjects
+
+def lecture_cohorts(all_subjects):
+    """Map cohort -> indices of its lecture subjects/groups (the cliques whose lectures must not overlap)"""
+    cohorts = {}
+    for v, subject in enumerate(all_subjects):
+        if subject.get('kind', 'lecture') == 'lecture' and subject.get('cohort'):
+            cohorts.setdefault(subject['cohort'], []).append(v)
+    return cohorts
+
+def get_subject_domain(subject, grid, typed=False):
+    """
+    Filter the slot and room indices a subject/group may use.
+    Capacity, day off and time preference are always applied; with typed=True
+    the required room type is applied too.
+    """
+    all_slots = list(range(len(grid)))
+    room_indices = range(len(grid.rooms))
+    
+    # Find suitable rooms for this subject/group
+    suitable_rooms = [j for j in room_indices
+                     if grid.room_capacity[j] >= subject['students']]
+    
+    if not suitable_rooms:
+        # If no perfect fit, find the closest room
+        closest = min(room_indices, key=lambda j: abs(grid.room_capacity[j] - subject['students']))
+        suitable_rooms = [closest]
+        print(f"Warning: No perfect room fit for {subject['subject_id']}. Using closest match: {grid.room_ids[closest]} (capacity: {grid.room_capacity[closest]})")
+    
+    if typed and subject.get('required_room_type'):
+        required_type = grid.type_code(subject['required_room_type'])
+        typed_rooms = [j for j in suitable_rooms if grid.room_type[j] == required_type]
+        if typed_rooms:
+            suitable_rooms = typed_rooms
+        else:
+            print(f"Warning: No {subject['required_room_type']} room fits {subject['subject_id']}. Ignoring room type")
     
-    # DEBUG: Print available resources
-    print(f"DEBUG: Available Resources")
-    print(f"Time slots: {len(time_slots)}")
-    print(f"Rooms: {len(rooms)}")
-    print(f"Subjects/Groups: {len(all_subjects)}")
+    # Filter time slots based on constraints upfront (day off, time preference and
+    # session length are memoised masks on the grid)
+    duration = subject.get('duration')
+    available_slots = grid.allowed_slots(subject.get('day_off'), subject.get('time_preference', 'any'), duration)
     
-    # Add variables with better domain filtering
-    for subject in all_subjects:
-        # Find suitable rooms for this subject/group
-        suitable_rooms = [room['room_id'] for room in rooms 
-                         if room['capacity'] >= subject['students']]
-        
-        if not suitable_rooms:
-            # If no perfect fit, find the closest room
-            closest_room = min(rooms, key=lambda r: abs(r['capacity'] - subject['students']))
-            suitable_rooms = [closest_room['room_id']]
-            print(f"Warning: No perfect room fit for {subject['subject_id']}. Using closest match: {closest_room['room_id']} (capacity: {closest_room['capacity']})")
-        
-        # Filter time slots based on constraints upfront
-        available_slots = time_slots.copy()
-        
-        # Apply day off constraint
-        if subject.get('day_off'):
-            available_slots = [slot for slot in available_slots 
-                             if slot.split('_')[0].lower() != subject['day_off'].lower()]
-        
-        # Apply time preference constraint
-        if subject.get('time_preference') != 'any':
-            available_slots = [slot for slot in available_slots 
-                             if check_time_preference(slot, subject['time_preference'])]
-        
-        if not available_slots:
-            print(f"Warning: No available time slots for {subject['subject_id']} after constraints")
-            available_slots = time_slots  # Fallback to all slots
-        
-        problem.addVariable(f"{subject['subject_id']}_time", available_slots)
-        problem.addVariable(f"{subject['subject_id']}_room", suitable_rooms)
-        
-        print(f"DEBUG: {subject['subject_id']} - {len(available_slots)} time slots, {len(suitable_rooms)} rooms")
+    if not available_slots:
+        print(f"Warning: No available time slots for {subject['subject_id']} after constraints")
+        # Fallback to every slot long enough, then to all slots
+        available_slots = grid.allowed_slots(None, 'any', duration) or all_slots
     
-    # CONSTRAINT 1: No professor double-booking
+    return available_slots, suitable_rooms
+
+def subject_domains(all_subjects, grid, typed=False):
+    """get_subject_domain() for every subject/group, in one vectorised pass when NumPy is installed"""
+    if HAVE_NUMPY:
+        return FeasibilityModel(all_subjects, grid).domains(typed)
+    return [get_subject_domain(subject, grid, typed) for subject in all_subjects]
+
+def add_slot_constraints(add_constraint, all_subjects, grid, combined=False):
+    """
+    Add the constraints that only involve time slots: professor/TA and cohort
+    cliques and split groups on the same day / consecutive. add_constraint(kind,
+    constraint, variables) registers each one; variables are "<id>_time", or
+    "<id>_slot" cells with combined=True.
+    """
+    # CONSTRAINT 1: No professor/TA double-booking (one all-different constraint per person)
     professor_subjects = {}
     for subject in all_subjects:
         prof = subject['professor'].lower()
@@ -175,39 +448,19 @@ def create_basic_scheduler(subjects, rooms):
             professor_subjects[prof] = []
         professor_subjects[prof].append(subject['subject_id'])
     
+    suffix = '_slot' if combined else '_time'
     for prof, subject_ids in professor_subjects.items():
         if len(subject_ids) > 1:
             print(f"DEBUG: Professor {prof} teaches {len(subject_ids)} subjects/groups")
-            for i in range(len(subject_ids)):
-                for j in range(i + 1, len(subject_ids)):
-                    subj1 = subject_ids[i]
-                    subj2 = subject_ids[j]
-                    problem.addConstraint(
-                        lambda time1, time2: time1 != time2,
-                        [f"{subj1}_time", f"{subj2}_time"]
-                    )
+            add_constraint('professor_conflict', DistinctSlotsConstraint(combined),
+                           [f"{subject_id}{suffix}" for subject_id in subject_ids])
     
-    # CONSTRAINT 2: No room double-booking
-    subject_ids = [s['subject_id'] for s in all_subjects]
-    for i in range(len(subject_ids)):
-        for j in range(i + 1, len(subject_ids)):
-            subj1 = subject_ids[i]
-            subj2 = subject_ids[j]
-            problem.addConstraint(
-                lambda time1, time2, room1, room2: 
-                    not (time1 == time2 and room1 == room2),
-                [f"{subj1}_time", f"{subj2}_time", f"{subj1}_room", f"{subj2}_room"]
-            )
-    
-    # CONSTRAINT 3: Room type constraints
-    for subject in all_subjects:
-        if subject.get('required_room_type'):
-            required_type = subject['required_room_type'].lower()
-            problem.addConstraint(
-                lambda room_id, rt=required_type: 
-                    any(room['room_type'].lower() == rt for room in rooms if room['room_id'] == room_id),
-                [f"{subject['subject_id']}_room"]
-            )
+    # CONSTRAINT 1b: Lectures of the same cohort must not overlap (sections may)
+    for cohort, members in lecture_cohorts(all_subjects).items():
+        if len(members) > 1:
+            print(f"DEBUG: Cohort {cohort} has {len(members)} lectures/groups")
+            add_constraint('cohort_conflict', DistinctSlotsConstraint(combined),
+                           [f"{all_subjects[v]['subject_id']}{suffix}" for v in members])
     
     # NEW CONSTRAINT 4: Split subject groups must be on same day and consecutive time slots
     grouped_subjects = {}
@@ -218,6 +471,7 @@ def create_basic_scheduler(subjects, rooms):
                 grouped_subjects[original_id] = []
             grouped_subjects[original_id].append(subject)
     
+    slot_day = grid.slot_day
     for original_id, groups in grouped_subjects.items():
         if len(groups) > 1:
             print(f"DEBUG: Applying constraints for split subject {original_id} with {len(groups)} groups")
@@ -228,111 +482,126 @@ def create_basic_scheduler(subjects, rooms):
                 for j in range(i + 1, len(group_ids)):
                     subj1 = group_ids[i]
                     subj2 = group_ids[j]
-                    problem.addConstraint(
-                        lambda time1, time2: time1.split('_')[0] == time2.split('_')[0],
-                        [f"{subj1}_time", f"{subj2}_time"]
-                    )
+                    if combined:
+                        add_constraint(
+                            'split_same_day',
+                            lambda cell1, cell2: slot_day[cell1[0]] == slot_day[cell2[0]],
+                            [f"{subj1}_slot", f"{subj2}_slot"]
+                        )
+                    else:
+                        add_constraint(
+                            'split_same_day',
+                            lambda time1, time2: slot_day[time1] == slot_day[time2],
+                            [f"{subj1}_time", f"{subj2}_time"]
+                        )
             
             # Groups should have consecutive time slots (as much as possible)
             # This is a soft constraint - we'll try to encourage it but not require it
             if len(groups) == 2:
                 # For 2 groups, try to make them consecutive
                 subj1, subj2 = group_ids[0], group_ids[1]
-                problem.addConstraint(
-                    lambda time1, time2: are_time_slots_consecutive(time1, time2),
-                    [f"{subj1}_time", f"{subj2}_time"]
-                )
-    
-    return problem, time_slots, all_subjects  # Return modified subjects list
-
-def are_time_slots_consecutive(slot1, slot2):
-    """Check if two time slots are consecutive on the same day"""
-    if slot1.split('_')[0] != slot2.split('_')[0]:
-        return False  # Different days
-    
-    day = slot1.split('_')[0]
-    time_part1 = slot1.split('_')[1]
-    time_part2 = slot2.split('_')[1]
-    
-    # Get all time slots for this day
-    all_slots = generate_time_slots()
-    day_slots = [slot for slot in all_slots if slot.startswith(day)]
-    day_slots.sort()
-    
-    try:
-        idx1 = day_slots.index(slot1)
-        idx2 = day_slots.index(slot2)
-        return abs(idx1 - idx2) == 1
-    except ValueError:
-        return False
-
-def create_fallback_scheduler(subjects, rooms):
-    """Simplified scheduler with fewer constraints for when main scheduler fails"""
-    time_slots = generate_time_slots()
-    random.shuffle(time_slots)
+                if combined:
+                    add_constraint(
+                        'split_consecutive',
+                        lambda cell1, cell2: grid.consecutive(cell1[0], cell2[0]),
+                        [f"{subj1}_slot", f"{subj2}_slot"]
+                    )
+                else:
+                    add_constraint(
+                        'split_consecutive',
+                        lambda time1, time2: grid.consecutive(time1, time2),
+                        [f"{subj1}_time", f"{subj2}_time"]
+                    )
+
+def create_basic_scheduler(subjects, rooms, combined=False, profile=None, time_slots=None, seed=None, time_limit=None):
+    """
+    Create scheduler with room capacity splitting.
+    Variables hold TimeGrid indices (slot index / room index); use
+    grid.decode_solution() to get labels back.
+    With combined=True each subject/group gets a single "<id>_slot" variable whose
+    domain is the pre-filtered (slot index, room index) cells it may use.
+    An optional profiling.SolverProfile counts and times every constraint check.
+    time_slots defaults to generate_time_slots(); a seed shuffles their order.
+    With time_limit (seconds), getSolution() raises SearchTimeout when the search
+    runs longer than that.
+    """
+    build_start = time.perf_counter()
+    time_slots = list(time_slots or generate_time_slots())
+    if seed is not None:
+        random.Random(seed).shuffle(time_slots)
+    grid = TimeGrid(time_slots, rooms)
     
     problem = Problem()
     
-    print("\nTrying fallback scheduler with relaxed constraints...")
+    def add_constraint(kind, constraint, variables):
+        if profile is not None:
+            constraint = profile.wrap(kind, constraint)
+        problem.addConstraint(constraint, variables)
     
-    # Split subjects if needed
-    all_subjects = []
-    for subject in subjects:
-        split_groups = split_subject_if_needed(subject, rooms)
-        all_subjects.extend(split_groups)
+    # First, split subjects if needed
+    all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
     
-    # Only essential constraints
-    for subject in all_subjects:
-        # Very relaxed room filtering
-        suitable_rooms = [room['room_id'] for room in rooms 
-                         if room['capacity'] >= subject['students'] * 0.5]
+    print(f"\nDEBUG: After splitting - Total subjects/groups: {len(all_subjects)}")
+    
+    # DEBUG: Print available resources
+    print(f"DEBUG: Available Resources")
+    print(f"Time slots: {len(time_slots)}")
+    print(f"Rooms: {len(rooms)}")
+    print(f"Subjects/Groups: {len(all_subjects)}")
+    
+    # Add variables with better domain filtering
+    domains = subject_domains(all_subjects, grid, typed=combined)
+    for subject, (available_slots, suitable_rooms) in zip(all_subjects, domains):
         
-        if not suitable_rooms:
-            suitable_rooms = [room['room_id'] for room in rooms]
+        if combined:
+            # Room type is applied to the domain itself instead of a separate constraint
+            cells = [(slot, room) for slot in available_slots for room in suitable_rooms]
+            problem.addVariable(f"{subject['subject_id']}_slot", cells)
+        else:
+            problem.addVariable(f"{subject['subject_id']}_time", available_slots)
+            problem.addVariable(f"{subject['subject_id']}_room", suitable_rooms)
         
-        problem.addVariable(f"{subject['subject_id']}_time", time_slots)
-        problem.addVariable(f"{subject['subject_id']}_room", suitable_rooms)
-    
-    # Only essential constraint: no room double-booking
-    subject_ids = [s['subject_id'] for s in all_subjects]
-    for i in range(len(subject_ids)):
-        for j in range(i + 1, len(subject_ids)):
-            subj1 = subject_ids[i]
-            subj2 = subject_ids[j]
-            problem.addConstraint(
-                lambda time1, time2, room1, room2: 
-                    not (time1 == time2 and room1 == room2),
-                [f"{subj1}_time", f"{subj2}_time", f"{subj1}_room", f"{subj2}_room"]
-            )
+        print(f"DEBUG: {subject['subject_id']} - {len(available_slots)} time slots, {len(suitable_rooms)} rooms")
     
-    return problem, time_slots, all_subjects
-
-def check_time_preference(time_slot, preference):
-    """Check if a time slot matches the professor's time preference"""
-    time_part = time_slot.split('_')[1]
-    start_time_str = time_part.split('-')[0]
-    start_time = convert_time_to_float(start_time_str)
-    
-    if preference == 'morning':
-        return start_time < 12.0
-    elif preference == 'afternoon':
-        return start_time >= 12.0
-    elif preference == 'before_11':
-        return start_time < 11.0
-    elif preference == 'after_11':
-        return start_time >= 11.0
-    elif preference == 'any':
-        return True
+    add_slot_constraints(add_constraint, all_subjects, grid, combined)
+    
+    # CONSTRAINT 2: No room double-booking (one global constraint, linear in subjects)
+    if combined:
+        # Every (time slot, room) cell can be used once
+        add_constraint('room_double_booking', AllDifferentConstraint(), [f"{s['subject_id']}_slot" for s in all_subjects])
     else:
-        return True
+        add_room_occupancy_constraint(problem, all_subjects, profile)
+    
+    # CONSTRAINT 3: Room type constraints (already in the domains for the combined model)
+    for subject in all_subjects:
+        if subject.get('required_room_type') and not combined:
+            required_type = grid.type_code(subject['required_room_type'])
+            add_constraint(
+                'room_type',
+                lambda room, rt=required_type: grid.room_type[room] == rt,
+                [f"{subject['subject_id']}_room"]
+            )
+    
+    if time_limit is not None:
+        parts = ('slot',) if combined else ('time', 'room')
+        problem.addConstraint(DeadlineConstraint(time_limit),
+                              [f"{subject['subject_id']}_{part}" for subject in all_subjects for part in parts])
+    
+    if profile is not None:
+        profile.build_time = time.perf_counter() - build_start
+    
+    return problem, grid, all_subjects  # Return modified subjects list
 
-def convert_time_to_float(time_str):
-    """Convert time string like '9:00' to float like 9.0"""
-    if ':' in time_str:
-        hours, minutes = map(int, time_str.split(':'))
-        return hours + minutes / 60.0
-    else:
-        return float(time_str)
+def add_room_occupancy_constraint(problem, all_subjects, profile=None):
+    """Add a single room double-booking constraint covering all subjects/groups"""
+    room_variables = []
+    for subject in all_subjects:
+        room_variables.append(f"{subject['subject_id']}_time")
+        room_variables.append(f"{subject['subject_id']}_room")
+    constraint = RoomOccupancyConstraint()
+    if profile is not None:
+        constraint = profile.wrap('room_double_booking', constraint)
+    problem.addConstraint(constraint, room_variables)
 
 def print_schedule(solution, subjects, time_slots):
     """Print the generated schedule with grouping information"""
@@ -347,6 +616,8 @@ def print_schedule(solution, subjects, time_slots):
     # Group by original subject for split groups
     original_subjects = {}
     for subject in subjects:
+        if subject.get('kind') == 'section':
+            continue
         original_id = subject.get('original_subject_id', subject['subject_id'])
         if original_id not in original_subjects:
             original_subjects[original_id] = {
@@ -368,6 +639,9 @@ def print_schedule(solution, subjects, time_slots):
         for original_id, info in split_subjects.items():
             print(f"  {original_id}: {info['original_name']} - {info['total_students']} students split into {len(info['groups'])} groups")
     
+    subjects_by_id = {subject['subject_id']: subject for subject in subjects}
+    grid = TimeGrid(time_slots)
+    
     # Group by day for better organization
     schedule_by_day = {}
     for key, value in solution.items():
@@ -375,26 +649,28 @@ def print_schedule(solution, subjects, time_slots):
             subject_id = key.replace('_time', '')
             room_key = f"{subject_id}_room"
             room = solution[room_key]
-            day = value.split('_')[0]
+            slot = grid.slot_index[value]
+            day = grid.slot_day[slot]
             
             if day not in schedule_by_day:
                 schedule_by_day[day] = []
             
-            subject_info = next(s for s in subjects if s['subject_id'] == subject_id)
+            subject_info = subjects_by_id[subject_id]
             schedule_by_day[day].append({
                 'time_slot': value,
                 'subject': subject_info,
                 'room': room,
-                'duration': get_slot_duration(value)
+                'start': grid.slot_start[slot],
+                'duration': grid.slot_duration[slot]
             })
     
-    # Print schedule organized by day
+    # Print schedule organized by day, in week order
     for day in sorted(schedule_by_day.keys()):
-        print(f"\n{day.upper()}:")
+        print(f"\n{grid.days[day].upper()}:")
         print("-" * 60)
         
         # Sort by time
-        day_schedule = sorted(schedule_by_day[day], key=lambda x: x['time_slot'])
+        day_schedule = sorted(schedule_by_day[day], key=lambda x: (x['start'], x['room']))
         
         for entry in day_schedule:
             subject = entry['subject']
@@ -408,95 +684,38 @@ def print_schedule(solution, subjects, time_slots):
             group_info = ""
             if is_split:
                 group_info = f" [Group {subject['group_number']}/{subject['total_groups']}]"
+            elif subject.get('kind') == 'section':
+                display_prof = prof
+                group_info = f" [Section {subject['section_number']}/{subject['total_sections']}]"
             
             print(f"  {time_part:<11} | Room: {entry['room']:<6} | {display_prof:<15} | {subject['subject_name']}{group_info}")
 
-def get_slot_duration(slot):
-    day, time_range = slot.split('_')
-    start, end = time_range.split('-')
-    start_h, start_m = map(int, start.split(':')) if ':' in start else (int(start), 0)
-    end_h, end_m = map(int, end.split(':')) if ':' in end else (int(end), 0)
-    duration = (end_h + end_m/60) - (start_h + start_m/60)
-    return duration
-
-def get_available_days(time_slots):
-    return list(set(slot.split('_')[0] for slot in time_slots))
-
-def generate_time_slots(days=['Sun', 'Mon', 'Tue', 'Wed', 'Thu']):
-    time_slots = []
-    start_hour = 9.0
-    end_hour = 15.0
-    slot_duration = 1.5
-    num_slots = int((end_hour - start_hour) / slot_duration)
-    
-    random.shuffle(days)
-    
-    for day in days:
-        current_time = start_hour
-        for i in range(num_slots):
-            start_time = current_time
-            end_time = current_time + slot_duration
-            start_str = format_time(start_time)
-            end_str = format_time(end_time)
-            time_slot = f"{day}_{start_str}-{end_str}"
-            time_slots.append(time_slot)
-            current_time = end_time
-    
-    return time_slots
-
-def format_time(hour_float):
-    hours = int(hour_float)
-    minutes = int((hour_float - hours) * 60)
-    return f"{hours}:{minutes:02d}"
-
-def validate_constraints(solution, subjects):
-    """Validate constraints including split subject constraints"""
-    day_off_violations = []
-    time_pref_violations = []
-    split_group_violations = []
-    
-    # Check for split subject constraints
-    grouped_subjects = {}
-    for subject in subjects:
-        if subject.get('is_split_group'):
-            original_id = subject['original_subject_id']
-            if original_id not in grouped_subjects:
-                grouped_subjects[original_id] = []
-            grouped_subjects[original_id].append(subject)
+def generate_time_slots(days=None, config=None):
+    """
+    Time slot labels for the default week (Sun-Thu, 9:00-15:00, 1.5h periods) or
+    for a time grid config (see time_grid.build_time_slots()), in week order.
+    """
+    config = dict(config or {})
+    if days:
+        config['days'] = list(days)
+    return build_time_slots(config)
+
+def validate_constraints(solution, subjects, grid):
+    """
+    Validate constraints including split subject constraints.
+    Prints the report and returns the ScheduleEvaluator violation records.
+    """
+    evaluator = ScheduleEvaluator(subjects, grid)
+    evaluator.load_solution(solution)
+    violations = evaluator.violations()
     
-    for original_id, groups in grouped_subjects.items():
-        if len(groups) > 1:
-            # Check if all groups are on same day
-            group_times = []
-            for group in groups:
-                group_id = group['subject_id']
-                if f"{group_id}_time" in solution:
-                    group_times.append(solution[f"{group_id}_time"])
-            
-            days = [time.split('_')[0] for time in group_times]
-            if len(set(days)) > 1:
-                split_group_violations.append(f"❌ Split subject {original_id} groups are on different days")
-            
-            # Check if groups have consecutive time slots
-            if len(groups) == 2:
-                time1, time2 = group_times[0], group_times[1]
-                if not are_time_slots_consecutive(time1, time2):
-                    split_group_violations.append(f"⚠️ Split subject {original_id} groups are not in consecutive time slots")
+    def messages(*kinds):
+        return [v['message'] for v in violations if v['kind'] in kinds]
     
-    for key, time_slot in solution.items():
-        if key.endswith('_time'):
-            subject_id = key.replace('_time', '')
-            subject = next(s for s in subjects if s['subject_id'] == subject_id)
-            professor = subject['professor']
-            day_off = subject.get('day_off')
-            time_pref = subject.get('time_preference', 'any')
-            day = time_slot.split('_')[0]
-            
-            if day_off and day_off.lower() == day.lower():
-                day_off_violations.append(f"❌ {professor} scheduled on {day} (day off) for {subject['subject_name']}")
-            
-            if time_pref != 'any' and not check_time_preference(time_slot, time_pref):
-                time_pref_violations.append(f"❌ {professor}'s time preference ({time_pref}) violated for {subject['subject_name']} at {time_slot}")
+    booking_violations = messages('room_clash', 'professor_clash', 'cohort_clash', 'capacity', 'session_length')
+    day_off_violations = messages('day_off')
+    time_pref_violations = messages('time_preference')
+    split_group_violations = messages('split_same_day', 'split_consecutive', 'split_same_room')
     
     print("\n" + "="*70)
     print("VALIDATION REPORT:")
@@ -522,6 +741,15 @@ def validate_constraints(solution, subjects):
             print(f"  {violation}")
     else:
         print("✅ All split group constraints satisfied!")
+    
+    if booking_violations:
+        print("\nBOOKING CONSTRAINT VIOLATIONS:")
+        for violation in booking_violations:
+            print(f"  {violation}")
+    
+    return violations
+
+OPTIMIZER_TIME_LIMIT = 10.0  # seconds
 
 def main():
     print("=== University Schedule Generator ===")
@@ -545,55 +773,74 @@ def main():
     for room in rooms:
         print(f"  - {room['room_id']}: {room['capacity']} seats ({room['room_type']})")
     
-    # Check if any subjects need splitting
-    max_capacity = max(room['capacity'] for room in rooms) if rooms else 0
-    large_subjects = [s for s in subjects if s['students'] > max_capacity]
-    if large_subjects:
-        print(f"\nNOTE: {len(large_subjects)} subject(s) will be split into multiple groups due to room capacity limits")
-        for subject in large_subjects:
-            groups_needed = math.ceil(subject['students'] / max_capacity)
-            print(f"  - {subject['subject_id']}: {subject['students']} students → {groups_needed} groups")
-    
     # Try main scheduler first
-    problem, time_slots, all_subjects = create_basic_scheduler(subjects, rooms)
+    problem, grid, all_subjects = create_basic_scheduler(subjects, rooms)
+    
+    # Report the group sizes splitting.plan_splits() actually chose
+    split_groups = {}
+    for subject in all_subjects:
+        if subject.get('is_split_group'):
+            split_groups.setdefault(subject['original_subject_id'], []).append(subject['students'])
+    if split_groups:
+        print(f"\nNOTE: {len(split_groups)} subject(s) were split into multiple groups due to room capacity limits")
+        for subject_id, sizes in split_groups.items():
+            print(f"  - {subject_id}: {sum(sizes)} students → {len(sizes)} groups of {', '.join(map(str, sizes))}")
     
     print(f"\nScheduling Information:")
-    print(f"  Time slots generated: {len(time_slots)}")
-    print(f"  Available days: {', '.join(sorted(get_available_days(time_slots)))}")
+    print(f"  Time slots generated: {len(grid.time_slots)}")
+    print(f"  Available days: {', '.join(grid.days)}")
     print(f"  Total subjects/groups to schedule: {len(all_subjects)}")
     
     print("\n" + "="*60)
     print("ATTEMPTING TO GENERATE SCHEDULE...")
     print("="*60)
     
-    solution = None
-    max_attempts = 3
+    # Catch the obviously impossible cases before searching
+    from diagnostics import precheck, print_issues, explain_infeasibility
+    issues = precheck(all_subjects, grid)
+    errors = [issue for issue in issues if issue['severity'] == 'error']
+    if issues:
+        print("\nPre-solve checks:")
+        print_issues(issues)
+    
+    # First attempt: full constraints on the combined (time, room) model
+    if errors:
+        print("\nAttempt 1/2: skipped, the constraints above cannot all be met")
+        solution = None
+    else:
+        print("\nAttempt 1/2: all constraints...")
+        problem, grid, all_subjects = create_basic_scheduler(subjects, rooms, combined=True)
+        solution = grid.decode_solution(problem.getSolution())
     
-    for attempt in range(max_attempts):
-        print(f"\nAttempt {attempt + 1}/{max_attempts}...")
-        
-        if attempt == 0:
-            # First attempt: full constraints
-            problem, time_slots, all_subjects = create_basic_scheduler(subjects, rooms)
-        else:
-            # Subsequent attempts: relaxed constraints
-            problem, time_slots, all_subjects = create_fallback_scheduler(subjects, rooms)
+    if solution:
+        print("✅ Solution found on attempt 1!")
+    else:
+        if not errors:
+            core = explain_infeasibility(all_subjects, grid, time_limit=OPTIMIZER_TIME_LIMIT)
+            if core:
+                print(f"❌ These subjects cannot all be scheduled together: {', '.join(core)}")
+        # Second attempt: minimise weighted constraint violations instead of dropping constraints
+        from optimizer import optimize_schedule
+        from evaluator import PENALTY_WEIGHTS
         
-        solution = problem.getSolution()
+        print("❌ No solution found with all constraints")
+        print(f"\nAttempt 2/2: optimising weighted penalties for {OPTIMIZER_TIME_LIMIT:.0f}s...")
+        best, model = optimize_schedule(all_subjects, grid, time_limit=OPTIMIZER_TIME_LIMIT)
+        solution = grid.decode_solution(best)
         
-        if solution:
-            print(f"✅ Solution found on attempt {attempt + 1}!")
-            break
-        else:
-            print(f"❌ No solution found with current constraint level")
+        print(f"✅ Best schedule found has penalty {model.total}")
+        for kind, count in model.breakdown().items():
+            if count:
+                print(f"  - {kind}: {count} violation(s) x {PENALTY_WEIGHTS[kind]}")
     
+    time_slots = grid.time_slots
     if solution:
         print_schedule(solution, all_subjects, time_slots)
-        validate_constraints(solution, all_subjects)
+        validate_constraints(solution, all_subjects, grid)
         
         # Statistics
-        total_hours = sum(get_slot_duration(slot) for slot in solution.values() 
-                         if isinstance(slot, str) and '_' in slot)
+        total_hours = sum(grid.slot_duration[grid.slot_index[value]] for key, value in solution.items()
+                          if key.endswith('_time'))
         utilized_slots = len(set(solution.values()))
         
         print(f"\nSchedule Statistics:")
@@ -603,14 +850,14 @@ def main():
         print(f"  Room utilization: {utilized_slots/len(rooms)*100:.1f}%")
         
     else:
-        print("\n❌ No feasible schedule found after all attempts!")
+        print("\n❌ No feasible schedule found!")
         print("\nDetailed Analysis:")
         print(f"- Total time slots available: {len(time_slots)}")
         print(f"- Rooms available: {len(rooms)}")
         print(f"- Subjects/groups to schedule: {len(all_subjects)}")
         
-        if len(time_slots) < len(all_subjects):
-            print("❌ Problem: Not enough time slots for all subjects/groups!")
+        if errors:
+            print_issues(errors)
         
         # Suggest solutions
         print("\nSuggested Solutions:")
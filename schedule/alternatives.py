@@ -0,0 +1,79 @@
+import contextlib
+import heapq
+import io
+import time
+
+from evaluator import ScheduleEvaluator
+from solver import NativeScheduler
+
+def assignment_difference(first, second):
+    """Number of subjects/groups whose (slot, room) cell differs between two assignments"""
+    return sum(1 for a, b in zip(first, second) if a != b)
+
+def iter_alternatives(all_subjects, grid, min_difference=1, max_penalty=None, time_limit=None, max_count=None,
+                      seed=0, solutions_per_run=200, weights=None):
+    """
+    Lazily yield (solution, penalty) for distinct feasible schedules.
+    Each schedule differs from every one yielded before in at least min_difference
+    subjects/groups, and its soft-constraint penalty is at most max_penalty if given.
+    Solutions are drawn from NativeScheduler.getSolutionIter(). After every
+    accepted schedule, and after solutions_per_run candidates without one, the
+    search restarts with another seed and with the cells of the schedules yielded
+    so far tried last (NativeScheduler's avoided), so later schedules are not all
+    near copies of the first.
+    Stops after max_count schedules or time_limit seconds. Only the yielded
+    assignments are kept in memory.
+    """
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    evaluator = ScheduleEvaluator(all_subjects, grid, weights)
+    variables = [f"{subject['subject_id']}_slot" for subject in all_subjects]
+    accepted = []
+    avoided = {subject['subject_id']: {} for subject in all_subjects}
+
+    def out_of_time():
+        return deadline is not None and time.perf_counter() > deadline
+
+    while not out_of_time() and (max_count is None or len(accepted) < max_count):
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler = NativeScheduler(all_subjects, grid, seed=seed, should_stop=out_of_time, avoided=avoided)
+        seed += 1
+        misses = 0
+        exhausted = True
+        for solution in scheduler.getSolutionIter():
+            assignment = [solution[variable] for variable in variables]
+            if all(assignment_difference(assignment, other) >= min_difference for other in accepted):
+                evaluator.reset(assignment)
+                if max_penalty is None or evaluator.total <= max_penalty:
+                    accepted.append(assignment)
+                    for subject, cell in zip(all_subjects, assignment):
+                        cells = avoided[subject['subject_id']]
+                        cells[cell] = cells.get(cell, 0) + 1
+                    yield solution, evaluator.total
+                    if max_count is not None and len(accepted) >= max_count:
+                        return
+                    exhausted = False
+                    break
+            misses += 1
+            if misses >= solutions_per_run or out_of_time():
+                exhausted = False
+                break
+        if exhausted and not scheduler.stats['stopped']:
+            return  # every schedule has been seen
+
+def top_alternatives(all_subjects, grid, k=5, min_difference=1, max_penalty=None, time_limit=10.0,
+                     max_candidates=None, seed=0, weights=None):
+    """
+    Best k schedules by penalty found within the budget, lowest penalty first, as
+    a list of (solution, penalty). Candidates are streamed from iter_alternatives()
+    (so they are pairwise at least min_difference apart) and only the current best
+    k are kept.
+    """
+    kept = []  # heap of (-penalty, order, solution): the worst kept schedule is on top
+    candidates = iter_alternatives(all_subjects, grid, min_difference=min_difference, max_penalty=max_penalty,
+                                   time_limit=time_limit, max_count=max_candidates, seed=seed, weights=weights)
+    for order, (solution, penalty) in enumerate(candidates):
+        if len(kept) < k:
+            heapq.heappush(kept, (-penalty, order, solution))
+        elif penalty < -kept[0][0]:
+            heapq.heapreplace(kept, (-penalty, order, solution))
+    return [(solution, -negative) for negative, _, solution in sorted(kept, key=lambda entry: (-entry[0], entry[1]))]
@@ -0,0 +1,126 @@
+import gzip
+import json
+import os
+import threading
+import time
+
+from cache import instance_fingerprint
+from optimizer import Annealer
+
+CHECKPOINT_VERSION = 1
+
+def checkpoint_key(all_subjects, grid):
+    """
+    Fingerprint of the instance a checkpoint belongs to. Snapshots hold slot, room
+    and subject indices, so the order of all three is part of the key.
+    """
+    order = {'subjects': [s['subject_id'] for s in all_subjects], 'rooms': grid.room_ids,
+             'time_slots': grid.time_slots}
+    return instance_fingerprint(all_subjects, grid.rooms, grid.time_slots, settings=order)
+
+def save_checkpoint(path, state):
+    """Write state as gzipped compact JSON, atomically (a crash mid-write keeps the previous file)"""
+    data = gzip.compress(json.dumps(dict(state, version=CHECKPOINT_VERSION), separators=(',', ':')).encode())
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+def load_checkpoint(path):
+    """Read a checkpoint written by save_checkpoint(); raises ValueError if it is not one"""
+    try:
+        with open(path, 'rb') as f:
+            state = json.loads(gzip.decompress(f.read()))
+    except (OSError, EOFError, json.JSONDecodeError) as error:
+        if isinstance(error, FileNotFoundError):
+            raise
+        raise ValueError(f"Not a scheduler checkpoint: {path} ({error})")
+    if not isinstance(state, dict) or state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version in {path}")
+    return state
+
+class AnytimeSolver:
+    """
+    Simulated annealing in a background thread that always has an answer.
+    best() returns the best schedule found so far at any moment; result(timeout)
+    waits at most timeout seconds and then returns it, without stopping the search.
+    With checkpoint_path the search state (current and best assignment, penalty,
+    temperature, iteration, RNG state) is saved every checkpoint_every seconds and
+    when the run ends, and resume=True continues from that file instead of starting
+    over. on_checkpoint(solution, penalty) is called after every save, e.g. to
+    publish the best-so-far schedule.
+    """
+
+    def __init__(self, all_subjects, grid, seed=None, weights=None, checkpoint_path=None, checkpoint_every=30.0,
+                 resume=False, on_checkpoint=None):
+        self.all_subjects = all_subjects
+        self.grid = grid
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.on_checkpoint = on_checkpoint
+        self.key = checkpoint_key(all_subjects, grid)
+        if resume:
+            state = load_checkpoint(checkpoint_path)
+            if state.get('instance') != self.key:
+                raise ValueError(f"Checkpoint {checkpoint_path} was made for a different instance")
+            self.annealer = Annealer.restore(state, all_subjects, grid, weights)
+            print(f"NOTE: Resuming from {checkpoint_path}: best penalty {state['best_penalty']} after "
+                  f"{state['iteration']} iterations and {state['elapsed']:.1f}s")
+        else:
+            self.annealer = Annealer(all_subjects, grid, seed=seed, weights=weights)
+        self._lock = threading.Lock()
+        self._best = (self.annealer.solution(), self.annealer.best_total)
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._thread = None
+        self.error = None
+
+    def start(self, time_limit=60.0):
+        """Search for up to time_limit seconds in a daemon thread; returns self"""
+        self._thread = threading.Thread(target=self._run, args=(time_limit,), daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self, time_limit):
+        try:
+            checkpoint = self._checkpoint if self.checkpoint_path else None
+            self.annealer.run(time_limit, should_stop=self._stop.is_set, on_best=self._publish,
+                              checkpoint=checkpoint, checkpoint_every=self.checkpoint_every)
+            if checkpoint is not None:
+                checkpoint(self.annealer.snapshot())
+        except Exception as error:
+            self.error = error
+        finally:
+            self._done.set()
+
+    def _publish(self, best, penalty):
+        solution = self.annealer.solution(best)
+        with self._lock:
+            self._best = (solution, penalty)
+
+    def _checkpoint(self, state):
+        save_checkpoint(self.checkpoint_path, dict(state, instance=self.key, saved=time.time()))
+        if self.on_checkpoint is not None:
+            self.on_checkpoint(*self.best())
+
+    def best(self):
+        """(best "<id>_slot" solution so far, its penalty)"""
+        with self._lock:
+            return self._best
+
+    def running(self):
+        return self._thread is not None and not self._done.is_set()
+
+    def result(self, timeout=None):
+        """Wait for the search to finish, at most timeout seconds, and return best()"""
+        # An Event rather than Thread.join(), which Ctrl-C can leave returning too early
+        if self._thread is not None:
+            self._done.wait(timeout)
+        return self.best()
+
+    def stop(self):
+        """End the search (writing a final checkpoint) and return best()"""
+        self._stop.set()
+        return self.result()
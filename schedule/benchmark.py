@@ -0,0 +1,230 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import platform
+import subprocess
+import time
+import tracemalloc
+
+from ali_test import create_basic_scheduler, generate_time_slots, split_all_subjects
+from evaluator import ScheduleEvaluator
+from generator import PROFILES, generate_profile
+from milp import create_milp_scheduler
+from solver import create_native_scheduler
+from time_grid import TimeGrid
+from two_phase import create_two_phase_scheduler
+
+SOLVERS = ['constraint', 'two_phase', 'milp', 'native', 'anneal']
+
+def run_constraint_solver(subjects, rooms, time_limit=None):
+    """Solve with the python-constraint combined model, returning (solution, grid, all_subjects, constraints, build_time)"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        problem, grid, all_subjects = create_basic_scheduler(subjects, rooms, combined=True)
+    build_time = time.perf_counter() - start
+    return problem.getSolution(), grid, all_subjects, len(problem._constraints), build_time
+
+def run_two_phase_solver(subjects, rooms, time_limit=None):
+    """Solve times then per-slot rooms, returning (solution, grid, all_subjects, constraints, build_time)"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler, grid, all_subjects = create_two_phase_scheduler(subjects, rooms)
+    build_time = time.perf_counter() - start
+    return scheduler.getSolution(), grid, all_subjects, len(scheduler.problem._constraints), build_time
+
+def run_milp_solver(subjects, rooms, time_limit=None):
+    """
+    Solve the integer program with HiGHS, returning (solution, grid, all_subjects, rows,
+    build_time, extra) where extra holds the MILP status, objective, gap and variable count
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler, grid, all_subjects = create_milp_scheduler(subjects, rooms, time_limit=time_limit)
+    build_time = time.perf_counter() - start
+    solution = scheduler.getSolution()
+    extra = {key: scheduler.stats[key] for key in ('status', 'objective', 'gap', 'variables')}
+    return solution, grid, all_subjects, scheduler.stats['rows'], build_time, extra
+
+def run_native_solver(subjects, rooms, time_limit=None):
+    """Solve with NativeScheduler, returning (solution, grid, all_subjects, constraints, build_time)"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler, grid, all_subjects = create_native_scheduler(subjects, rooms, seed=0, time_limit=time_limit)
+    build_time = time.perf_counter() - start
+    # Pairwise professor, cohort and split constraints plus one all-different per shared (slot, room) cell
+    constraints = (sum(map(len, scheduler.prof_neighbors)) + sum(map(len, scheduler.cohort_neighbors))
+                   + sum(map(len, scheduler.split_neighbors))) // 2
+    constraints += sum(1 for users in scheduler.cell_users.values() if len(users) > 1)
+    return scheduler.getSolution(), grid, all_subjects, constraints, build_time
+
+def run_anneal_solver(subjects, rooms, time_limit=None):
+    """Optimise with simulated annealing, returning (solution, grid, all_subjects, constraints, build_time)"""
+    from optimizer import optimize_schedule
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        grid = TimeGrid(generate_time_slots(), rooms)
+        all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+    build_time = time.perf_counter() - start
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution, model = optimize_schedule(all_subjects, grid, time_limit=time_limit or 10.0, seed=0)
+    return solution, grid, all_subjects, None, build_time
+
+RUNNERS = {'constraint': run_constraint_solver, 'two_phase': run_two_phase_solver, 'milp': run_milp_solver,
+           'native': run_native_solver, 'anneal': run_anneal_solver}
+
+# tracemalloc slows the solvers down 7-15x, so peak memory is measured in a separate
+# run that gets this many times the time budget
+TRACE_SLOWDOWN = 15
+
+def measure(name, subjects, rooms, time_limit=None):
+    """Run one solver and collect build/solve time, constraint count and penalty (tracing off)"""
+    start = time.perf_counter()
+    solution, grid, all_subjects, constraints, build_time, *extra = RUNNERS[name](subjects, rooms, time_limit)
+    solve_time = time.perf_counter() - start - build_time
+
+    penalty = None
+    if solution:
+        evaluator = ScheduleEvaluator(all_subjects, grid)
+        penalty = evaluator.load_solution(grid.decode_solution(solution))
+    row = {
+        'found': bool(solution),
+        'groups': len(all_subjects),
+        'build_time': build_time,
+        'solve_time': solve_time,
+        'peak_memory_mb': None,
+        'constraints': constraints,
+        'penalty': penalty
+    }
+    if extra:
+        row.update(extra[0])  # solver-specific fields, e.g. the MILP objective and gap
+    return row
+
+def measure_memory(name, subjects, rooms, time_limit=None):
+    """Peak traced memory in MB of one build and solve; timings from this run are meaningless"""
+    tracemalloc.start()
+    try:
+        RUNNERS[name](subjects, rooms, time_limit)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 2 ** 20
+
+def _worker(queue, function, name, subjects, rooms, time_limit):
+    queue.put(function(name, subjects, rooms, time_limit))
+
+def _run_child(function, name, subjects, rooms, time_limit, wait):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_worker, args=(queue, function, name, subjects, rooms, time_limit))
+    process.start()
+    process.join(wait)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return None
+    return queue.get() if process.exitcode == 0 else None
+
+def run_with_timeout(name, subjects, rooms, timeout, memory=False):
+    """
+    Run one solver in a child process so a stuck search can be killed after timeout seconds.
+    With memory, a second traced run (allowed TRACE_SLOWDOWN times longer) fills in peak_memory_mb.
+    """
+    row = _run_child(measure, name, subjects, rooms, timeout, timeout + 5)
+    if row is not None and memory:
+        row['peak_memory_mb'] = _run_child(measure_memory, name, subjects, rooms, timeout,
+                                           timeout * TRACE_SLOWDOWN + 5)
+    return row
+
+def run_suite(sizes=(100, 500, 2000), profiles=('baseline',), solvers=('constraint', 'native'), seed=0, timeout=120,
+              memory=False):
+    """
+    Benchmark the chosen back ends on generated instances for every size/profile combination.
+    memory adds a separate tracemalloc run per solver for peak memory.
+    """
+    results = []
+    for profile in profiles:
+        for size in sizes:
+            subjects, rooms = generate_profile(profile, size, seed=seed)
+            for name in solvers:
+                outcome = run_with_timeout(name, subjects, rooms, timeout, memory)
+                row = {'profile': profile, 'subjects': size, 'rooms': len(rooms), 'solver': name,
+                       'timed_out': outcome is None}
+                row.update(outcome or {'found': False})
+                results.append(row)
+                print_result(row)
+    return results
+
+def compare_solvers(sizes=(100, 500, 2000), seed=0, timeout=120):
+    """Benchmark python-constraint against NativeScheduler on generated instances"""
+    return run_suite(sizes, seed=seed, timeout=timeout)
+
+def print_result(row):
+    label = f"  {row['profile']:<11} | {row['subjects']:>5} subjects | {row['solver']:<10}"
+    if row['timed_out']:
+        print(f"{label} | timed out")
+    else:
+        status = f"penalty {row['penalty']}" if row['found'] else "no solution"
+        constraints = row['constraints'] if row['constraints'] is not None else '-'
+        memory = f" | {row['peak_memory_mb']:.1f} MB" if row.get('peak_memory_mb') is not None else ""
+        print(f"{label} | build {row['build_time']:.3f}s | solve {row['solve_time']:.3f}s"
+              f"{memory} | {constraints} constraints | {status}"
+              + (f" | {row['status']}, objective {row['objective']}, gap {row['gap']}" if 'objective' in row else ""))
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_report(path, results, **settings):
+    report = {
+        'revision': git_revision(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'settings': settings,
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+def compare_reports(baseline_path, results):
+    """Print solve time and penalty changes against an earlier report"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(r['profile'], r['subjects'], r['solver']): r for r in baseline['results']}
+    print(f"\n=== Compared with {baseline.get('revision') or baseline_path} ===")
+    for row in results:
+        old = previous.get((row['profile'], row['subjects'], row['solver']))
+        if old is None or old['timed_out'] or row['timed_out']:
+            continue
+        ratio = row['solve_time'] / old['solve_time'] if old['solve_time'] else float('inf')
+        print(f"  {row['profile']:<11} | {row['subjects']:>5} subjects | {row['solver']:<10}"
+              f" | solve x{ratio:.2f} | penalty {old['penalty']} -> {row['penalty']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare scheduler back ends on generated instances")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 2000])
+    parser.add_argument('--profiles', nargs='+', choices=sorted(PROFILES), default=['baseline'])
+    parser.add_argument('--solvers', nargs='+', choices=SOLVERS, default=['constraint', 'native'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--memory', action='store_true',
+                        help="also measure peak memory (a separate, much slower tracemalloc run per solver)")
+    parser.add_argument('--report', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    print("=== Scheduler Benchmark ===")
+    results = run_suite(args.sizes, args.profiles, args.solvers, args.seed, args.timeout, args.memory)
+    if args.report:
+        write_report(args.report, results, sizes=args.sizes, profiles=args.profiles,
+                     solvers=args.solvers, seed=args.seed, timeout=args.timeout, memory=args.memory)
+        print(f"\nReport written to {args.report}")
+    if args.baseline:
+        compare_reports(args.baseline, results)
+
+if __name__ == "__main__":
+    main()
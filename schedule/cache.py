@@ -0,0 +1,234 @@
+import contextlib
+import hashlib
+import io
+import json
+import os
+import time
+
+from ali_test import generate_time_slots, split_all_subjects
+from solver import NativeScheduler
+from time_grid import TimeGrid
+
+CACHE_VERSION = 3
+
+# fingerprint -> subject/room ids of every feasible entry, so nearest() reads one file
+INDEX_NAME = 'nearest.index'
+
+SUBJECT_KEYS = ('subject_id', 'students', 'professor', 'required_room_type', 'day_off', 'time_preference',
+                'original_subject_id', 'group_number', 'total_groups', 'kind', 'cohort', 'duration')
+
+def canonical_subject(subject):
+    """The fields of a split subject/group that matter to the solvers, normalised like the models compare them"""
+    entry = {key: subject.get(key) for key in SUBJECT_KEYS}
+    entry['professor'] = subject['professor'].lower()
+    entry['required_room_type'] = (subject.get('required_room_type') or '').lower()
+    return entry
+
+def canonical_room(room):
+    return [room['room_id'], room['capacity'], room['room_type'].lower()]
+
+def canonical_instance(all_subjects, rooms, time_slots, settings=None):
+    """
+    Order-independent description of an instance: split subjects/groups sorted by id,
+    rooms sorted by id, the set of time slots and the solver settings. Names are
+    normalised the same way the models compare them (professor and types lower case).
+    """
+    return {
+        'version': CACHE_VERSION,
+        'subjects': [canonical_subject(s) for s in sorted(all_subjects, key=lambda s: s['subject_id'])],
+        'rooms': sorted(canonical_room(room) for room in rooms),
+        'time_slots': sorted(time_slots),
+        'settings': settings or {}
+    }
+
+def instance_fingerprint(all_subjects, rooms, time_slots, settings=None):
+    """Stable SHA-256 hex digest of canonical_instance()"""
+    canonical = canonical_instance(all_subjects, rooms, time_slots, settings)
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+class SolutionCache:
+    """
+    On-disk cache of solved and proven-infeasible instances, one JSON file per
+    fingerprint. Reads refresh a file's modification time and writes evict the
+    least recently used files until the directory fits in max_bytes. A small
+    index of the feasible entries' subject/room ids serves nearest().
+    """
+
+    def __init__(self, directory, max_bytes=50 * 2 ** 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, fingerprint):
+        return os.path.join(self.directory, f"{fingerprint}.json")
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _load_index(self):
+        path = os.path.join(self.directory, INDEX_NAME)
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            print(f"DEBUG: Rebuilding damaged cache index {path}")
+        # Caches written before the index existed: scan the entries once
+        index = {}
+        for _, _, entry_path in self._entries():
+            try:
+                with open(entry_path, encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            if entry.get('feasible'):
+                fingerprint = os.path.basename(entry_path)[:-len('.json')]
+                index[fingerprint] = [entry['subject_ids'], entry['room_ids']]
+        self._write_index(index)
+        return index
+
+    def _write_index(self, index):
+        path = os.path.join(self.directory, INDEX_NAME)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'))
+        os.replace(temporary, path)
+
+    def get(self, fingerprint):
+        """Cached entry {'feasible', 'solution', ...} or None"""
+        path = self._path(fingerprint)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        os.utime(path)
+        return entry
+
+    def put(self, fingerprint, solution, all_subjects=(), rooms=(), **info):
+        """
+        Store a "<id>_time"/"<id>_room" solution, or None for a proven-infeasible
+        instance. The subject and room ids are kept for nearest() lookups, and the
+        canonical records for changed_records().
+        """
+        entry = dict(info, feasible=solution is not None, solution=solution, created=time.time(),
+                     subject_ids=sorted(s['subject_id'] for s in all_subjects),
+                     room_ids=sorted(room['room_id'] for room in rooms),
+                     subjects={s['subject_id']: canonical_subject(s) for s in all_subjects},
+                     rooms={room['room_id']: canonical_room(room) for room in rooms})
+        index = self._load_index()
+        path = self._path(fingerprint)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temporary, path)
+        if entry['feasible']:
+            index[fingerprint] = [entry['subject_ids'], entry['room_ids']]
+        else:
+            index.pop(fingerprint, None)
+        self.evict(index)
+
+    def evict(self, index=None):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        index = self._load_index() if index is None else index
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            index.pop(os.path.basename(path)[:-len('.json')], None)
+            total -= size
+        self._write_index(index)
+
+    def nearest(self, all_subjects, rooms, min_overlap=0.8):
+        """
+        Feasible cached solution whose subject/room ids overlap this instance's the
+        most (Jaccard similarity of at least min_overlap), or None. Used to seed a
+        re-solve when the exact instance has not been seen.
+        """
+        wanted = set(s['subject_id'] for s in all_subjects) | set('room:' + r['room_id'] for r in rooms)
+        candidates = []
+        for fingerprint, (subject_ids, room_ids) in self._load_index().items():
+            ids = set(subject_ids) | set('room:' + r for r in room_ids)
+            overlap = len(wanted & ids) / len(wanted | ids) if wanted | ids else 1.0
+            if overlap >= min_overlap:
+                candidates.append((overlap, fingerprint))
+        # Another process may have evicted the best match since the index was written
+        for _, fingerprint in sorted(candidates, reverse=True):
+            entry = self.get(fingerprint)
+            if entry is not None and entry.get('feasible'):
+                return entry
+        return None
+
+def changed_records(entry, all_subjects, rooms):
+    """
+    (subject ids, room ids) whose canonical record differs from a cached entry's,
+    including ones the entry does not have. Split groups report their original
+    subject id, the id reschedule() takes changes for.
+    """
+    cached_subjects, cached_rooms = entry['subjects'], entry['rooms']
+    subject_ids = set(s.get('original_subject_id', s['subject_id']) for s in all_subjects
+                      if cached_subjects.get(s['subject_id']) != canonical_subject(s))
+    room_ids = set(room['room_id'] for room in rooms if cached_rooms.get(room['room_id']) != canonical_room(room))
+    return subject_ids, room_ids
+
+def solve_cached(subjects, rooms, cache, solve=None, settings=None, seed=None, time_limit=None, time_slots=None,
+                 profile=None):
+    """
+    Return (solution, grid, all_subjects, source) using the cache where possible.
+    source is 'hit', 'near' (re-solved from the closest cached schedule) or 'solved'.
+    solve is an optional callable returning (solution, grid, all_subjects); by default
+    NativeScheduler is used (with profile, if given), and only its proven-infeasible
+    results are cached as such. Near hits are re-solved by reschedule(), which is
+    NativeScheduler too, so they are only used without a solve callable: a schedule
+    cached under another solver's settings always comes from that solver. Subjects
+    and rooms whose records differ from the cached ones are passed as changes, so
+    an edited subject is re-placed instead of keeping its old cell.
+    """
+    time_slots = time_slots or generate_time_slots()
+    grid = TimeGrid(time_slots, rooms)
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+    fingerprint = instance_fingerprint(all_subjects, rooms, time_slots, settings)
+
+    entry = cache.get(fingerprint)
+    if entry is not None:
+        print(f"DEBUG: Cache hit {fingerprint[:12]} ({'feasible' if entry['feasible'] else 'infeasible'})")
+        return entry['solution'], grid, all_subjects, 'hit'
+
+    seed_entry = cache.nearest(all_subjects, rooms) if solve is None else None
+    if seed_entry is not None and 'subjects' in seed_entry:
+        from reschedule import reschedule
+        # Subjects/rooms whose id is unchanged but whose fields were edited must not keep their cells
+        changed_subjects, changed_rooms = changed_records(seed_entry, all_subjects, rooms)
+        changes = {'subjects': {'update': [s for s in subjects if s['subject_id'] in changed_subjects]},
+                   'rooms': {'update': [room for room in rooms if room['room_id'] in changed_rooms]}}
+        solution, grid, all_subjects, _ = reschedule(seed_entry['solution'], subjects, rooms, changes=changes,
+                                                     seed=seed, time_limit=time_limit, time_slots=time_slots)
+        if solution:
+            cache.put(fingerprint, solution, all_subjects, rooms, settings=settings)
+            return solution, grid, all_subjects, 'near'
+
+    if solve is not None:
+        solution, grid, all_subjects = solve()
+        proven = False
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler = NativeScheduler(all_subjects, grid, seed=seed, time_limit=time_limit, profile=profile)
+        solution = grid.decode_solution(scheduler.getSolution())
+        proven = solution is None and not scheduler.stats['stopped']
+    if solution or proven:
+        cache.put(fingerprint, solution or None, all_subjects, rooms, settings=settings)
+    return solution, grid, all_subjects, 'solved'
@@ -0,0 +1,246 @@
+import argparse
+import contextlib
+import io
+import sys
+
+from ali_test import SearchTimeout, create_basic_scheduler, print_schedule, validate_constraints
+from evaluator import ScheduleEvaluator
+from loader import load_changes, load_grid_config, load_instance, load_solution, write_solution
+
+SOLVERS = ['constraint', 'two_phase', 'milp', 'native', 'anneal', 'portfolio', 'decompose']
+
+def solve(subjects, rooms, args, profile=None, time_slots=None, changes=None):
+    """Run the chosen back end; returns (solution, grid, all_subjects) with label values"""
+    if args.previous:
+        from reschedule import reschedule
+        solution, grid, all_subjects, _ = reschedule(load_solution(args.previous), subjects, rooms,
+                                                     changes=changes, time_limit=args.time_limit, seed=args.seed,
+                                                     time_slots=time_slots)
+        return solution, grid, all_subjects
+    if args.solver == 'constraint':
+        problem, grid, all_subjects = create_basic_scheduler(subjects, rooms, combined=True, profile=profile,
+                                                             time_slots=time_slots, time_limit=args.time_limit)
+        try:
+            solution = profile.time_solve(problem.getSolution) if profile else problem.getSolution()
+        except SearchTimeout as error:
+            print(f"NOTE: {error}")
+            solution = None
+        return grid.decode_solution(solution), grid, all_subjects
+    if args.solver == 'two_phase':
+        from two_phase import create_two_phase_scheduler
+        scheduler, grid, all_subjects = create_two_phase_scheduler(subjects, rooms, profile=profile,
+                                                                   time_slots=time_slots, workers=args.workers,
+                                                                   time_limit=args.time_limit)
+        solution = profile.time_solve(scheduler.getSolution) if profile else scheduler.getSolution()
+        if solution is None and scheduler.stats['stopped']:
+            print(f"NOTE: No schedule found within the {args.time_limit:g}s time limit")
+        elif solution is None and scheduler.stats['unmatched_slot']:
+            print(f"NOTE: No room matching for slot {scheduler.stats['unmatched_slot']}")
+        return grid.decode_solution(solution), grid, all_subjects
+    if args.solver == 'milp':
+        from milp import create_milp_scheduler
+        hint = load_solution(args.hint) if args.hint else None
+        scheduler, grid, all_subjects = create_milp_scheduler(subjects, rooms, time_slots=time_slots,
+                                                              time_limit=args.time_limit, gap=args.gap, hint=hint)
+        solution = scheduler.getSolution()
+        stats = scheduler.stats
+        print(f"MILP {stats['status']}: objective {stats['objective']}, gap {stats['gap']}, "
+              f"{stats['solve_time']:.2f}s ({stats['variables']} variables, {stats['rows']} rows)")
+        if solution is None:
+            print(f"NOTE: {stats['message']}")
+        return grid.decode_solution(solution), grid, all_subjects
+    if args.solver == 'native':
+        from solver import create_native_scheduler
+        scheduler, grid, all_subjects = create_native_scheduler(subjects, rooms, seed=args.seed,
+                                                                time_limit=args.time_limit, time_slots=time_slots,
+                                                                profile=profile)
+        return grid.decode_solution(scheduler.getSolution()), grid, all_subjects
+    if args.solver == 'anneal':
+        from ali_test import generate_time_slots, split_all_subjects
+        from optimizer import optimize_schedule
+        from time_grid import TimeGrid
+        grid = TimeGrid(time_slots or generate_time_slots(), rooms)
+        all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+        if args.checkpoint:
+            return solve_anytime(all_subjects, grid, args), grid, all_subjects
+        solution, _ = optimize_schedule(all_subjects, grid, time_limit=args.time_limit or 10.0, seed=args.seed)
+        return grid.decode_solution(solution), grid, all_subjects
+    if args.solver == 'portfolio':
+        from portfolio import solve_portfolio
+        solution, grid, all_subjects, _ = solve_portfolio(subjects, rooms, workers=args.workers,
+                                                          time_limit=args.time_limit or 30.0, time_slots=time_slots)
+        return solution, grid, all_subjects
+    from decompose import solve_decomposed
+    solution, grid, all_subjects, _ = solve_decomposed(subjects, rooms, parallel=bool(args.workers),
+                                                       workers=args.workers, seed=args.seed,
+                                                       time_limit=args.time_limit, time_slots=time_slots)
+    return solution, grid, all_subjects
+
+def solve_anytime(all_subjects, grid, args):
+    """
+    Anneal with the search state saved to --checkpoint every --checkpoint-every seconds
+    (and the best schedule so far written to --out). --resume continues from the file.
+    Ctrl-C stops the search early and keeps the best schedule found.
+    """
+    from anytime import AnytimeSolver
+
+    def publish(solution, penalty):
+        if args.out:
+            write_solution(args.out, grid.decode_solution(solution), all_subjects, grid,
+                           extra={'solver': args.solver, 'penalty': penalty, 'partial': True})
+        print(f"NOTE: Checkpoint saved to {args.checkpoint}, best penalty so far {penalty}")
+
+    try:
+        solver = AnytimeSolver(all_subjects, grid, seed=args.seed, checkpoint_path=args.checkpoint,
+                               checkpoint_every=args.checkpoint_every, resume=args.resume, on_checkpoint=publish)
+    except (OSError, ValueError) as error:
+        print(f"❌ Cannot resume: {error}", file=sys.stderr)
+        return None
+    solver.start(args.time_limit or 10.0)
+    try:
+        solution, _ = solver.result()
+    except KeyboardInterrupt:
+        print("⚠️ Interrupted, stopping the search", file=sys.stderr)
+        solution, _ = solver.stop()
+    if solver.error is not None:
+        print(f"⚠️ Search stopped with an error: {solver.error}", file=sys.stderr)
+    return grid.decode_solution(solution)
+
+def presolve_errors(subjects, rooms, time_slots=None):
+    """Infeasibility found by diagnostics.precheck() without searching"""
+    from ali_test import generate_time_slots, split_all_subjects
+    from diagnostics import precheck
+    from time_grid import TimeGrid
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_subjects = split_all_subjects(subjects, rooms, time_slots)
+    issues = precheck(all_subjects, TimeGrid(time_slots or generate_time_slots(), rooms))
+    return [issue for issue in issues if issue['severity'] == 'error']
+
+def write_alternatives(subjects, rooms, args, time_slots=None):
+    """Find up to --alternatives diverse schedules and write each to <out>_<n>.<ext>"""
+    import os
+    from alternatives import top_alternatives
+    from ali_test import generate_time_slots, split_all_subjects
+    from time_grid import TimeGrid
+    grid = TimeGrid(time_slots or generate_time_slots(), rooms)
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+    results = top_alternatives(all_subjects, grid, k=args.alternatives, min_difference=args.min_difference,
+                               time_limit=args.time_limit or 10.0, seed=args.seed or 0)
+    if not results:
+        print("❌ No feasible schedule found!", file=sys.stderr)
+        return 1
+    stem, extension = os.path.splitext(args.out or 'schedule.json')
+    for number, (solution, penalty) in enumerate(results, 1):
+        path = f"{stem}_{number}{extension}"
+        write_solution(path, grid.decode_solution(solution), all_subjects, grid,
+                       extra={'solver': 'native', 'alternative': number, 'penalty': penalty})
+        print(f"Alternative {number}: penalty {penalty} -> {path}")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m schedule",
+                                     description="Generate a timetable from subject and room files")
+    parser.add_argument('--subjects', required=True, help="subjects file (.csv, .json, .jsonl, .yaml)")
+    parser.add_argument('--rooms', required=True, help="rooms file (.csv, .json, .jsonl, .yaml)")
+    parser.add_argument('--tas', help="teaching assistants file (name, day_off, time_preference, priority)")
+    parser.add_argument('--grid', help="time grid config (.json, .yaml): days, hours, breaks, long sessions")
+    parser.add_argument('--out', help="write the schedule to this .json or .csv file")
+    parser.add_argument('--solver', choices=SOLVERS, default='constraint',
+                        help="back end to use (default: the python-constraint model)")
+    parser.add_argument('--previous', help="earlier schedule (.json or .csv) to change as little as possible")
+    parser.add_argument('--changes', metavar='FILE',
+                        help="change request (.json, .yaml) applied before re-solving --previous")
+    parser.add_argument('--cache', metavar='DIR', help="reuse schedules for identical or similar inputs from DIR")
+    parser.add_argument('--time-limit', type=float, help="solver time budget in seconds")
+    parser.add_argument('--gap', type=float, help="relative optimality gap to stop at (milp solver)")
+    parser.add_argument('--hint', help="earlier schedule the milp solver prefers among equally good ones")
+    parser.add_argument('--seed', type=int, help="random seed")
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help="anneal solver: save the search state to FILE periodically and on exit")
+    parser.add_argument('--checkpoint-every', type=float, default=30.0, metavar='SECONDS',
+                        help="seconds between checkpoints (default 30)")
+    parser.add_argument('--resume', action='store_true', help="continue the search saved in --checkpoint")
+    parser.add_argument('--workers', type=int, help="worker processes for portfolio/decompose/two_phase room matching")
+    parser.add_argument('--alternatives', type=int, metavar='K',
+                        help="write up to K diverse schedules, lowest penalty first, to <out>_1 ... <out>_K")
+    parser.add_argument('--min-difference', type=int, default=1, metavar='N',
+                        help="alternatives must differ in at least N subject/group assignments")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="write solver instrumentation to this JSON file (constraint, two_phase and native solvers)")
+    parser.add_argument('--quiet', action='store_true', help="only print errors and the summary line")
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if (args.checkpoint or args.resume) and args.solver != 'anneal':
+        parser.error("--checkpoint and --resume need --solver anneal")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint FILE")
+    if args.changes and not args.previous:
+        parser.error("--changes needs --previous FILE")
+
+    try:
+        subjects, rooms = load_instance(args.subjects, args.rooms, args.tas)
+        time_slots = load_grid_config(args.grid) if args.grid else None
+        if args.previous:
+            load_solution(args.previous)
+        if args.hint:
+            load_solution(args.hint)
+        changes = load_changes(args.changes) if args.changes else None
+    except (OSError, ValueError, ImportError, KeyError) as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    output = io.StringIO() if args.quiet else sys.stdout
+    if args.solver in ('constraint', 'two_phase', 'milp', 'native') and not args.previous:
+        errors = presolve_errors(subjects, rooms, time_slots)
+        if errors:
+            print("❌ No feasible schedule exists:", file=sys.stderr)
+            for issue in errors:
+                print(f"  - {issue['message']}", file=sys.stderr)
+            return 1
+    if args.alternatives:
+        return write_alternatives(subjects, rooms, args, time_slots)
+    profile = None
+    if args.profile:
+        from profiling import SolverProfile
+        profile = SolverProfile(hook=lambda progress: print(
+            f"PROGRESS: {progress['nodes']} nodes, {progress['backtracks']} backtracks, "
+            f"depth {progress['depth']}, {progress['elapsed']:.1f}s", file=sys.stderr))
+    with contextlib.redirect_stdout(output):
+        if args.cache and not args.previous:
+            from cache import SolutionCache, solve_cached
+            solve_default = None if args.solver == 'native' else lambda: solve(subjects, rooms, args, profile,
+                                                                               time_slots)
+            solution, grid, all_subjects, _ = solve_cached(subjects, rooms, SolutionCache(args.cache),
+                                                           solve=solve_default, settings={'solver': args.solver},
+                                                           seed=args.seed, time_limit=args.time_limit,
+                                                           time_slots=time_slots, profile=profile)
+        else:
+            solution, grid, all_subjects = solve(subjects, rooms, args, profile, time_slots, changes)
+    if profile is not None:
+        profile.to_json(args.profile)
+        with contextlib.redirect_stdout(output):
+            profile.print_summary()
+
+    if not solution:
+        print("❌ No feasible schedule found!", file=sys.stderr)
+        return 1
+
+    with contextlib.redirect_stdout(output):
+        print_schedule(solution, all_subjects, grid.time_slots)
+        validate_constraints(solution, all_subjects, grid)
+
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    penalty = evaluator.load_solution(solution)
+    if args.out:
+        write_solution(args.out, solution, all_subjects, grid,
+                       extra={'solver': args.solver, 'penalty': penalty, 'violations': evaluator.breakdown()})
+    print(f"Scheduled {len(all_subjects)} subjects/groups with penalty {penalty}"
+          + (f" -> {args.out}" if args.out else ""))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import contextlib
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ali_test import generate_time_slots, split_all_subjects, subject_domains
+from solver import NativeScheduler
+from time_grid import TimeGrid
+
+def conflict_components(all_subjects, grid):
+    """
+    Group subjects/groups into connected components of the conflict graph.
+    Two subjects are connected if they share a professor, are lectures of the same
+    cohort, belong to the same split subject, or could both use the same (slot, room) cell. Returns lists of indices.
+    Cells are never materialised: each room is swept once with the first subject
+    seen per slot, so memory stays linear in subjects, slots and rooms.
+    """
+    parent = list(range(len(all_subjects)))
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    def union(members):
+        root = find(members[0])
+        for v in members[1:]:
+            other = find(v)
+            if other != root:
+                parent[other] = root
+
+    by_key = {}
+    room_users = [[] for _ in grid.rooms]
+    domains = subject_domains(all_subjects, grid, typed=True)
+    for v, subject in enumerate(all_subjects):
+        by_key.setdefault(('professor', subject['professor'].lower()), []).append(v)
+        if subject.get('kind', 'lecture') == 'lecture' and subject.get('cohort'):
+            by_key.setdefault(('cohort', subject['cohort']), []).append(v)
+        if subject.get('is_split_group'):
+            by_key.setdefault(('split', subject['original_subject_id']), []).append(v)
+        for room in domains[v][1]:
+            room_users[room].append(v)
+
+    for members in by_key.values():
+        if len(members) > 1:
+            union(members)
+    # Subjects sharing a room are connected only if their slots overlap too
+    for users in room_users:
+        owner = {}
+        for v in users:
+            for slot in domains[v][0]:
+                u = owner.setdefault(slot, v)
+                if u != v:
+                    union([u, v])
+
+    components = {}
+    for v in range(len(all_subjects)):
+        components.setdefault(find(v), []).append(v)
+    return sorted(components.values(), key=len, reverse=True)
+
+def _solve_component(component_subjects, rooms, time_slots, seed, time_limit):
+    """Solve one component on its own; returns a "<id>_slot" solution or None"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        grid = TimeGrid(time_slots, rooms)
+        scheduler = NativeScheduler(component_subjects, grid, seed=seed, time_limit=time_limit)
+    return scheduler.getSolution()
+
+def solve_decomposed(subjects, rooms, parallel=False, workers=None, seed=None, time_limit=None, time_slots=None):
+    """
+    Split the instance into independent components, solve each one and merge the results.
+    Returns (solution, grid, all_subjects, components) with a "<id>_time"/"<id>_room"
+    solution, or None as the solution if any component has no schedule.
+
+    This is a separate back end rather than part of create_basic_scheduler():
+    that builder returns one python-constraint Problem, whose solvers search a
+    single model and cannot be handed independent parts, so components are
+    solved with NativeScheduler, which takes any subset of subjects/groups.
+    """
+    time_slots = time_slots or generate_time_slots()
+    grid = TimeGrid(time_slots, rooms)
+    all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        components = conflict_components(all_subjects, grid)
+    print(f"DEBUG: {len(components)} independent component(s), largest has {len(components[0]) if components else 0} subjects/groups")
+
+    parts = [[all_subjects[v] for v in component] for component in components]
+    if parallel and len(parts) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_solve_component, parts, [rooms] * len(parts), [time_slots] * len(parts),
+                                    [seed] * len(parts), [time_limit] * len(parts)))
+    else:
+        results = [_solve_component(part, rooms, time_slots, seed, time_limit) for part in parts]
+
+    solution = {}
+    for result in results:
+        if result is None:
+            return None, grid, all_subjects, components
+        solution.update(result)
+    print(f"DEBUG: Solved and merged components in {time.perf_counter() - start:.3f}s")
+    return grid.decode_solution(solution), grid, all_subjects, components
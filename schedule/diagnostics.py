@@ -0,0 +1,341 @@
+import contextlib
+import io
+import time
+from collections import deque
+
+from ali_test import lecture_cohorts
+from solver import NativeScheduler
+
+def allowed_slots(subject, grid):
+    """Slot indices a subject/group may use after day off, time preference and session length, without the fallback"""
+    return grid.allowed_slots(subject.get('day_off'), subject.get('time_preference', 'any'), subject.get('duration'))
+
+def _room_type(subject, grid):
+    """Room type code the models enforce for a subject/group, or -1 if any room will do"""
+    if not subject.get('required_room_type'):
+        return -1
+    code = grid.type_code(subject['required_room_type'])
+    if code < 0 or not any(grid.room_type[j] == code and grid.room_capacity[j] >= subject['students']
+                           for j in range(len(grid.rooms))):
+        return -1
+    return code
+
+def hall_violator(domains):
+    """
+    Check that every variable can get its own value (a perfect matching of
+    variables to values exists). Returns None if so, otherwise a list of variable
+    indices that together have fewer values than members (Hall's condition).
+    """
+    match_of_value = {}
+    match_of_var = [None] * len(domains)
+    # Greedy start, then augmenting paths from each unmatched variable
+    for v, domain in enumerate(domains):
+        for value in domain:
+            if value not in match_of_value:
+                match_of_value[value] = v
+                match_of_var[v] = value
+                break
+
+    for root in range(len(domains)):
+        if match_of_var[root] is not None:
+            continue
+        parent = {root: None}  # variable -> (previous variable, value taken from it)
+        stack = [root]
+        found = None
+        while stack and found is None:
+            v = stack.pop()
+            for value in domains[v]:
+                owner = match_of_value.get(value)
+                if owner is None:
+                    found = (v, value)
+                    break
+                if owner not in parent:
+                    parent[owner] = (v, value)
+                    stack.append(owner)
+        if found is None:
+            return sorted(parent)
+        v, value = found
+        while v is not None:
+            previous = match_of_var[v]
+            match_of_value[value] = v
+            match_of_var[v] = value
+            step = parent[v]
+            if step is None:
+                break
+            v, value = step[0], previous
+    return None
+
+def supply_violator(demand, supply, allowed):
+    """
+    Hall's condition with multiplicities, as a max flow: class i has demand[i]
+    members that each need their own unit from the blocks in allowed[i], and
+    block k has supply[k] units. Returns None if every member can be served,
+    otherwise a list of classes that together need more than their blocks hold.
+    """
+    source, sink = len(demand) + len(supply), len(demand) + len(supply) + 1
+    capacity = {}
+    neighbours = [[] for _ in range(sink + 1)]
+
+    def add_edge(u, v, amount):
+        if (u, v) not in capacity:
+            neighbours[u].append(v)
+            neighbours[v].append(u)
+            capacity.setdefault((v, u), 0)
+        capacity[(u, v)] = amount
+
+    for i, amount in enumerate(demand):
+        add_edge(source, i, amount)
+        for k in allowed[i]:
+            add_edge(i, len(demand) + k, amount)
+    for k, amount in enumerate(supply):
+        add_edge(len(demand) + k, sink, amount)
+
+    def reachable():
+        parent = {source: None}
+        queue = deque([source])
+        while queue:
+            u = queue.popleft()
+            for v in neighbours[u]:
+                if v not in parent and capacity[(u, v)] > 0:
+                    parent[v] = u
+                    queue.append(v)
+        return parent
+
+    # Edmonds-Karp; the graph has one node per class and block, not per subject and cell
+    flow = 0
+    while True:
+        parent = reachable()
+        if sink not in parent:
+            break
+        path = []
+        v = sink
+        while parent[v] is not None:
+            path.append((parent[v], v))
+            v = parent[v]
+        amount = min(capacity[edge] for edge in path)
+        for u, v in path:
+            capacity[(u, v)] -= amount
+            capacity[(v, u)] += amount
+        flow += amount
+    if flow == sum(demand):
+        return None
+    return sorted(i for i in reachable() if i < len(demand))
+
+def _cell_blocks(slot_sets, room_sets, num_slots, num_rooms):
+    """
+    Group (slot, room) cells into blocks of slots and rooms that belong to exactly
+    the same slot_sets / room_sets. Returns (supply per block, block indices
+    inside slot_sets[a] x room_sets[b] for every (a, b)).
+    """
+    def partition(sets, size):
+        members = {}
+        for item in range(size):
+            members.setdefault(frozenset(a for a, items in enumerate(sets) if item in items), []).append(item)
+        return list(members.items())
+
+    slot_groups = partition(slot_sets, num_slots)
+    room_groups = partition(room_sets, num_rooms)
+    supply = []
+    inside = {}
+    for slot_key, slot_members in slot_groups:
+        for room_key, room_members in room_groups:
+            block = len(supply)
+            supply.append(len(slot_members) * len(room_members))
+            for a in slot_key:
+                for b in room_key:
+                    inside.setdefault((a, b), []).append(block)
+    return supply, inside
+
+def _issue(kind, subjects, message, severity='error'):
+    return {'kind': kind, 'severity': severity, 'subjects': sorted(subjects), 'message': message}
+
+def precheck(all_subjects, grid):
+    """
+    Cheap necessary conditions checked before any search. Returns a list of issue
+    records {'kind', 'severity', 'subjects', 'message'}; 'error' issues make the
+    instance infeasible, 'warning' issues are relaxed by the solvers' fallbacks.
+    """
+    issues = []
+    slots = [allowed_slots(subject, grid) for subject in all_subjects]
+
+    for v, subject in enumerate(all_subjects):
+        if not slots[v] and not grid.allowed_slots(None, 'any', subject.get('duration')):
+            issues.append(_issue('no_slot', [subject['subject_id']],
+                                 f"No time slot is long enough for {subject['subject_id']} ({subject['duration']}h)"))
+        elif not slots[v]:
+            issues.append(_issue('no_slot', [subject['subject_id']],
+                                 f"{subject['subject_id']} has no slot left after day off {subject.get('day_off')} "
+                                 f"and time preference {subject.get('time_preference')}", 'warning'))
+        if not any(grid.room_capacity[j] >= subject['students'] for j in range(len(grid.rooms))):
+            issues.append(_issue('no_room', [subject['subject_id']],
+                                 f"No room holds {subject['subject_id']} ({subject['students']} students)", 'warning'))
+
+    # Pigeonhole per professor: each subject/group needs its own slot
+    by_professor = {}
+    for v, subject in enumerate(all_subjects):
+        by_professor.setdefault(subject['professor'].lower(), []).append(v)
+    for members in by_professor.values():
+        usable = set()
+        for v in members:
+            usable.update(slots[v] or range(len(grid)))
+        if len(members) > len(usable):
+            professor = all_subjects[members[0]]['professor']
+            issues.append(_issue('professor_overload', [all_subjects[v]['subject_id'] for v in members],
+                                 f"{professor} teaches {len(members)} subjects/groups but only "
+                                 f"{len(usable)} slots fit their day off and time preference"))
+
+    # Capacity supply vs demand: groups needing at least c seats (of a type) against
+    # the (slot, room) cells that have them
+    by_type = {}
+    for v, subject in enumerate(all_subjects):
+        by_type.setdefault(_room_type(subject, grid), []).append(v)
+    groups = [(code, members) for code, members in by_type.items() if code >= 0]
+    groups.append((-1, list(range(len(all_subjects)))))
+    for code, members in groups:
+        label = grid.room_types[code] if code >= 0 else 'any'
+        members = sorted(members, key=lambda v: -all_subjects[v]['students'])
+        for demand, v in enumerate(members, 1):
+            seats = all_subjects[v]['students']
+            if demand < len(members) and all_subjects[members[demand]]['students'] == seats:
+                continue
+            rooms = sum(1 for j in range(len(grid.rooms))
+                        if grid.room_capacity[j] >= seats and (code < 0 or grid.room_type[j] == code))
+            if rooms and demand > rooms * len(grid):
+                issues.append(_issue('room_supply', [all_subjects[u]['subject_id'] for u in members[:demand]],
+                                     f"{demand} subjects/groups need a {label} room with {seats}+ seats but only "
+                                     f"{rooms} such room(s) x {len(grid)} slots exist"))
+                break
+
+    # Exact pigeonhole on the combined model: every subject/group needs its own
+    # (slot, room) cell and every professor's subjects/groups their own slot.
+    # Domains are products of a slot set and a room set, so subjects/groups with the
+    # same pair form one class and cells used by the same classes one block; the
+    # matching is a max flow between those, whatever the number of cells.
+    if not any(issue['kind'] == 'room_supply' for issue in issues):
+        slot_sets, room_sets, classes = {}, {}, {}
+        for v, subject in enumerate(all_subjects):
+            code = _room_type(subject, grid)
+            rooms = frozenset(j for j in range(len(grid.rooms)) if grid.room_capacity[j] >= subject['students']
+                              and (code < 0 or grid.room_type[j] == code))
+            if not rooms:
+                continue
+            usable = frozenset(slots[v] or range(len(grid)))
+            key = (slot_sets.setdefault(usable, len(slot_sets)), room_sets.setdefault(rooms, len(room_sets)))
+            classes.setdefault(key, []).append(v)
+        supply, inside = _cell_blocks(list(slot_sets), list(room_sets), len(grid), len(grid.rooms))
+        keys = list(classes)
+        violator = supply_violator([len(classes[key]) for key in keys], supply, [inside.get(key, []) for key in keys])
+        if violator:
+            ids = [all_subjects[v]['subject_id'] for i in violator for v in classes[keys[i]]]
+            cells = sum(supply[k] for k in set(k for i in violator for k in inside[keys[i]]))
+            issues.append(_issue('room_supply', ids, f"{len(ids)} subjects/groups ({', '.join(sorted(ids)[:6])}"
+                                 f"{', ...' if len(ids) > 6 else ''}) can only use {cells} (slot, room) cells"))
+    for members in by_professor.values():
+        if len(members) > 1 and not any(issue['kind'] == 'professor_overload' and
+                                         all_subjects[members[0]]['subject_id'] in issue['subjects'] for issue in issues):
+            violator = hall_violator([slots[v] or range(len(grid)) for v in members])
+            if violator:
+                ids = [all_subjects[members[i]]['subject_id'] for i in violator]
+                usable = set(slot for i in violator for slot in (slots[members[i]] or range(len(grid))))
+                issues.append(_issue('professor_overload', ids,
+                                     f"{all_subjects[members[0]]['professor']} has {len(ids)} subjects/groups "
+                                     f"({', '.join(sorted(ids))}) that fit only {len(usable)} slots"))
+
+    # Pigeonhole per cohort: its lectures need their own slots as well
+    for cohort, members in lecture_cohorts(all_subjects).items():
+        violator = hall_violator([slots[v] or range(len(grid)) for v in members]) if len(members) > 1 else None
+        if violator:
+            ids = [all_subjects[members[i]]['subject_id'] for i in violator]
+            usable = set(slot for i in violator for slot in (slots[members[i]] or range(len(grid))))
+            issues.append(_issue('cohort_overload', ids,
+                                 f"Cohort {cohort} has {len(ids)} lectures/groups ({', '.join(sorted(ids))}) "
+                                 f"that fit only {len(usable)} slots"))
+
+    # Split groups share a day (and, for two groups, adjacent periods)
+    by_original = {}
+    for v, subject in enumerate(all_subjects):
+        if subject.get('is_split_group'):
+            by_original.setdefault(subject['original_subject_id'], []).append(v)
+    for original_id, members in by_original.items():
+        usable = set(slots[members[0]] or range(len(grid)))
+        per_day = {}
+        for slot in usable:
+            per_day.setdefault(grid.slot_day[slot], []).append(slot)
+        if len(members) == 2:
+            fits = any(grid.consecutive(a, b) for day_slots in per_day.values() for a in day_slots for b in day_slots)
+            needed = "2 consecutive periods"
+        else:
+            fits = any(len(day_slots) >= len(members) for day_slots in per_day.values())
+            needed = f"{len(members)} periods"
+        if not fits:
+            issues.append(_issue('split_day', [all_subjects[v]['subject_id'] for v in members],
+                                 f"{original_id} is split into {len(members)} groups that need {needed} "
+                                 f"on one day, but no allowed day has them"))
+    return issues
+
+def print_issues(issues):
+    for issue in issues:
+        icon = "❌" if issue['severity'] == 'error' else "⚠️"
+        print(f"{icon} {issue['message']}")
+
+def quickxplain(items, is_consistent):
+    """
+    QuickXplain (Junker 2004): a minimal subset of items that is inconsistent on
+    its own, or None if all items together are consistent. is_consistent takes a
+    list of items.
+    """
+    if is_consistent(items):
+        return None
+
+    def explain(background, delta, candidates):
+        if delta and not is_consistent(background):
+            return []
+        if len(candidates) == 1:
+            return list(candidates)
+        half = len(candidates) // 2
+        first, second = candidates[:half], candidates[half:]
+        second_core = explain(background + first, first, second)
+        first_core = explain(background + second_core, second_core, first)
+        return first_core + second_core
+
+    return explain([], [], list(items))
+
+def explain_infeasibility(all_subjects, grid, check_time_limit=1.0, time_limit=30.0):
+    """
+    Minimal set of subjects whose groups cannot be scheduled together.
+    Split groups are kept together as one item. Each consistency check runs
+    precheck() and then NativeScheduler for at most check_time_limit seconds; only
+    a precheck error or an exhausted search counts as a conflict, an undecided
+    check counts as consistent. Undecided checks can mislead QuickXplain, so the
+    core is checked once more at the end; if that does not prove it, the whole set
+    of subjects (proven to conflict by the first check) is returned instead.
+    Either way the result is a proven conflict, possibly not minimal. Returns a
+    list of (original) subject ids, or None if no conflict was found within time_limit.
+    """
+    items = {}
+    for subject in all_subjects:
+        items.setdefault(subject.get('original_subject_id', subject['subject_id']), []).append(subject)
+    deadline = time.perf_counter() + time_limit
+    memo = {}
+
+    def is_consistent(ids):
+        key = frozenset(ids)
+        if key not in memo:
+            if time.perf_counter() > deadline:
+                raise TimeoutError
+            subjects = [group for subject_id in ids for group in items[subject_id]]
+            if any(issue['severity'] == 'error' for issue in precheck(subjects, grid)):
+                memo[key] = False
+            else:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    scheduler = NativeScheduler(subjects, grid, seed=0, time_limit=check_time_limit)
+                memo[key] = scheduler.getSolution() is not None or scheduler.stats['stopped']
+        return memo[key]
+
+    try:
+        core = quickxplain(sorted(items), is_consistent)
+        if core is not None and is_consistent(core):
+            return sorted(items)
+        return core
+    except TimeoutError:
+        return None
@@ -0,0 +1,348 @@
+# Hard rules get weights large enough that no amount of soft-constraint gain pays for breaking them
+PENALTY_WEIGHTS = {
+    'room_clash': 1000,
+    'professor_clash': 1000,
+    'cohort_clash': 1000,
+    'capacity': 500,
+    'session_length': 500,
+    'day_off': 200,
+    'split_same_day': 50,
+    'time_preference': 20,
+    'room_type': 10,
+    'split_consecutive': 10,
+    'split_same_room': 2,
+}
+
+HARD_CONSTRAINTS = ('room_clash', 'professor_clash', 'cohort_clash', 'capacity', 'session_length', 'day_off')
+
+class ScheduleEvaluator:
+    """
+    Weighted penalty of a schedule with O(1)-ish delta evaluation for single moves.
+    assignment[v] is a (slot index, room index) cell for subject/group v, or None
+    while v is unscheduled. Use load_solution() for "<id>_time"/"<id>_room" dicts.
+    """
+
+    def __init__(self, all_subjects, grid, weights=None):
+        self.subjects = all_subjects
+        self.grid = grid
+        self.weights = dict(PENALTY_WEIGHTS, **(weights or {}))
+        self.index = {s['subject_id']: v for v, s in enumerate(all_subjects)}
+
+        self.professor = [s['professor'].lower() for s in all_subjects]
+        # Only lectures clash within a cohort; sections of the same cohort may overlap
+        self.cohort = [s.get('cohort') if s.get('kind', 'lecture') == 'lecture' else None for s in all_subjects]
+        self.day_off = [grid.day_index(s['day_off']) if s.get('day_off') else -1 for s in all_subjects]
+        self.duration = [s.get('duration') for s in all_subjects]
+        self.room_type = [grid.type_code(s['required_room_type']) if s.get('required_room_type') else -1
+                          for s in all_subjects]
+
+        # Split-group partners, and whether the pair should also be consecutive
+        self.partners = [[] for _ in all_subjects]
+        groups = {}
+        for v, subject in enumerate(all_subjects):
+            if subject.get('is_split_group'):
+                groups.setdefault(subject['original_subject_id'], []).append(v)
+        self.consecutive_pair = [False] * len(all_subjects)
+        for members in groups.values():
+            for v in members:
+                self.partners[v] = [u for u in members if u != v]
+                self.consecutive_pair[v] = len(members) == 2
+
+        # Unary penalty of every (v, cell) is cheap but hot, so cache it lazily
+        self._unary_cache = {}
+
+    def reset(self, assignment):
+        """Load a full assignment; entries may be None for subjects not placed yet"""
+        self.assignment = list(assignment)
+        self.cell_members = {}
+        self.prof_count = {}
+        self.cohort_count = {}
+        for v, cell in enumerate(self.assignment):
+            if cell is not None:
+                self._add(v, cell)
+        self.total = self.evaluate()
+
+    def _add(self, v, cell):
+        self.cell_members.setdefault(cell, set()).add(v)
+        key = (self.professor[v], cell[0])
+        self.prof_count[key] = self.prof_count.get(key, 0) + 1
+        if self.cohort[v]:
+            key = (self.cohort[v], cell[0])
+            self.cohort_count[key] = self.cohort_count.get(key, 0) + 1
+
+    def _discard(self, v, cell):
+        self.cell_members[cell].discard(v)
+        key = (self.professor[v], cell[0])
+        self.prof_count[key] -= 1
+        if self.cohort[v]:
+            self.cohort_count[(self.cohort[v], cell[0])] -= 1
+
+    def occupants(self, cell):
+        return self.cell_members.get(cell, ())
+
+    def unary(self, v, cell):
+        key = (v, cell)
+        cached = self._unary_cache.get(key)
+        if cached is not None:
+            return cached
+        grid, w = self.grid, self.weights
+        slot, room = cell
+        subject = self.subjects[v]
+        penalty = 0
+        if grid.room_capacity[room] < subject['students']:
+            penalty += w['capacity']
+        if not grid.fits_duration(slot, self.duration[v]):
+            penalty += w['session_length']
+        if self.day_off[v] == grid.slot_day[slot]:
+            penalty += w['day_off']
+        preference = subject.get('time_preference', 'any')
+        if preference != 'any' and not grid.matches_preference(slot, preference):
+            penalty += w['time_preference']
+        if self.room_type[v] != -1 and grid.room_type[room] != self.room_type[v]:
+            penalty += w['room_type']
+        self._unary_cache[key] = penalty
+        return penalty
+
+    def pair(self, v, cell, u, other):
+        """Split-group penalty between group v at cell and its partner u at other"""
+        grid, w = self.grid, self.weights
+        penalty = 0
+        if grid.slot_day[cell[0]] != grid.slot_day[other[0]]:
+            penalty += w['split_same_day']
+        if self.consecutive_pair[v] and not grid.consecutive(cell[0], other[0]):
+            penalty += w['split_consecutive']
+        if cell[1] != other[1]:
+            penalty += w['split_same_room']
+        return penalty
+
+    def evaluate(self):
+        """Full penalty of the current assignment"""
+        w = self.weights
+        total = 0
+        for members in self.cell_members.values():
+            count = len(members)
+            total += w['room_clash'] * count * (count - 1) // 2
+        for count in self.prof_count.values():
+            total += w['professor_clash'] * count * (count - 1) // 2
+        for count in self.cohort_count.values():
+            total += w['cohort_clash'] * count * (count - 1) // 2
+        for v, cell in enumerate(self.assignment):
+            if cell is None:
+                continue
+            total += self.unary(v, cell)
+            for u in self.partners[v]:
+                if u > v and self.assignment[u] is not None:
+                    total += self.pair(v, cell, u, self.assignment[u])
+        return total
+
+    def delta(self, v, cell):
+        """Change in penalty if subject/group v moved to (or was first placed in) cell"""
+        old = self.assignment[v]
+        if cell == old:
+            return 0
+        w = self.weights
+        prof = self.professor[v]
+        cohort = self.cohort[v]
+        change = self.unary(v, cell) + w['room_clash'] * len(self.occupants(cell))
+        if old is None or cell[0] != old[0]:
+            change += w['professor_clash'] * self.prof_count.get((prof, cell[0]), 0)
+            if cohort:
+                change += w['cohort_clash'] * self.cohort_count.get((cohort, cell[0]), 0)
+        if old is not None:
+            change -= self.unary(v, old) + w['room_clash'] * (len(self.occupants(old)) - 1)
+            if cell[0] != old[0]:
+                change -= w['professor_clash'] * (self.prof_count[(prof, old[0])] - 1)
+                if cohort:
+                    change -= w['cohort_clash'] * (self.cohort_count[(cohort, old[0])] - 1)
+        for u in self.partners[v]:
+            other = self.assignment[u]
+            if other is None:
+                continue
+            change += self.pair(v, cell, u, other)
+            if old is not None:
+                change -= self.pair(v, old, u, other)
+        return change
+
+    def move(self, v, cell, change=None):
+        if change is None:
+            change = self.delta(v, cell)
+        if self.assignment[v] is not None:
+            self._discard(v, self.assignment[v])
+        self.assignment[v] = cell
+        self._add(v, cell)
+        self.total += change
+
+    def breakdown(self):
+        """Number of violations of each penalty kind in the current assignment"""
+        grid = self.grid
+        counts = {kind: 0 for kind in self.weights}
+        for members in self.cell_members.values():
+            counts['room_clash'] += len(members) * (len(members) - 1) // 2
+        for count in self.prof_count.values():
+            counts['professor_clash'] += count * (count - 1) // 2
+        for count in self.cohort_count.values():
+            counts['cohort_clash'] += count * (count - 1) // 2
+        for v, cell in enumerate(self.assignment):
+            if cell is None:
+                continue
+            slot, room = cell
+            subject = self.subjects[v]
+            if grid.room_capacity[room] < subject['students']:
+                counts['capacity'] += 1
+            if not grid.fits_duration(slot, self.duration[v]):
+                counts['session_length'] += 1
+            if self.day_off[v] == grid.slot_day[slot]:
+                counts['day_off'] += 1
+            preference = subject.get('time_preference', 'any')
+            if preference != 'any' and not grid.matches_preference(slot, preference):
+                counts['time_preference'] += 1
+            if self.room_type[v] != -1 and grid.room_type[room] != self.room_type[v]:
+                counts['room_type'] += 1
+            for u in self.partners[v]:
+                other = self.assignment[u]
+                if u > v and other is not None:
+                    if grid.slot_day[slot] != grid.slot_day[other[0]]:
+                        counts['split_same_day'] += 1
+                    if self.consecutive_pair[v] and not grid.consecutive(slot, other[0]):
+                        counts['split_consecutive'] += 1
+                    if room != other[1]:
+                        counts['split_same_room'] += 1
+        return counts
+
+    def penalties(self):
+        """Weighted penalty contributed by each constraint kind"""
+        return {kind: count * self.weights[kind] for kind, count in self.breakdown().items()}
+
+    # --- label-level helpers ---------------------------------------------------
+
+    def cell_of(self, time_slot, room_id):
+        return (self.grid.slot_index[time_slot], self.grid.room_index[room_id])
+
+    def load_solution(self, solution):
+        """Load a "<id>_time"/"<id>_room" (or "<id>_slot") solution dict"""
+        assignment = [None] * len(self.subjects)
+        for v, subject in enumerate(self.subjects):
+            subject_id = subject['subject_id']
+            if f"{subject_id}_slot" in solution:
+                assignment[v] = tuple(solution[f"{subject_id}_slot"])
+            elif f"{subject_id}_time" in solution:
+                assignment[v] = self.cell_of(solution[f"{subject_id}_time"], solution[f"{subject_id}_room"])
+        self.reset(assignment)
+        return self.total
+
+    def move_subject(self, subject_id, time_slot, room_id):
+        """Move one subject/group to a new time slot and room; returns the penalty change"""
+        v = self.index[subject_id]
+        cell = self.cell_of(time_slot, room_id)
+        change = self.delta(v, cell)
+        self.move(v, cell, change)
+        return change
+
+    def solution(self):
+        """Current assignment as a "<id>_time"/"<id>_room" label dict"""
+        grid = self.grid
+        solution = {}
+        for subject, cell in zip(self.subjects, self.assignment):
+            if cell is not None:
+                solution[f"{subject['subject_id']}_time"] = grid.time_slots[cell[0]]
+                solution[f"{subject['subject_id']}_room"] = grid.room_ids[cell[1]]
+        return solution
+
+    def violations(self):
+        """
+        Structured list of current violations. Each record has 'kind', 'severity'
+        ('hard' or 'soft'), 'subjects', 'time_slot', 'room' and a printable 'message'.
+        Split-group records are per original subject rather than per pair.
+        """
+        grid = self.grid
+        records = []
+
+        def record(kind, subjects, cell, message):
+            records.append({
+                'kind': kind,
+                'severity': 'hard' if kind in HARD_CONSTRAINTS else 'soft',
+                'subjects': subjects,
+                'time_slot': grid.time_slots[cell[0]] if cell else None,
+                'room': grid.room_ids[cell[1]] if cell else None,
+                'message': message
+            })
+
+        for cell, members in self.cell_members.items():
+            if len(members) > 1:
+                ids = sorted(self.subjects[v]['subject_id'] for v in members)
+                record('room_clash', ids, cell,
+                       f"❌ Room {grid.room_ids[cell[1]]} double-booked at {grid.time_slots[cell[0]]}: {', '.join(ids)}")
+
+        by_professor_slot = {}
+        for v, cell in enumerate(self.assignment):
+            if cell is not None:
+                by_professor_slot.setdefault((self.professor[v], cell[0]), []).append(v)
+        for (_, slot), members in by_professor_slot.items():
+            if len(members) > 1:
+                ids = sorted(self.subjects[v]['subject_id'] for v in members)
+                professor = self.subjects[members[0]]['professor']
+                record('professor_clash', ids, (slot, self.assignment[members[0]][1]),
+                       f"❌ {professor} teaches {', '.join(ids)} at the same time ({grid.time_slots[slot]})")
+
+        by_cohort_slot = {}
+        for v, cell in enumerate(self.assignment):
+            if cell is not None and self.cohort[v]:
+                by_cohort_slot.setdefault((self.cohort[v], cell[0]), []).append(v)
+        for (cohort, slot), members in by_cohort_slot.items():
+            if len(members) > 1:
+                ids = sorted(self.subjects[v]['subject_id'] for v in members)
+                record('cohort_clash', ids, (slot, self.assignment[members[0]][1]),
+                       f"❌ Cohort {cohort} has lectures {', '.join(ids)} at the same time ({grid.time_slots[slot]})")
+
+        for v, cell in enumerate(self.assignment):
+            if cell is None:
+                continue
+            slot, room = cell
+            subject = self.subjects[v]
+            subject_id = subject['subject_id']
+            professor = subject['professor']
+            time_slot = grid.time_slots[slot]
+            if grid.room_capacity[room] < subject['students']:
+                record('capacity', [subject_id], cell,
+                       f"❌ {subject['subject_name']} ({subject['students']} students) does not fit room {grid.room_ids[room]} ({grid.room_capacity[room]} seats)")
+            if not grid.fits_duration(slot, self.duration[v]):
+                record('session_length', [subject_id], cell,
+                       f"❌ {subject['subject_name']} needs {self.duration[v]}h but {time_slot} is {grid.slot_duration[slot]}h")
+            if self.day_off[v] == grid.slot_day[slot]:
+                record('day_off', [subject_id], cell,
+                       f"❌ {professor} scheduled on {grid.days[grid.slot_day[slot]]} (day off) for {subject['subject_name']}")
+            preference = subject.get('time_preference', 'any')
+            if preference != 'any' and not grid.matches_preference(slot, preference):
+                record('time_preference', [subject_id], cell,
+                       f"❌ {professor}'s time preference ({preference}) violated for {subject['subject_name']} at {time_slot}")
+            if self.room_type[v] != -1 and grid.room_type[room] != self.room_type[v]:
+                record('room_type', [subject_id], cell,
+                       f"⚠️ {subject['subject_name']} needs a {subject['required_room_type']} but is in {grid.room_ids[room]}")
+
+        seen = set()
+        for v, subject in enumerate(self.subjects):
+            original_id = subject.get('original_subject_id')
+            if not self.partners[v] or original_id in seen:
+                continue
+            seen.add(original_id)
+            members = [u for u in [v] + self.partners[v] if self.assignment[u] is not None]
+            ids = [self.subjects[u]['subject_id'] for u in members]
+            cells = [self.assignment[u] for u in members]
+            if len(set(grid.slot_day[cell[0]] for cell in cells)) > 1:
+                record('split_same_day', ids, None, f"❌ Split subject {original_id} groups are on different days")
+            if len(cells) == 2 and self.consecutive_pair[v] and not grid.consecutive(cells[0][0], cells[1][0]):
+                record('split_consecutive', ids, None, f"⚠️ Split subject {original_id} groups are not in consecutive time slots")
+            if len(set(cell[1] for cell in cells)) > 1:
+                record('split_same_room', ids, None, f"⚠️ Split subject {original_id} groups are in different rooms")
+
+        return records
+
+def evaluate_solution(solution, all_subjects, grid, weights=None):
+    """Score a "<id>_time"/"<id>_room" solution for batch checks: penalty, counts and violations"""
+    evaluator = ScheduleEvaluator(all_subjects, grid, weights)
+    evaluator.load_solution(solution)
+    return {
+        'penalty': evaluator.total,
+        'counts': evaluator.breakdown(),
+        'violations': evaluator.violations()
+    }
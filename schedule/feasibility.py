@@ -0,0 +1,241 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from evaluator import PENALTY_WEIGHTS, HARD_CONSTRAINTS
+from time_grid import EPSILON
+
+HAVE_NUMPY = np is not None
+
+def _pair_counts(keys, size, batch):
+    """
+    Per batch row, the number of pairs sharing a key: sum of c*(c-1)/2 over keys
+    taken c times. keys is (batch, k) with values below size.
+    """
+    if keys.shape[1] < 2:
+        return np.zeros(batch, dtype=np.int64)
+    rows = np.arange(batch, dtype=np.int64)[:, None]
+    flat, counts = np.unique((rows * size + keys).ravel(), return_counts=True)
+    pairs = counts * (counts - 1) // 2
+    return np.bincount(flat // size, weights=pairs, minlength=batch).astype(np.int64)
+
+def _row_lists(matrix):
+    """Column indices of the True entries of each row, as Python lists"""
+    columns = np.nonzero(matrix)[1].tolist()
+    ends = np.cumsum(matrix.sum(axis=1)).tolist()
+    return [columns[start:end] for start, end in zip([0] + ends[:-1], ends)]
+
+class FeasibilityModel:
+    """
+    Subjects/groups and the time grid as NumPy arrays, for work over many subjects
+    or many candidate schedules at once.
+
+    slot_matrix() and room_matrix() are the boolean subject x slot and subject x
+    room matrices behind get_subject_domain(), built from capacity vectors,
+    room type codes, day-off and preference masks in a few array operations.
+    A batch of candidate schedules is an int array of shape (batch, subjects, 2)
+    holding (slot index, room index) per subject/group; counts(), penalties() and
+    feasible() score the whole batch exactly like ScheduleEvaluator.
+    """
+
+    def __init__(self, all_subjects, grid, weights=None):
+        if np is None:
+            raise ImportError("The vectorised model needs NumPy (pip install numpy)")
+        self.all_subjects = all_subjects
+        self.grid = grid
+        self.weights = dict(PENALTY_WEIGHTS, **(weights or {}))
+        self.index = {s['subject_id']: v for v, s in enumerate(all_subjects)}
+
+        self.students = np.array([s['students'] for s in all_subjects], dtype=np.int64)
+        self.capacity = np.array(grid.room_capacity, dtype=np.int64)
+        self.room_type = np.array(grid.room_type, dtype=np.int64)
+        self.required_type = np.array([grid.type_code(s['required_room_type']) if s.get('required_room_type') else -1
+                                       for s in all_subjects], dtype=np.int64)
+        self.has_required_type = np.array([bool(s.get('required_room_type')) for s in all_subjects], dtype=bool)
+        self.day_off = np.array([grid.day_index(s['day_off']) if s.get('day_off') else -1 for s in all_subjects],
+                                dtype=np.int64)
+        self.duration = np.array([s.get('duration') or 0.0 for s in all_subjects], dtype=float)
+        self.slot_day = np.array(grid.slot_day, dtype=np.int64)
+        self.slot_duration = np.array(grid.slot_duration, dtype=float)
+
+        preferences = [s.get('time_preference', 'any') or 'any' for s in all_subjects]
+        names = sorted(set(preferences))
+        codes = {name: i for i, name in enumerate(names)}
+        self.preference = np.array([codes[name] for name in preferences], dtype=np.int64)
+        self.preference_masks = np.array([grid.preference_mask(name) for name in names],
+                                         dtype=bool).reshape(len(names), len(grid))
+        self.has_preference = np.array([name != 'any' for name in preferences], dtype=bool)
+
+        def codes_of(values):
+            lookup = {}
+            return np.array([-1 if value is None else lookup.setdefault(value, len(lookup)) for value in values],
+                            dtype=np.int64), len(lookup)
+
+        self.professor, self.num_professors = codes_of([s['professor'].lower() for s in all_subjects])
+        # Only lectures clash within a cohort; sections of the same cohort may overlap
+        self.cohort, self.num_cohorts = codes_of([s.get('cohort') if s.get('kind', 'lecture') == 'lecture'
+                                                  and s.get('cohort') else None for s in all_subjects])
+
+        # Split-group pairs, each once, and whether the pair should also be consecutive
+        groups = {}
+        for v, subject in enumerate(all_subjects):
+            if subject.get('is_split_group'):
+                groups.setdefault(subject['original_subject_id'], []).append(v)
+        pairs = [(u, v, len(members) == 2) for members in groups.values()
+                 for i, u in enumerate(members) for v in members[i + 1:]]
+        self.pair_first = np.array([u for u, _, _ in pairs], dtype=np.int64)
+        self.pair_second = np.array([v for _, v, _ in pairs], dtype=np.int64)
+        self.pair_consecutive = np.array([flag for _, _, flag in pairs], dtype=bool)
+        self.adjacent = np.zeros((len(grid), len(grid)), dtype=bool)
+        for slot in range(len(grid)):
+            for other in (grid.slot_prev[slot], grid.slot_next[slot]):
+                if other >= 0:
+                    self.adjacent[slot, other] = True
+
+    # --- feasibility matrices --------------------------------------------------
+
+    def long_enough(self):
+        """(subjects, slots): the slot fits the session length"""
+        return self.slot_duration[None, :] >= self.duration[:, None] - EPSILON
+
+    def slot_matrix(self, preference=True):
+        """
+        (subjects, slots) allowed by day off, time preference (unless preference=False)
+        and session length, with get_subject_domain()'s fallback to every long
+        enough slot, then all slots
+        """
+        long_enough = self.long_enough()
+        allowed = (self.slot_day[None, :] != self.day_off[:, None]) & long_enough
+        if preference:
+            allowed &= self.preference_masks[self.preference]
+        empty = ~allowed.any(axis=1)
+        allowed[empty] = long_enough[empty]
+        allowed[~allowed.any(axis=1)] = True
+        return allowed
+
+    def room_matrix(self, typed=False):
+        """
+        (subjects, rooms) big enough, falling back to the closest capacity; with
+        typed=True also of the required room type wherever such a room fits
+        """
+        fits = self.students[:, None] <= self.capacity[None, :]
+        empty = np.flatnonzero(~fits.any(axis=1))
+        if len(empty):
+            closest = np.abs(self.capacity[None, :] - self.students[empty, None]).argmin(axis=1)
+            fits[empty, closest] = True
+        if typed:
+            typed_fits = fits & (self.room_type[None, :] == self.required_type[:, None])
+            use_typed = typed_fits.any(axis=1)
+            fits[use_typed] = typed_fits[use_typed]
+        return fits
+
+    def domains(self, typed=False):
+        """get_subject_domain() for every subject/group: a list of (slot indices, room indices)"""
+        grid = self.grid
+        slots = self.slot_matrix()
+        rooms = self.room_matrix()
+        # Same warnings as get_subject_domain(), only for the rows that fell back
+        for v in np.flatnonzero(~(self.students[:, None] <= self.capacity[None, :]).any(axis=1)):
+            closest = int(np.abs(self.capacity - self.students[v]).argmin())
+            print(f"Warning: No perfect room fit for {self.all_subjects[v]['subject_id']}. Using closest match: "
+                  f"{grid.room_ids[closest]} (capacity: {grid.room_capacity[closest]})")
+        if typed:
+            typed_fits = rooms & (self.room_type[None, :] == self.required_type[:, None])
+            for v in np.flatnonzero(self.has_required_type & ~typed_fits.any(axis=1)):
+                subject = self.all_subjects[v]
+                print(f"Warning: No {subject['required_room_type']} room fits {subject['subject_id']}. "
+                      f"Ignoring room type")
+            rooms = self.room_matrix(typed=True)
+        strict = ((self.slot_day[None, :] != self.day_off[:, None])
+                  & self.preference_masks[self.preference] & self.long_enough())
+        for v in np.flatnonzero(~strict.any(axis=1)):
+            print(f"Warning: No available time slots for {self.all_subjects[v]['subject_id']} after constraints")
+        return list(zip(_row_lists(slots), _row_lists(rooms)))
+
+    def slot_costs(self):
+        """(subjects, slots) weighted penalty of the slot alone: session length, day off, time preference"""
+        w = self.weights
+        return (w['session_length'] * ~self.long_enough()
+                + w['day_off'] * (self.slot_day[None, :] == self.day_off[:, None])
+                + w['time_preference'] * (self.has_preference[:, None] & ~self.preference_masks[self.preference]))
+
+    def room_costs(self):
+        """(subjects, rooms) weighted penalty of the room alone: capacity, room type"""
+        w = self.weights
+        return (w['capacity'] * (self.capacity[None, :] < self.students[:, None])
+                + w['room_type'] * ((self.required_type[:, None] >= 0)
+                                    & (self.room_type[None, :] != self.required_type[:, None])))
+
+    # --- batch scoring ---------------------------------------------------------
+
+    def encode(self, solutions):
+        """(batch, subjects, 2) array from "<id>_slot" index solutions or "<id>_time"/"<id>_room" label ones"""
+        grid = self.grid
+        batch = np.empty((len(solutions), len(self.all_subjects), 2), dtype=np.int64)
+        for b, solution in enumerate(solutions):
+            for v, subject in enumerate(self.all_subjects):
+                subject_id = subject['subject_id']
+                if f"{subject_id}_slot" in solution:
+                    batch[b, v] = solution[f"{subject_id}_slot"]
+                else:
+                    batch[b, v] = (grid.slot_index[solution[f"{subject_id}_time"]],
+                                   grid.room_index[solution[f"{subject_id}_room"]])
+        return batch
+
+    def counts(self, assignments):
+        """Violations of each penalty kind per candidate, as arrays of shape (batch,)"""
+        assignments = np.asarray(assignments, dtype=np.int64)
+        if assignments.ndim == 2:
+            assignments = assignments[None]
+        batch = assignments.shape[0]
+        slots, rooms = assignments[..., 0], assignments[..., 1]
+        v = np.arange(len(self.all_subjects))[None, :]
+        num_slots, num_rooms = len(self.grid), len(self.capacity)
+
+        counts = {kind: np.zeros(batch, dtype=np.int64) for kind in self.weights}
+        counts['room_clash'] = _pair_counts(slots * num_rooms + rooms, num_slots * num_rooms, batch)
+        counts['professor_clash'] = _pair_counts(self.professor[None, :] * num_slots + slots,
+                                                 max(1, self.num_professors) * num_slots, batch)
+        lectures = self.cohort >= 0
+        counts['cohort_clash'] = _pair_counts(self.cohort[None, lectures] * num_slots + slots[:, lectures],
+                                              max(1, self.num_cohorts) * num_slots, batch)
+
+        counts['capacity'] = (self.capacity[rooms] < self.students[None, :]).sum(axis=1)
+        counts['session_length'] = (self.slot_duration[slots] < self.duration[None, :] - EPSILON).sum(axis=1)
+        counts['day_off'] = (self.slot_day[slots] == self.day_off[None, :]).sum(axis=1)
+        counts['time_preference'] = (self.has_preference[None, :]
+                                     & ~self.preference_masks[self.preference[v], slots]).sum(axis=1)
+        counts['room_type'] = ((self.required_type[None, :] >= 0)
+                               & (self.room_type[rooms] != self.required_type[None, :])).sum(axis=1)
+
+        if len(self.pair_first):
+            first_slots, second_slots = slots[:, self.pair_first], slots[:, self.pair_second]
+            counts['split_same_day'] = (self.slot_day[first_slots] != self.slot_day[second_slots]).sum(axis=1)
+            counts['split_consecutive'] = (self.pair_consecutive[None, :]
+                                           & ~self.adjacent[first_slots, second_slots]).sum(axis=1)
+            counts['split_same_room'] = (rooms[:, self.pair_first] != rooms[:, self.pair_second]).sum(axis=1)
+        return counts
+
+    def penalties(self, assignments, counts=None):
+        """Weighted penalty of every candidate, shape (batch,)"""
+        counts = counts or self.counts(assignments)
+        return sum(counts[kind] * self.weights[kind] for kind in counts)
+
+    def feasible(self, assignments, counts=None):
+        """Whether each candidate is free of hard-constraint violations, shape (batch,)"""
+        counts = counts or self.counts(assignments)
+        return ~np.any([counts[kind] > 0 for kind in HARD_CONSTRAINTS], axis=0)
+
+def score_solutions(solutions, all_subjects, grid, weights=None):
+    """
+    evaluate_solution() for many schedules at once: a list of {'penalty', 'feasible',
+    'counts'} in input order, from "<id>_slot" or "<id>_time"/"<id>_room" solutions
+    """
+    model = FeasibilityModel(all_subjects, grid, weights)
+    assignments = model.encode(solutions)
+    counts = model.counts(assignments)
+    penalties = model.penalties(assignments, counts)
+    feasible = model.feasible(assignments, counts)
+    return [{'penalty': int(penalties[b]), 'feasible': bool(feasible[b]),
+             'counts': {kind: int(counts[kind][b]) for kind in counts}} for b in range(len(solutions))]
@@ -0,0 +1,84 @@
+import math
+import random
+
+# Room mix from the faculty building (see Notes.txt: 1220, 3214, 3102, 3101, 3211)
+BASE_ROOMS = [
+    (350, 'lecture_hall'),
+    (350, 'lecture_hall'),
+    (120, 'lecture_hall'),
+    (70, 'lab'),
+    (80, 'lab'),
+]
+
+DAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu']
+
+DEFAULT_PREFERENCES = {'any': 2, 'morning': 1, 'afternoon': 1, 'after_11': 1}
+
+# Named parameter sets for the benchmark suite; each one stresses a different part of the model
+PROFILES = {
+    'baseline': {},
+    'heavy_load': {'professor_load': 4},
+    'small_rooms': {'room_mix': [(120, 'lecture_hall'), (100, 'lecture_hall'), (80, 'lecture_hall'),
+                                 (70, 'lab'), (50, 'lab')]},
+    'many_splits': {'split_ratio': 0.3},
+    'strict': {'day_off_rate': 1.0, 'preferences': {'morning': 1, 'afternoon': 1, 'after_11': 1}},
+}
+
+def generate_instance(num_subjects, seed=0, room_slack=2.0, professor_load=2, room_mix=None,
+                      split_ratio=0.1, lab_ratio=0.5, day_off_rate=5 / 6, preferences=None):
+    """
+    Generate a synthetic (subjects, rooms) instance in the same dict format as get_user_input().
+    The room_mix block (BASE_ROOMS by default) is repeated until there are about room_slack
+    times as many (slot, room) cells as subjects/groups. Each professor teaches about
+    professor_load subjects and shares one day off and time preference across them;
+    split_ratio of the subjects have more students than the largest room.
+    preferences maps time_preference names to relative weights.
+    """
+    rng = random.Random(seed)
+    room_mix = room_mix or BASE_ROOMS
+    preferences = preferences or DEFAULT_PREFERENCES
+    largest = max(capacity for capacity, _ in room_mix)
+
+    num_professors = max(1, round(num_subjects / professor_load))
+    professor_day_off = [rng.choice(DAYS) if rng.random() < day_off_rate else None for _ in range(num_professors)]
+    professor_preference = rng.choices(list(preferences), weights=list(preferences.values()), k=num_professors)
+
+    # Spread teaching load evenly across professors
+    teaching = [i % num_professors for i in range(num_subjects)]
+    rng.shuffle(teaching)
+
+    sizes = [size for size in (40, 60, 60, 80, 100, 150, 250) if size <= largest] or [largest]
+    subjects = []
+    groups = 0
+    for i in range(num_subjects):
+        professor = teaching[i]
+        if rng.random() < split_ratio:
+            students = rng.randint(largest + 1, 2 * largest)
+        else:
+            students = rng.choice(sizes)
+        groups += math.ceil(students / largest)
+        subjects.append({
+            'subject_id': f"CS{i + 1:04d}",
+            'subject_name': f"Subject {i + 1}",
+            'students': students,
+            'professor': f"Professor {professor + 1}",
+            'required_room_type': 'lab' if students <= 70 and rng.random() < lab_ratio else 'lecture_hall',
+            'day_off': professor_day_off[professor],
+            'time_preference': professor_preference[professor]
+        })
+
+    blocks = max(1, round(groups * room_slack / (20 * len(room_mix))))
+    rooms = []
+    for block in range(blocks):
+        for i, (capacity, room_type) in enumerate(room_mix):
+            rooms.append({
+                'room_id': f"R{block + 1}{i + 1:02d}",
+                'capacity': capacity,
+                'room_type': room_type
+            })
+
+    return subjects, rooms
+
+def generate_profile(profile, num_subjects, seed=0):
+    """Generate an instance using one of the named PROFILES"""
+    return generate_instance(num_subjects, seed=seed, **PROFILES[profile])
@@ -0,0 +1,351 @@
+import csv
+import json
+import os
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from ali_test import normalize_name, TIME_PREFERENCE_OPTIONS
+from time_grid import build_time_slots
+
+DAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+TIME_PREFERENCES = [option['constraint'] for option in TIME_PREFERENCE_OPTIONS.values()]
+
+ROOM_FIELDS = ['room_id', 'capacity', 'room_type']
+
+def iter_records(path, key=None):
+    """
+    Yield (line or position, record dict) from a CSV, JSON, JSON Lines or YAML file.
+    CSV and JSON Lines are streamed row by row; JSON and YAML may be a list or
+    a mapping holding the list under key (e.g. {"subjects": [...]}).
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+    elif extension in ('.jsonl', '.ndjson'):
+        with open(path, encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                if line.strip():
+                    yield line_num, json.loads(line)
+    elif extension in ('.json', '.yaml', '.yml'):
+        with open(path, encoding='utf-8') as f:
+            if extension == '.json':
+                data = json.load(f)
+            elif yaml is None:
+                raise ImportError("Reading YAML files needs PyYAML (pip install pyyaml)")
+            else:
+                data = yaml.safe_load(f)
+        if isinstance(data, dict):
+            data = data.get(key, [])
+        for position, record in enumerate(data or [], 1):
+            yield position, record
+    else:
+        raise ValueError(f"Unsupported file type: {path} (use .csv, .json, .jsonl, .yaml or .yml)")
+
+def _text(record, field):
+    value = record.get(field)
+    return '' if value is None else str(value).strip()
+
+def _names(value):
+    """A list of names from a JSON/YAML list or a ';'/','-separated CSV cell"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.replace(';', ',').split(',')
+    return [normalize_name(str(name)) for name in value if str(name).strip()]
+
+def _day_and_preference(record, problems):
+    day_off = _text(record, 'day_off').capitalize() or None
+    if day_off and day_off not in DAYS:
+        problems.append(f"unknown day_off {day_off!r}")
+
+    preference = _text(record, 'time_preference').lower() or 'any'
+    if preference in TIME_PREFERENCE_OPTIONS:
+        preference = TIME_PREFERENCE_OPTIONS[preference]['constraint']
+    elif preference not in TIME_PREFERENCES:
+        problems.append(f"unknown time_preference {preference!r}")
+    return day_off, preference
+
+def normalize_subject(record):
+    """Apply the same normalisation as get_user_input(); returns (subject, list of problems)"""
+    problems = []
+    for field in ('subject_id', 'subject_name', 'students', 'professor'):
+        if not _text(record, field):
+            problems.append(f"missing {field}")
+
+    try:
+        students = int(_text(record, 'students'))
+        if students <= 0:
+            problems.append(f"students must be positive, got {students}")
+    except ValueError:
+        students = 0
+        if _text(record, 'students'):
+            problems.append(f"students is not a whole number: {_text(record, 'students')!r}")
+
+    day_off, preference = _day_and_preference(record, problems)
+
+    try:
+        sections = int(_text(record, 'sections') or 0)
+        if sections < 0:
+            problems.append(f"sections must not be negative, got {sections}")
+        elif students > 0 and sections > students:
+            problems.append(f"sections ({sections}) must not exceed students ({students})")
+    except ValueError:
+        sections = 0
+        problems.append(f"sections is not a whole number: {_text(record, 'sections')!r}")
+
+    durations = {}
+    for field in ('duration', 'section_duration'):
+        try:
+            durations[field] = float(_text(record, field)) if _text(record, field) else None
+        except ValueError:
+            durations[field] = None
+            problems.append(f"{field} is not a number of hours: {_text(record, field)!r}")
+
+    subject = {
+        'subject_id': _text(record, 'subject_id').upper(),
+        'subject_name': _text(record, 'subject_name'),
+        'students': students,
+        'professor': normalize_name(_text(record, 'professor')),
+        'required_room_type': _text(record, 'required_room_type').lower(),
+        'day_off': day_off,
+        'time_preference': preference,
+        'cohort': _text(record, 'cohort') or None,
+        'sections': sections,
+        'teaching_assistants': _names(record.get('teaching_assistants')),
+        'duration': durations['duration'],
+        'section_duration': durations['section_duration']
+    }
+    return subject, problems
+
+def normalize_assistant(record):
+    """Normalise a TA record (name, day_off, time_preference, priority); returns (assistant, list of problems)"""
+    problems = []
+    if not _text(record, 'name'):
+        problems.append("missing name")
+    day_off, preference = _day_and_preference(record, problems)
+    try:
+        priority = int(_text(record, 'priority')) if _text(record, 'priority') else None
+    except ValueError:
+        priority = None
+        problems.append(f"priority is not a whole number: {_text(record, 'priority')!r}")
+    assistant = {
+        'name': normalize_name(_text(record, 'name')),
+        'day_off': day_off,
+        'time_preference': preference,
+        'priority': priority
+    }
+    return assistant, problems
+
+def normalize_room(record):
+    """Normalise a room record like get_user_input(); returns (room, list of problems)"""
+    problems = []
+    for field in ROOM_FIELDS:
+        if not _text(record, field):
+            problems.append(f"missing {field}")
+    try:
+        capacity = int(_text(record, 'capacity'))
+        if capacity <= 0:
+            problems.append(f"capacity must be positive, got {capacity}")
+    except ValueError:
+        capacity = 0
+        if _text(record, 'capacity'):
+            problems.append(f"capacity is not a whole number: {_text(record, 'capacity')!r}")
+
+    room = {
+        'room_id': _text(record, 'room_id').upper(),
+        'capacity': capacity,
+        'room_type': _text(record, 'room_type').lower()
+    }
+    return room, problems
+
+def _collect(records, source, normalize, id_field):
+    items = []
+    errors = []
+    seen = set()
+    for position, record in records:
+        item, problems = normalize(record)
+        if item[id_field] and item[id_field] in seen:
+            problems.append(f"duplicate {id_field} {item[id_field]}")
+        seen.add(item[id_field])
+        errors.extend(f"{source}:{position}: {problem}" for problem in problems)
+        items.append(item)
+    return items, errors
+
+def _load(path, key, normalize, id_field):
+    return _collect(iter_records(path, key), path, normalize, id_field)
+
+def _resolve_assistants(subjects, assistants):
+    """Give each TA named in a subject's teaching_assistants their record, defaulting priority to list order"""
+    by_name = {assistant['name'].lower(): assistant for assistant in assistants}
+    for subject in subjects:
+        resolved = []
+        for position, name in enumerate(subject['teaching_assistants']):
+            assistant = dict(by_name.get(name.lower(), {'name': name}))
+            if assistant.get('priority') is None:
+                assistant['priority'] = position
+            resolved.append(assistant)
+        subject['teaching_assistants'] = resolved
+
+def load_instance(subjects_path, rooms_path, assistants_path=None):
+    """
+    Load and validate subjects and rooms files in bulk.
+    An optional teaching assistants file gives each TA named in a subject's
+    teaching_assistants its day off, time preference and priority.
+    Raises ValueError listing every problem found in all files.
+    """
+    subjects, errors = _load(subjects_path, 'subjects', normalize_subject, 'subject_id')
+    rooms, room_errors = _load(rooms_path, 'rooms', normalize_room, 'room_id')
+    errors.extend(room_errors)
+    if not rooms:
+        errors.append(f"{rooms_path}: no rooms")
+    if assistants_path:
+        assistants, assistant_errors = _load(assistants_path, 'teaching_assistants', normalize_assistant, 'name')
+        errors.extend(assistant_errors)
+        _resolve_assistants(subjects, assistants)
+    if errors:
+        raise ValueError("Invalid input:\n  " + "\n  ".join(errors))
+    return subjects, rooms
+
+def instance_from_records(subject_records, room_records, assistant_records=None):
+    """load_instance() for lists of already parsed records (e.g. a JSON request body)"""
+    subjects, errors = _collect(enumerate(subject_records, 1), 'subjects', normalize_subject, 'subject_id')
+    rooms, room_errors = _collect(enumerate(room_records, 1), 'rooms', normalize_room, 'room_id')
+    errors.extend(room_errors)
+    if not rooms:
+        errors.append("rooms: no rooms")
+    if assistant_records:
+        assistants, assistant_errors = _collect(enumerate(assistant_records, 1), 'teaching_assistants',
+                                                normalize_assistant, 'name')
+        errors.extend(assistant_errors)
+        _resolve_assistants(subjects, assistants)
+    if errors:
+        raise ValueError("Invalid input:\n  " + "\n  ".join(errors))
+    return subjects, rooms
+
+def load_grid_config(path):
+    """
+    Read a time grid config (see time_grid.build_time_slots()) from a JSON or YAML
+    mapping, optionally nested under "time_grid". Returns the time slot labels;
+    raises ValueError for an invalid config.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8') as f:
+        if extension == '.json':
+            config = json.load(f)
+        elif extension not in ('.yaml', '.yml'):
+            raise ValueError(f"Unsupported time grid file type: {path} (use .json, .yaml or .yml)")
+        elif yaml is None:
+            raise ImportError("Reading YAML files needs PyYAML (pip install pyyaml)")
+        else:
+            config = yaml.safe_load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path}: time grid config must be a mapping")
+    config = config.get('time_grid', config)
+    try:
+        time_slots = build_time_slots(config)
+    except (KeyError, TypeError, ValueError) as error:
+        raise ValueError(f"{path}: invalid time grid config: {error}")
+    if not time_slots:
+        raise ValueError(f"{path}: time grid config gives no time slots")
+    return time_slots
+
+def load_changes(path):
+    """
+    Read a change request for reschedule.apply_changes() from a JSON or YAML mapping:
+    {"subjects": {"add": [...], "update": [...], "remove": [ids]}, "rooms": {...}}.
+    Added records are normalised like input files, updates hold the id plus the
+    changed fields only. Raises ValueError listing every problem.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8') as f:
+        if extension == '.json':
+            data = json.load(f)
+        elif extension not in ('.yaml', '.yml'):
+            raise ValueError(f"Unsupported change file type: {path} (use .json, .yaml or .yml)")
+        elif yaml is None:
+            raise ImportError("Reading YAML files needs PyYAML (pip install pyyaml)")
+        else:
+            data = yaml.safe_load(f)
+    if not isinstance(data, dict) or not set(data) <= {'subjects', 'rooms'}:
+        raise ValueError(f"{path}: changes must be a mapping with 'subjects' and/or 'rooms'")
+
+    changes = {}
+    errors = []
+    for key, normalize, id_field in (('subjects', normalize_subject, 'subject_id'),
+                                     ('rooms', normalize_room, 'room_id')):
+        diff = data.get(key) or {}
+        if not isinstance(diff, dict) or not set(diff) <= {'add', 'update', 'remove'}:
+            errors.append(f"{path}: {key} must map 'add', 'update' and/or 'remove' to lists")
+            continue
+        added, problems = _collect(enumerate(diff.get('add') or [], 1), f"{path}:{key}.add", normalize, id_field)
+        errors.extend(problems)
+        updates = []
+        for position, record in enumerate(diff.get('update') or [], 1):
+            item, problems = normalize(record)
+            # Updates only carry the fields that change
+            errors.extend(f"{path}:{key}.update:{position}: {problem}" for problem in problems
+                          if not problem.startswith('missing ') or problem == f"missing {id_field}")
+            updates.append({field: item[field] for field in record if field in item})
+        changes[key] = {'add': added, 'update': updates,
+                        'remove': [str(item_id).strip().upper() for item_id in diff.get('remove') or []]}
+    if errors:
+        raise ValueError("Invalid changes:\n  " + "\n  ".join(errors))
+    return changes
+
+def solution_rows(solution, all_subjects, grid):
+    """Flatten a "<id>_time"/"<id>_room" solution into one dict per scheduled subject/group"""
+    rows = []
+    for subject in all_subjects:
+        time_slot = solution.get(f"{subject['subject_id']}_time")
+        if time_slot is None:
+            continue
+        slot = grid.slot_index[time_slot]
+        rows.append({
+            'subject_id': subject['subject_id'],
+            'original_subject_id': subject.get('original_subject_id', subject['subject_id']),
+            'group': subject.get('group_number', subject.get('section_number', 1)),
+            'kind': subject.get('kind', 'lecture'),
+            'cohort': subject.get('cohort'),
+            'subject_name': subject['subject_name'],
+            'professor': subject['professor'],
+            'students': subject['students'],
+            'day': grid.days[grid.slot_day[slot]],
+            'time': time_slot.split('_', 1)[1],
+            'time_slot': time_slot,
+            'room': solution[f"{subject['subject_id']}_room"]
+        })
+    rows.sort(key=lambda row: (grid.slot_day[grid.slot_index[row['time_slot']]],
+                               grid.slot_start[grid.slot_index[row['time_slot']]], row['room']))
+    return rows
+
+def load_solution(path):
+    """Read a schedule written by write_solution() back into a "<id>_time"/"<id>_room" dict"""
+    if os.path.splitext(path)[1].lower() == '.csv':
+        records = (record for _, record in iter_records(path))
+    else:
+        with open(path, encoding='utf-8') as f:
+            records = json.load(f)['schedule']
+    solution = {}
+    for record in records:
+        solution[f"{record['subject_id']}_time"] = record['time_slot']
+        solution[f"{record['subject_id']}_room"] = record['room']
+    return solution
+
+def write_solution(path, solution, all_subjects, grid, extra=None):
+    """Write the schedule as JSON ({"schedule": [...], ...extra}) or CSV, by file extension"""
+    rows = solution_rows(solution, all_subjects, grid)
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        if extension == '.csv':
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['subject_id'])
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            json.dump(dict(extra or {}, schedule=rows), f, indent=2, ensure_ascii=False)
+    return rows
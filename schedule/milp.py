@@ -0,0 +1,204 @@
+import random
+import time
+
+try:
+    import numpy as np
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    from scipy.sparse import coo_matrix
+except ImportError:
+    milp = None
+
+from ali_test import generate_time_slots, split_all_subjects
+from evaluator import ScheduleEvaluator
+from feasibility import FeasibilityModel
+from time_grid import TimeGrid
+
+# Total objective discount spread over warm-start cells. Penalties are whole
+# numbers, so a discount below 1 only breaks ties in favour of the hint.
+HINT_BIAS = 0.5
+
+MILP_STATUS = {0: 'optimal', 1: 'limit_reached', 2: 'infeasible', 3: 'unbounded', 4: 'error'}
+
+class MilpScheduler:
+    """
+    The scheduling model as a 0/1 integer program solved with scipy.optimize.milp
+    (HiGHS). One binary x[v, slot, room] per subject/group v and cell it may use:
+    rooms big enough, slots that respect the day off and session length. Rows:
+
+    - every subject/group takes exactly one cell
+    - every (slot, room) cell holds at most one subject/group (room clash)
+    - a professor/TA and a cohort's lectures use each slot at most once
+    - the groups of a split subject are on the same day (one equality per day)
+
+    Soft rules are objective weights from PENALTY_WEIGHTS: time preference and
+    room type per cell, and for split groups a 0/1 slack for "not consecutive"
+    (pairs only) and "not in the same room", so the objective is the evaluator's
+    penalty. getSolution() returns "<id>_slot" -> (slot index, room index) cells,
+    or None with HiGHS's reason in stats['message'].
+    """
+
+    def __init__(self, all_subjects, grid, time_limit=None, gap=None, hint=None, weights=None):
+        if milp is None:
+            raise ImportError("The MILP back end needs SciPy 1.9+ (pip install scipy)")
+        self.all_subjects = all_subjects
+        self.grid = grid
+        self.time_limit = time_limit
+        self.gap = gap
+        self.evaluator = ScheduleEvaluator(all_subjects, grid, weights)
+        self.stats = {'variables': 0, 'rows': 0, 'status': None, 'message': None, 'objective': None,
+                      'bound': None, 'gap': None, 'solve_time': 0.0}
+        self._build(hint)
+
+    def _build(self, hint):
+        grid, evaluator, w = self.grid, self.evaluator, self.evaluator.weights
+        # Cells allowed by capacity, day off and session length; the unary penalty of
+        # (v, slot, room) is slot_costs[v, slot] + room_costs[v, room]
+        model = FeasibilityModel(self.all_subjects, grid, evaluator.weights)
+        allowed_slots, allowed_rooms = model.slot_matrix(preference=False), model.room_matrix()
+        slot_costs, room_costs = model.slot_costs(), model.room_costs()
+        self.cells = []      # column -> (v, slot, room)
+        costs = []
+        by_subject = []      # v -> its x columns
+        by_cell = {}         # (slot, room) -> x columns
+        by_slot = {}         # (v, slot) -> x columns
+        by_room = {}         # (v, room) -> x columns
+        for v in range(len(self.all_subjects)):
+            slots = np.flatnonzero(allowed_slots[v]).tolist()
+            rooms = np.flatnonzero(allowed_rooms[v]).tolist()
+            columns = []
+            for slot in slots:
+                for room in rooms:
+                    column = len(self.cells)
+                    self.cells.append((v, slot, room))
+                    costs.append(slot_costs[v, slot] + room_costs[v, room])
+                    columns.append(column)
+                    by_cell.setdefault((slot, room), []).append(column)
+                    by_slot.setdefault((v, slot), []).append(column)
+                    by_room.setdefault((v, room), []).append(column)
+            by_subject.append(columns)
+        num_x = len(self.cells)
+
+        rows, cols, values, lower, upper = [], [], [], [], []
+
+        def add_row(terms, lb, ub):
+            row = len(lower)
+            for column, value in terms:
+                rows.append(row)
+                cols.append(column)
+                values.append(value)
+            lower.append(lb)
+            upper.append(ub)
+
+        def slot_terms(v, slot, sign=1):
+            return [(column, sign) for column in by_slot.get((v, slot), ())]
+
+        for columns in by_subject:
+            add_row([(column, 1) for column in columns], 1, 1)
+        for columns in by_cell.values():
+            if len(columns) > 1:
+                add_row([(column, 1) for column in columns], 0, 1)
+
+        cliques = {}
+        for v, subject in enumerate(self.all_subjects):
+            cliques.setdefault(('professor', subject['professor'].lower()), []).append(v)
+            if evaluator.cohort[v]:
+                cliques.setdefault(('cohort', evaluator.cohort[v]), []).append(v)
+        for members in cliques.values():
+            if len(members) < 2:
+                continue
+            for slot in range(len(grid)):
+                terms = [term for v in members for term in slot_terms(v, slot)]
+                if len({self.cells[column][0] for column, _ in terms}) > 1:
+                    add_row(terms, 0, 1)
+
+        # Split groups: same day is hard, consecutive and same room are slack columns
+        slack_costs = []
+        for v in range(len(self.all_subjects)):
+            for u in evaluator.partners[v]:
+                if u < v:
+                    continue
+                for day in range(len(grid.days)):
+                    day_slots = [slot for slot in range(len(grid)) if grid.slot_day[slot] == day]
+                    add_row([term for slot in day_slots for term in slot_terms(v, slot)]
+                            + [term for slot in day_slots for term in slot_terms(u, slot, -1)], 0, 0)
+                if evaluator.consecutive_pair[v]:
+                    slack = num_x + len(slack_costs)
+                    slack_costs.append(w['split_consecutive'])
+                    # x[v at slot] <= x[u next to slot] + slack
+                    for slot in {self.cells[column][1] for column in by_subject[v]}:
+                        neighbours = [other for other in (grid.slot_prev[slot], grid.slot_next[slot]) if other >= 0]
+                        add_row(slot_terms(v, slot) + [term for other in neighbours
+                                                       for term in slot_terms(u, other, -1)]
+                                + [(slack, -1)], -np.inf, 0)
+                slack = num_x + len(slack_costs)
+                slack_costs.append(w['split_same_room'])
+                for room in range(len(grid.rooms)):
+                    terms = ([(column, 1) for column in by_room.get((v, room), ())]
+                             + [(column, -1) for column in by_room.get((u, room), ())])
+                    if any(value > 0 for _, value in terms):
+                        add_row(terms + [(slack, -1)], -np.inf, 0)
+
+        self.num_x = num_x
+        num_columns = num_x + len(slack_costs)
+        self.costs = np.array(costs + slack_costs, dtype=float)
+        if hint:
+            hinted = [column for column, (v, slot, room) in enumerate(self.cells) if hint.get(v) == (slot, room)]
+            for column in hinted:
+                self.costs[column] -= HINT_BIAS / len(hinted)
+        self.integrality = np.concatenate([np.ones(num_x), np.zeros(len(slack_costs))])
+        self.constraints = LinearConstraint(
+            coo_matrix((values, (rows, cols)), shape=(len(lower), num_columns)).tocsr(), lower, upper)
+        self.stats['variables'] = num_columns
+        self.stats['rows'] = len(lower)
+
+    def getSolution(self):
+        options = {'disp': False}
+        if self.time_limit is not None:
+            options['time_limit'] = self.time_limit
+        if self.gap is not None:
+            options['mip_rel_gap'] = self.gap
+        start = time.perf_counter()
+        result = milp(self.costs, integrality=self.integrality, bounds=Bounds(0, 1),
+                      constraints=self.constraints, options=options)
+        self.stats['solve_time'] = time.perf_counter() - start
+        self.stats['status'] = MILP_STATUS.get(result.status, result.status)
+        self.stats['message'] = result.message
+        if result.x is None:
+            return None
+
+        solution = {}
+        for column in np.flatnonzero(result.x[:self.num_x] > 0.5):
+            v, slot, room = self.cells[column]
+            solution[f"{self.all_subjects[v]['subject_id']}_slot"] = (int(slot), int(room))
+        self.evaluator.reset([solution[f"{subject['subject_id']}_slot"] for subject in self.all_subjects])
+        self.stats['objective'] = self.evaluator.total
+        self.stats['bound'] = getattr(result, 'mip_dual_bound', None)
+        self.stats['gap'] = getattr(result, 'mip_gap', None)
+        return solution
+
+def hint_cells(hint, all_subjects, grid):
+    """Map a "<id>_time"/"<id>_room" label (or "<id>_slot" index) solution to v -> (slot, room)"""
+    cells = {}
+    for v, subject in enumerate(all_subjects):
+        subject_id = subject['subject_id']
+        if f"{subject_id}_slot" in hint:
+            cells[v] = tuple(hint[f"{subject_id}_slot"])
+        elif hint.get(f"{subject_id}_time") in grid.slot_index and hint.get(f"{subject_id}_room") in grid.room_index:
+            cells[v] = (grid.slot_index[hint[f"{subject_id}_time"]], grid.room_index[hint[f"{subject_id}_room"]])
+    return cells
+
+def create_milp_scheduler(subjects, rooms, time_slots=None, time_limit=None, gap=None, hint=None, weights=None,
+                          seed=None):
+    """
+    Build a MilpScheduler; returns (scheduler, grid, all_subjects) like create_basic_scheduler.
+    time_limit (seconds) and gap (relative optimality gap) stop HiGHS early with the
+    best schedule so far. hint is an earlier solution preferred among equal-penalty ones.
+    """
+    time_slots = list(time_slots or generate_time_slots())
+    if seed is not None:
+        random.Random(seed).shuffle(time_slots)
+    grid = TimeGrid(time_slots, rooms)
+    all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+    cells = hint_cells(hint, all_subjects, grid) if hint else None
+    scheduler = MilpScheduler(all_subjects, grid, time_limit=time_limit, gap=gap, hint=cells, weights=weights)
+    return scheduler, grid, all_subjects
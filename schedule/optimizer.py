@@ -0,0 +1,191 @@
+import math
+import random
+import time
+
+from ali_test import subject_domains
+from evaluator import ScheduleEvaluator, PENALTY_WEIGHTS
+
+def candidate_cells(all_subjects, grid):
+    """Slots and rooms each subject/group may move to: every slot, rooms big enough for it"""
+    return [(list(range(len(grid))), rooms) for _, rooms in subject_domains(all_subjects, grid)]
+
+def greedy_assignment(model, candidates, rng, sample_size=200):
+    """Place subjects/groups one at a time, largest first, each in its cheapest sampled cell"""
+    n = len(model.subjects)
+    model.reset([None] * n)
+    for v in sorted(range(n), key=lambda v: -model.subjects[v]['students']):
+        slots, rooms = candidates[v]
+        cells = [(slot, room) for slot in slots for room in rooms]
+        if len(cells) > sample_size:
+            cells = rng.sample(cells, sample_size)
+        best = min(cells, key=lambda cell: model.delta(v, cell))
+        model.move(v, best)
+    return list(model.assignment)
+
+class Annealer:
+    """
+    Simulated annealing over the weighted penalty, kept as resumable state: the
+    current and best assignments, temperature, iteration count and RNG. run()
+    continues the search for a time budget and can be called again; snapshot()
+    and restore() carry the state across processes (see anytime.py).
+    initial may be a {"<id>_slot": (slot, room)} solution (e.g. from NativeScheduler);
+    otherwise a greedy assignment is used as the starting point.
+    """
+
+    def __init__(self, all_subjects, grid, seed=None, initial=None, weights=None, start_temperature=None,
+                 cooling=0.9995):
+        self.all_subjects = all_subjects
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.model = ScheduleEvaluator(all_subjects, grid, weights)
+        self.candidates = candidate_cells(all_subjects, grid)
+        self.cooling = cooling
+        if not all_subjects:
+            self.model.reset([])
+        elif initial:
+            self.model.reset([tuple(initial[f"{s['subject_id']}_slot"]) for s in all_subjects])
+        else:
+            greedy_assignment(self.model, self.candidates, self.rng)
+        self.best = list(self.model.assignment)
+        self.best_total = self.model.total
+        self.temperature = (start_temperature if start_temperature is not None
+                            else max(1.0, self.model.weights['time_preference']))
+        self.iteration = 0
+        self.elapsed = 0.0
+
+    def solution(self, assignment=None):
+        """A "<id>_slot" solution for assignment (default: the best one)"""
+        assignment = self.best if assignment is None else assignment
+        return {f"{s['subject_id']}_slot": tuple(assignment[v]) for v, s in enumerate(self.all_subjects)}
+
+    def run(self, time_limit=10.0, should_stop=None, progress=None, on_best=None, checkpoint=None,
+            checkpoint_every=None):
+        """
+        Anneal for up to time_limit seconds, until the penalty reaches 0 or should_stop()
+        returns true. Every 256 iterations: progress({'penalty', 'iteration', 'temperature'})
+        and on_best(best assignment, penalty) are called if the best penalty improved, and
+        checkpoint(snapshot) if checkpoint_every seconds have passed since the last one.
+        Returns the best "<id>_slot" solution.
+        """
+        model, candidates, rng, cooling = self.model, self.candidates, self.rng, self.cooling
+        n = len(self.all_subjects)
+        best, best_total, temperature, iteration = self.best, self.best_total, self.temperature, self.iteration
+        start = time.perf_counter()
+        deadline = start + time_limit
+        next_checkpoint = start + checkpoint_every if checkpoint is not None and checkpoint_every else None
+        reported = None
+
+        while n and best_total > 0:
+            iteration += 1
+            if iteration % 256 == 0:
+                if best_total != reported:
+                    reported = best_total
+                    if progress is not None:
+                        progress({'penalty': best_total, 'iteration': iteration, 'temperature': temperature})
+                    if on_best is not None:
+                        on_best(best, best_total)
+                now = time.perf_counter()
+                # Iteration `iteration` has not made its move yet, so a restored search redoes it
+                if next_checkpoint is not None and now >= next_checkpoint:
+                    self.best, self.best_total, self.temperature, self.iteration = (best, best_total,
+                                                                                    temperature, iteration - 1)
+                    self.elapsed += now - start
+                    start = now
+                    checkpoint(self.snapshot())
+                    next_checkpoint = now + checkpoint_every
+                if now > deadline or (should_stop and should_stop()):
+                    iteration -= 1
+                    break
+
+            v = rng.randrange(n)
+            slots, rooms = candidates[v]
+            cell = (rng.choice(slots), rng.choice(rooms))
+            old = model.assignment[v]
+            if cell == old:
+                continue
+            change = model.delta(v, cell)
+
+            # If the target cell is taken, also consider swapping its occupant into our old cell
+            occupants = model.occupants(cell)
+            occupant = next(iter(occupants)) if len(occupants) == 1 else None
+
+            if occupant is not None:
+                model.move(v, cell, change)
+                swap_change = model.delta(occupant, old)
+                total_change = change + swap_change
+                if total_change <= 0 or rng.random() < math.exp(-total_change / temperature):
+                    model.move(occupant, old, swap_change)
+                else:
+                    model.move(v, old)
+                    total_change = None
+            else:
+                total_change = change
+                if change <= 0 or rng.random() < math.exp(-change / temperature):
+                    model.move(v, cell, change)
+                else:
+                    total_change = None
+
+            if total_change is not None and model.total < best_total:
+                best = list(model.assignment)
+                best_total = model.total
+
+            temperature = max(0.05, temperature * cooling)
+
+        if on_best is not None and best_total != reported:
+            on_best(best, best_total)
+        self.best, self.best_total, self.temperature, self.iteration = best, best_total, temperature, iteration
+        self.elapsed += time.perf_counter() - start
+        return self.solution()
+
+    def snapshot(self):
+        """JSON-ready search state; assignments are flat [slot, room, slot, room, ...] lists"""
+        version, internal, gauss = self.rng.getstate()
+        return {
+            'seed': self.seed,
+            'current': [index for cell in self.model.assignment for index in cell],
+            'penalty': self.model.total,
+            'best': [index for cell in self.best for index in cell],
+            'best_penalty': self.best_total,
+            'temperature': self.temperature,
+            'cooling': self.cooling,
+            'iteration': self.iteration,
+            'elapsed': self.elapsed,
+            'rng': [version, list(internal), gauss]
+        }
+
+    @classmethod
+    def restore(cls, state, all_subjects, grid, weights=None):
+        """An Annealer continuing from snapshot() state for the same subjects/groups and grid"""
+        def cells(flat):
+            return [(flat[i], flat[i + 1]) for i in range(0, len(flat), 2)]
+
+        current = cells(state['current'])
+        if len(current) != len(all_subjects):
+            raise ValueError(f"Checkpoint has {len(current)} subjects/groups, the instance has {len(all_subjects)}")
+        initial = {f"{s['subject_id']}_slot": current[v] for v, s in enumerate(all_subjects)}
+        annealer = cls(all_subjects, grid, seed=state['seed'], initial=initial, weights=weights,
+                       start_temperature=state['temperature'], cooling=state['cooling'])
+        annealer.best = cells(state['best'])
+        annealer.best_total = state['best_penalty']
+        annealer.iteration = state['iteration']
+        annealer.elapsed = state['elapsed']
+        version, internal, gauss = state['rng']
+        annealer.rng.setstate((version, tuple(internal), gauss))
+        return annealer
+
+def optimize_schedule(all_subjects, grid, time_limit=10.0, seed=None, initial=None, weights=None,
+                      start_temperature=None, cooling=0.9995, should_stop=None, progress=None):
+    """
+    Minimise the weighted penalty with simulated annealing under a wall-clock budget.
+    initial may be a {"<id>_slot": (slot, room)} solution (e.g. from NativeScheduler);
+    otherwise a greedy assignment is used as the starting point.
+    should_stop is an optional callable polled during the search to end it early.
+    progress, if given, is called with {'penalty', 'iteration', 'temperature'} when
+    the best penalty has improved (checked every 256 iterations).
+    Returns (solution, model) where model holds the best assignment's penalty and breakdown.
+    """
+    annealer = Annealer(all_subjects, grid, seed=seed, initial=initial, weights=weights,
+                        start_temperature=start_temperature, cooling=cooling)
+    solution = annealer.run(time_limit, should_stop=should_stop, progress=progress)
+    annealer.model.reset(annealer.best)
+    return solution, annealer.model
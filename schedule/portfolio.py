@@ -0,0 +1,108 @@
+import contextlib
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from ali_test import generate_time_slots, split_all_subjects
+from evaluator import ScheduleEvaluator, HARD_CONSTRAINTS
+from optimizer import optimize_schedule
+from solver import NativeScheduler
+from time_grid import TimeGrid
+
+def default_portfolio(workers):
+    """Alternate randomised backtracking and annealing workers, each with its own seed"""
+    return [{'solver': 'native' if i % 2 == 0 else 'anneal', 'seed': i} for i in range(workers)]
+
+def _run_worker(config, subjects, rooms, time_slots, time_limit, stop_event):
+    """
+    Solve one portfolio entry; returns (config, "<id>_slot" solution or None, penalty,
+    feasible, proven) where proven means the search showed no schedule exists
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        grid = TimeGrid(time_slots, rooms)
+        all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+
+        if config['solver'] == 'native':
+            # Restart with a fresh seed whenever a run hits its backtrack budget
+            deadline = time.perf_counter() + time_limit
+            seed = config['seed']
+            solution = None
+            while solution is None and not stop_event.is_set() and time.perf_counter() < deadline:
+                scheduler = NativeScheduler(all_subjects, grid, seed=seed,
+                                            time_limit=deadline - time.perf_counter(),
+                                            max_backtracks=config.get('max_backtracks', 1000),
+                                            should_stop=stop_event.is_set)
+                solution = scheduler.getSolution()
+                if solution is None and not scheduler.stats['stopped']:
+                    # The whole search space was exhausted: no seed will do better
+                    return config, None, None, False, True
+                seed += 1000
+        else:
+            solution, _ = optimize_schedule(all_subjects, grid, time_limit=time_limit, seed=config['seed'],
+                                            should_stop=stop_event.is_set)
+
+    if not solution:
+        return config, None, None, False, False
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    evaluator.load_solution(solution)
+    counts = evaluator.breakdown()
+    feasible = not any(counts[kind] for kind in HARD_CONSTRAINTS)
+    return config, solution, evaluator.total, feasible, False
+
+def solve_portfolio(subjects, rooms, workers=None, time_limit=30.0, configs=None, first_feasible=True, time_slots=None):
+    """
+    Run several solver configurations in parallel processes on the same instance.
+    With first_feasible=True the first schedule without hard violations wins and the
+    other workers are told to stop; otherwise the lowest penalty within time_limit wins.
+    A native worker that proves the instance infeasible stops the others too.
+    Returns (solution, grid, all_subjects, info) with a "<id>_time"/"<id>_room" solution;
+    info['infeasible'] is true when no schedule without hard violations exists.
+    """
+    workers = workers or os.cpu_count() or 1
+    configs = configs or default_portfolio(workers)
+
+    # Every worker must see the same slot order so their results are comparable
+    time_slots = time_slots or generate_time_slots()
+    grid = TimeGrid(time_slots, rooms)
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+
+    start = time.perf_counter()
+    best = None
+    proven = False
+    with multiprocessing.Manager() as manager:
+        stop_event = manager.Event()
+        with ProcessPoolExecutor(max_workers=min(workers, len(configs))) as pool:
+            pending = set(pool.submit(_run_worker, config, subjects, rooms, time_slots, time_limit, stop_event)
+                          for config in configs)
+            while pending:
+                remaining = time_limit - (time.perf_counter() - start)
+                done, pending = wait(pending, timeout=max(remaining, 0) + 5, return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    config, solution, penalty, feasible, infeasible = future.result()
+                    proven = proven or infeasible
+                    if solution is None:
+                        continue
+                    if best is None or (feasible, -penalty) > (best['feasible'], -best['penalty']):
+                        best = {'solution': solution, 'penalty': penalty, 'feasible': feasible,
+                                'solver': config['solver'], 'seed': config['seed']}
+                if proven or (first_feasible and best is not None and best['feasible']):
+                    break
+
+            stop_event.set()
+            for future in pending:
+                future.cancel()
+
+    if proven:
+        print("NOTE: A native worker proved that no schedule satisfies the hard constraints")
+    if best is None:
+        return None, grid, all_subjects, {'elapsed': time.perf_counter() - start, 'infeasible': proven}
+
+    info = {key: best[key] for key in ('solver', 'seed', 'penalty', 'feasible')}
+    info['infeasible'] = proven
+    info['elapsed'] = time.perf_counter() - start
+    return grid.decode_solution(best['solution']), grid, all_subjects, info
@@ -0,0 +1,142 @@
+import json
+import time
+
+from constraint import Constraint, FunctionConstraint
+
+CONSTRAINT_KINDS = ('professor_conflict', 'cohort_conflict', 'room_double_booking', 'room_type', 'split_same_day',
+                    'split_consecutive', 'slot_capacity')
+
+class SolverProfile:
+    """
+    Opt-in counters for a solver run: build time, constraints per kind, checks and
+    cumulative check time per kind, search nodes, backtracks and the domain sizes
+    seen at each search depth. Pass one to create_basic_scheduler() or
+    NativeScheduler(); hook(snapshot) is called every hook_every search nodes.
+    """
+
+    def __init__(self, hook=None, hook_every=1000):
+        self.hook = hook
+        self.hook_every = hook_every
+        self.build_time = 0.0
+        self.solve_time = 0.0
+        self.kinds = {kind: {'constraints': 0, 'checks': 0, 'failures': 0, 'time': 0.0} for kind in CONSTRAINT_KINDS}
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.depth_domains = {}  # depth -> [samples, sum of mean sizes, min size, max size]
+        self._depth = 0
+        self._start = time.perf_counter()
+
+    def add_constraint(self, kind, count=1):
+        self.kinds[kind]['constraints'] += count
+
+    def record_check(self, kind, elapsed, ok=True):
+        stats = self.kinds[kind]
+        stats['checks'] += 1
+        stats['time'] += elapsed
+        if not ok:
+            stats['failures'] += 1
+
+    def record_node(self, depth, domain_sizes):
+        """A variable was assigned at depth; domain_sizes are the unassigned domain sizes"""
+        self._depth = depth
+        self.nodes += 1
+        self.max_depth = max(self.max_depth, depth)
+        if domain_sizes:
+            smallest, largest = min(domain_sizes), max(domain_sizes)
+            mean = sum(domain_sizes) / len(domain_sizes)
+            sample = self.depth_domains.get(depth)
+            if sample is None:
+                self.depth_domains[depth] = [1, mean, smallest, largest]
+            else:
+                sample[0] += 1
+                sample[1] += mean
+                sample[2] = min(sample[2], smallest)
+                sample[3] = max(sample[3], largest)
+        if self.hook is not None and self.nodes % self.hook_every == 0:
+            self.hook(self.snapshot())
+
+    def record_backtrack(self):
+        self.backtracks += 1
+
+    def wrap(self, kind, constraint):
+        """Count constraint (a Constraint or plain function) under kind and return the wrapped version"""
+        self.add_constraint(kind)
+        if not isinstance(constraint, Constraint):
+            constraint = FunctionConstraint(constraint)
+        return ProfiledConstraint(constraint, kind, self)
+
+    def time_solve(self, solve):
+        """Call solve() and record its duration as the solve time"""
+        start = time.perf_counter()
+        try:
+            return solve()
+        finally:
+            self.solve_time = time.perf_counter() - start
+
+    def snapshot(self):
+        """Small progress summary passed to the hook"""
+        return {
+            'elapsed': time.perf_counter() - self._start,
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'depth': self._depth,
+            'max_depth': self.max_depth,
+            'checks': sum(stats['checks'] for stats in self.kinds.values())
+        }
+
+    def to_dict(self):
+        return {
+            'build_time': self.build_time,
+            'solve_time': self.solve_time,
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'max_depth': self.max_depth,
+            'kinds': self.kinds,
+            'depth_domains': {
+                depth: {'samples': n, 'mean': total / n, 'min': smallest, 'max': largest}
+                for depth, (n, total, smallest, largest) in sorted(self.depth_domains.items())
+            }
+        }
+
+    def to_json(self, path=None):
+        """Return the profile as JSON, also writing it to path if given"""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    def print_summary(self):
+        print(f"\nPROFILE: build {self.build_time:.3f}s, solve {self.solve_time:.3f}s, "
+              f"{self.nodes} nodes, {self.backtracks} backtracks, max depth {self.max_depth}")
+        for kind, stats in sorted(self.kinds.items(), key=lambda item: -item[1]['time']):
+            if stats['constraints'] or stats['checks']:
+                print(f"  {kind:<20} {stats['constraints']:>7} constraints {stats['checks']:>10} checks "
+                      f"{stats['failures']:>9} failed {stats['time']:>8.3f}s")
+
+class ProfiledConstraint(Constraint):
+    """
+    Wraps a python-constraint Constraint to time its checks. The size of the
+    assignments dict is the search depth, so a node is recorded whenever it grows
+    and a backtrack whenever it shrinks.
+    """
+
+    def __init__(self, constraint, kind, profile):
+        self.constraint = constraint
+        self.kind = kind
+        self.profile = profile
+
+    def __call__(self, variables, domains, assignments, forwardcheck=False):
+        profile = self.profile
+        depth = len(assignments)
+        if depth != profile._depth:
+            if depth > profile._depth:
+                profile.record_node(depth, [len(domains[v]) for v in domains if v not in assignments])
+            else:
+                profile.record_backtrack()
+                profile._depth = depth
+        start = time.perf_counter()
+        ok = self.constraint(variables, domains, assignments, forwardcheck)
+        profile.record_check(self.kind, time.perf_counter() - start, ok)
+        return ok
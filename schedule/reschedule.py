@@ -0,0 +1,117 @@
+import contextlib
+import io
+import time
+
+from ali_test import generate_time_slots, split_all_subjects, lecture_cohorts
+from evaluator import HARD_CONSTRAINTS, ScheduleEvaluator
+from solver import NativeScheduler
+from time_grid import TimeGrid
+
+# NativeScheduler also enforces these split-group rules, which the evaluator scores as soft,
+# so a previous schedule breaking them cannot be kept with the groups pinned
+SOLVER_HARD = HARD_CONSTRAINTS + ('split_same_day', 'split_consecutive')
+
+def apply_changes(subjects, rooms, changes):
+    """
+    Apply a diff to the subject and room lists without modifying them.
+    changes = {'subjects': {'add': [...], 'update': [...], 'remove': [ids]},
+               'rooms': {'add': [...], 'update': [...], 'remove': [ids]}}
+    where 'update' entries hold the id plus only the fields that changed.
+    Returns (subjects, rooms, changed subject ids, changed room ids).
+    """
+    changes = changes or {}
+    result = []
+    touched = []
+    for items, key, id_field in ((subjects, 'subjects', 'subject_id'), (rooms, 'rooms', 'room_id')):
+        diff = changes.get(key, {})
+        by_id = {item[id_field]: dict(item) for item in items}
+        changed = set(diff.get('remove', []))
+        for item_id in changed:
+            by_id.pop(item_id, None)
+        for update in diff.get('update', []):
+            if update[id_field] not in by_id:
+                raise ValueError(f"Cannot update unknown {id_field} {update[id_field]}")
+            by_id[update[id_field]].update(update)
+            changed.add(update[id_field])
+        for item in diff.get('add', []):
+            by_id[item[id_field]] = dict(item)
+            changed.add(item[id_field])
+        result.append(list(by_id.values()))
+        touched.append(changed)
+    return result[0], result[1], touched[0], touched[1]
+
+def _neighbourhood(all_subjects, free):
+    """free plus every subject/group sharing a professor, a cohort (lectures) or a split subject with it"""
+    professors = set(all_subjects[v]['professor'].lower() for v in free)
+    originals = set(all_subjects[v].get('original_subject_id') for v in free) - {None}
+    cohorts = set(cohort for cohort, members in lecture_cohorts(all_subjects).items() if free.intersection(members))
+    return free | set(v for v, subject in enumerate(all_subjects)
+                      if subject['professor'].lower() in professors
+                      or subject.get('original_subject_id') in originals
+                      or (subject.get('kind', 'lecture') == 'lecture' and subject.get('cohort') in cohorts))
+
+def reschedule(previous_solution, subjects, rooms, changes=None, time_limit=None, seed=None, time_slots=None):
+    """
+    Re-solve after a small change while moving as few subjects/groups as possible.
+    previous_solution is the published "<id>_time"/"<id>_room" dict and changes an
+    optional diff for apply_changes(). Changed subjects, subjects in changed rooms
+    and subjects that now break a rule NativeScheduler enforces (SOLVER_HARD; for
+    split groups all of the subject's groups) are re-placed with everything
+    else pinned; if that fails their professor/split neighbourhood is freed too,
+    and finally everything, always trying each subject's previous cell first.
+    Returns (solution, grid, all_subjects, info) with info['moved'] listing the
+    subjects/groups whose slot or room changed.
+    """
+    start = time.perf_counter()
+    subjects, rooms, changed_subjects, changed_rooms = apply_changes(subjects, rooms, changes)
+    grid = TimeGrid(time_slots or generate_time_slots(), rooms)
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+
+    previous = []
+    for subject in all_subjects:
+        time_slot = previous_solution.get(f"{subject['subject_id']}_time")
+        room_id = previous_solution.get(f"{subject['subject_id']}_room")
+        if time_slot in grid.slot_index and room_id in grid.room_index:
+            previous.append((grid.slot_index[time_slot], grid.room_index[room_id]))
+        else:
+            previous.append(None)
+
+    free = set(v for v, subject in enumerate(all_subjects)
+               if previous[v] is None
+               or subject.get('original_subject_id', subject['subject_id']) in changed_subjects
+               or grid.room_ids[previous[v][1]] in changed_rooms)
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    evaluator.reset(previous)
+    for violation in evaluator.violations():
+        if violation['kind'] in SOLVER_HARD:
+            for subject_id in violation['subjects']:
+                v = evaluator.index[subject_id]
+                free.add(v)
+                free.update(evaluator.partners[v])
+
+    rounds = [free, _neighbourhood(all_subjects, free), set(range(len(all_subjects)))]
+    solution = None
+    for round_number, free in enumerate(rounds):
+        if round_number and free == rounds[round_number - 1]:
+            continue
+        fixed = {s['subject_id']: previous[v] for v, s in enumerate(all_subjects) if v not in free}
+        preferred = {s['subject_id']: previous[v] for v, s in enumerate(all_subjects)
+                     if v in free and previous[v] is not None}
+        remaining = None if time_limit is None else max(0.0, time_limit - (time.perf_counter() - start))
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler = NativeScheduler(all_subjects, grid, seed=seed, time_limit=remaining,
+                                        fixed=fixed, preferred=preferred)
+        solution = scheduler.getSolution()
+        if solution:
+            break
+
+    info = {'elapsed': time.perf_counter() - start, 'round': round_number, 'freed': len(free)}
+    if not solution:
+        info['moved'] = []
+        return None, grid, all_subjects, info
+    info['moved'] = [s['subject_id'] for v, s in enumerate(all_subjects)
+                     if solution[f"{s['subject_id']}_slot"] != previous[v]]
+    print(f"DEBUG: Re-solved {len(free)} of {len(all_subjects)} subjects/groups in {info['elapsed']:.3f}s, "
+          f"{len(info['moved'])} moved")
+    return grid.decode_solution(solution), grid, all_subjects, info
@@ -0,0 +1,390 @@
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ali_test import generate_time_slots, split_all_subjects
+from evaluator import ScheduleEvaluator, HARD_CONSTRAINTS
+from loader import instance_from_records, solution_rows
+from time_grid import TimeGrid, build_time_slots
+
+JOB_SOLVERS = ('native', 'anneal', 'milp')
+FINISHED = ('done', 'failed', 'cancelled')
+MAX_BODY = 32 * 2 ** 20        # bytes accepted in one request
+MAX_FINISHED_JOBS = 500        # finished jobs kept for GET /jobs/<id>
+STATUS_TEXT = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+def _run_job(job_id, instance, events, cancel):
+    """
+    Solve one job in a pool process. Progress is put on events as (job_id, dict);
+    cancel is a shared Event the solvers poll. Returns the result dict.
+    """
+    def report(progress):
+        events.put((job_id, progress))
+
+    subjects, rooms, time_slots = instance['subjects'], instance['rooms'], instance['time_slots']
+    with contextlib.redirect_stdout(io.StringIO()):
+        if instance['solver'] == 'native':
+            from profiling import SolverProfile
+            from solver import create_native_scheduler
+            profile = SolverProfile(hook=lambda snapshot: report(
+                {key: snapshot[key] for key in ('nodes', 'backtracks', 'elapsed')}))
+            scheduler, grid, all_subjects = create_native_scheduler(subjects, rooms, seed=instance['seed'],
+                                                                    time_limit=instance['time_limit'],
+                                                                    time_slots=time_slots,
+                                                                    should_stop=cancel.is_set, profile=profile)
+            solution = scheduler.getSolution()
+        elif instance['solver'] == 'anneal':
+            from optimizer import optimize_schedule
+            grid = TimeGrid(time_slots or generate_time_slots(), rooms)
+            all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+            solution, _ = optimize_schedule(all_subjects, grid, time_limit=instance['time_limit'],
+                                            seed=instance['seed'], should_stop=cancel.is_set, progress=report)
+        else:
+            # HiGHS cannot be interrupted; the time limit bounds the job instead
+            from milp import create_milp_scheduler
+            scheduler, grid, all_subjects = create_milp_scheduler(subjects, rooms, time_slots=time_slots,
+                                                                  time_limit=instance['time_limit'],
+                                                                  gap=instance.get('gap'))
+            solution = scheduler.getSolution()
+
+    result = {'found': bool(solution), 'groups': len(all_subjects)}
+    if solution:
+        evaluator = ScheduleEvaluator(all_subjects, grid)
+        decoded = grid.decode_solution(solution)
+        result['penalty'] = evaluator.load_solution(decoded)
+        result['violations'] = evaluator.breakdown()
+        result['feasible'] = not any(result['violations'][kind] for kind in HARD_CONSTRAINTS)
+        result['schedule'] = solution_rows(decoded, all_subjects, grid)
+        report({'penalty': result['penalty']})
+    return result
+
+def request_key(instance):
+    """Identical requests (same instance and settings) share one job while it is in flight"""
+    return hashlib.sha256(json.dumps(instance, sort_keys=True).encode()).hexdigest()
+
+class Job:
+    def __init__(self, number, key, instance):
+        self.id = str(number)
+        self.key = key
+        self.instance = instance
+        self.state = 'queued'
+        self.clients = 1        # submissions sharing this job; cancelling needs all of them
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel = None      # shared Event polled by the solver
+        self.listeners = set()  # asyncio.Queue per streaming client
+
+    def summary(self, with_result=False):
+        summary = {
+            'id': self.id,
+            'state': self.state,
+            'solver': self.instance['solver'],
+            'clients': self.clients,
+            'progress': self.progress,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished
+        }
+        if self.error:
+            summary['error'] = self.error
+        if with_result and self.result is not None:
+            summary['result'] = self.result
+        return summary
+
+    def publish(self, event):
+        for queue in self.listeners:
+            queue.put_nowait(event)
+
+class JobServer:
+    """
+    Local HTTP/JSON scheduling service. Jobs wait in a bounded queue and run in a
+    process pool of `workers` solver processes; one dispatcher task per worker keeps
+    queued jobs in this process so they can be cancelled before they start.
+    Identical in-flight requests are merged into one job.
+
+        POST   /jobs              {"subjects": [...], "rooms": [...], "teaching_assistants": [...],
+                                   "time_grid": {...}, "solver": "native", "time_limit": 60, "seed": 0}
+        GET    /jobs              summaries of every known job
+        GET    /jobs/<id>         summary, with the result once finished
+        GET    /jobs/<id>/events  newline-delimited JSON: progress (nodes, backtracks,
+                                  best penalty) and state changes until the job ends
+        DELETE /jobs/<id>         withdraw one submission; the job stops when none are left
+        GET    /health            pool size and queue length
+    """
+
+    def __init__(self, workers=None, max_queue=100, time_limit=60.0, max_time_limit=600.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.time_limit = time_limit
+        self.max_time_limit = max_time_limit
+        self.jobs = {}
+        self.in_flight = {}  # request key -> queued or running job
+        self.counter = 0
+        self.queue = None
+        self.pool = None
+        self.manager = None
+        self.events = None
+        self.loop = None
+
+    # --- jobs -----------------------------------------------------------------
+
+    def parse_request(self, body):
+        """Validated job instance from a POST body; raises ValueError"""
+        try:
+            data = json.loads(body or b'{}')
+        except json.JSONDecodeError as error:
+            raise ValueError(f"Invalid JSON: {error}")
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        subjects, rooms = instance_from_records(data.get('subjects') or [], data.get('rooms') or [],
+                                                data.get('teaching_assistants'))
+        solver = data.get('solver', 'native')
+        if solver not in JOB_SOLVERS:
+            raise ValueError(f"Unknown solver {solver!r} (use {', '.join(JOB_SOLVERS)})")
+        time_limit = float(data.get('time_limit') or self.time_limit)
+        instance = {
+            'subjects': subjects,
+            'rooms': rooms,
+            'time_slots': build_time_slots(data['time_grid']) if data.get('time_grid') else None,
+            'solver': solver,
+            'time_limit': min(time_limit, self.max_time_limit),
+            'seed': data.get('seed', 0)
+        }
+        if data.get('gap') is not None:
+            instance['gap'] = float(data['gap'])
+        return instance
+
+    def submit(self, instance):
+        """Queue a job, or join the identical one in flight; returns (job, duplicate)"""
+        key = request_key(instance)
+        job = self.in_flight.get(key)
+        if job is not None:
+            job.clients += 1
+            return job, True
+        if self.queued() >= self.max_queue:
+            return None, False
+        self.counter += 1
+        job = Job(self.counter, key, instance)
+        job.cancel = self.manager.Event()
+        self.jobs[job.id] = job
+        self.in_flight[key] = job
+        self.queue.put_nowait(job)
+        self._prune()
+        return job, False
+
+    def queued(self):
+        """Jobs waiting for a worker; cancelled ones stay in the queue until a dispatcher skips them"""
+        return sum(1 for job in self.jobs.values() if job.state == 'queued')
+
+    def withdraw(self, job):
+        """Drop one client's interest; cancel the job when nobody is waiting for it"""
+        if job.state in FINISHED:
+            return
+        job.clients -= 1
+        if job.clients > 0:
+            return
+        job.cancel.set()
+        # A new identical request must start a fresh job, not join the cancelled one
+        if self.in_flight.get(job.key) is job:
+            del self.in_flight[job.key]
+        if job.state == 'queued':
+            self._finish(job, 'cancelled')
+
+    def _finish(self, job, state, result=None, error=None):
+        job.state = state
+        job.result = result
+        job.error = error
+        job.finished = time.time()
+        if self.in_flight.get(job.key) is job:
+            del self.in_flight[job.key]
+        job.instance = {'solver': job.instance['solver']}  # the input is no longer needed
+        job.publish({'event': 'state', 'state': state})
+
+    def _prune(self):
+        finished = [job for job in self.jobs.values() if job.state in FINISHED]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.id]
+
+    async def _dispatch(self):
+        """One per pool process: run queued jobs one at a time"""
+        while True:
+            job = await self.queue.get()
+            if job.state != 'queued':
+                continue  # cancelled while waiting
+            job.state = 'running'
+            job.started = time.time()
+            job.publish({'event': 'state', 'state': 'running'})
+            try:
+                result = await self.loop.run_in_executor(self.pool, _run_job, job.id, job.instance,
+                                                         self.events, job.cancel)
+            except Exception as error:
+                self._finish(job, 'failed', error=f"{type(error).__name__}: {error}")
+            else:
+                self._finish(job, 'cancelled' if job.cancel.is_set() else 'done', result)
+
+    def _read_events(self):
+        """Thread: forward progress from the pool processes to the event loop"""
+        while True:
+            try:
+                item = self.events.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            self.loop.call_soon_threadsafe(self._on_progress, *item)
+
+    def _on_progress(self, job_id, progress):
+        job = self.jobs.get(job_id)
+        if job is None or job.state in FINISHED:
+            return
+        if 'penalty' in progress:
+            best = job.progress.get('best_penalty')
+            job.progress['best_penalty'] = progress['penalty'] if best is None else min(best, progress['penalty'])
+        job.progress.update({key: value for key, value in progress.items() if key != 'penalty'})
+        job.publish(dict(progress, event='progress'))
+
+    # --- HTTP -----------------------------------------------------------------
+
+    async def _send(self, writer, status, payload):
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def _stream(self, writer, job):
+        """Newline-delimited JSON events until the job finishes, then its final summary"""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+        queue = asyncio.Queue()
+        job.listeners.add(queue)
+        try:
+            writer.write((json.dumps(dict(job.summary(), event='state')) + "\n").encode())
+            await writer.drain()
+            while job.state not in FINISHED:
+                event = await queue.get()
+                writer.write((json.dumps(event) + "\n").encode())
+                await writer.drain()
+            writer.write((json.dumps(dict(job.summary(with_result=True), event='finished')) + "\n").encode())
+            await writer.drain()
+        finally:
+            job.listeners.discard(queue)
+
+    async def _route(self, method, path, body, writer):
+        parts = [part for part in path.split('/') if part]
+        if parts == ['health']:
+            running = sum(1 for job in self.jobs.values() if job.state == 'running')
+            return await self._send(writer, 200, {'workers': self.workers, 'queued': self.queued(),
+                                                  'running': running})
+        if not parts or parts[0] != 'jobs' or len(parts) > 3:
+            return await self._send(writer, 404, {'error': f"No route {path}"})
+        if len(parts) == 1:
+            if method == 'GET':
+                return await self._send(writer, 200, {'jobs': [job.summary() for job in self.jobs.values()]})
+            if method != 'POST':
+                return await self._send(writer, 405, {'error': f"{method} not allowed on /jobs"})
+            try:
+                instance = self.parse_request(body)
+            except (ValueError, TypeError, KeyError) as error:
+                return await self._send(writer, 400, {'error': str(error)})
+            job, duplicate = self.submit(instance)
+            if job is None:
+                return await self._send(writer, 503, {'error': "Job queue is full, try again later"})
+            return await self._send(writer, 202, dict(job.summary(), duplicate=duplicate))
+
+        job = self.jobs.get(parts[1])
+        if job is None:
+            return await self._send(writer, 404, {'error': f"No job {parts[1]}"})
+        if len(parts) == 3:
+            if parts[2] != 'events' or method != 'GET':
+                return await self._send(writer, 404, {'error': f"No route {path}"})
+            return await self._stream(writer, job)
+        if method == 'GET':
+            return await self._send(writer, 200, job.summary(with_result=True))
+        if method == 'DELETE':
+            self.withdraw(job)
+            return await self._send(writer, 200, job.summary())
+        return await self._send(writer, 405, {'error': f"{method} not allowed on /jobs/<id>"})
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode('latin-1')
+            if not request_line.strip():
+                return
+            method, target = request_line.split()[:2]
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length') or 0)
+            if length > MAX_BODY:
+                return await self._send(writer, 413, {'error': f"Request body over {MAX_BODY} bytes"})
+            body = await reader.readexactly(length) if length else b''
+            await self._route(method.upper(), target.split('?', 1)[0], body, writer)
+        except (ValueError, asyncio.IncompleteReadError):
+            with contextlib.suppress(ConnectionError):
+                await self._send(writer, 400, {'error': "Malformed HTTP request"})
+        except ConnectionError:
+            pass  # the client went away, e.g. while streaming events
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, ready=None):
+        """Run until cancelled; ready, if given, is called with the bound (host, port)"""
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.manager = multiprocessing.Manager()
+        self.events = self.manager.Queue()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        reader_thread = threading.Thread(target=self._read_events, daemon=True)
+        reader_thread.start()
+        dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        server = await asyncio.start_server(self._handle, host, port)
+        try:
+            address = server.sockets[0].getsockname()[:2]
+            print(f"Scheduling server on http://{address[0]}:{address[1]} with {self.workers} workers")
+            if ready is not None:
+                ready(address)
+            async with server:
+                await server.serve_forever()
+        finally:
+            for job in self.jobs.values():
+                if job.state not in FINISHED:
+                    job.cancel.set()
+            for task in dispatchers:
+                task.cancel()
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.events.put(None)
+            reader_thread.join(timeout=5)
+            self.manager.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON scheduling job server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, help="solver processes (default: CPU count)")
+    parser.add_argument('--max-queue', type=int, default=100, help="queued jobs before new ones are refused")
+    parser.add_argument('--time-limit', type=float, default=60.0, help="default solver budget per job in seconds")
+    parser.add_argument('--max-time-limit', type=float, default=600.0, help="largest budget a job may ask for")
+    args = parser.parse_args()
+    server = JobServer(workers=args.workers, max_queue=args.max_queue, time_limit=args.time_limit,
+                       max_time_limit=args.max_time_limit)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(server.serve(args.host, args.port))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+import random
+import time
+
+from ali_test import generate_time_slots, split_all_subjects, subject_domains, lecture_cohorts
+from time_grid import TimeGrid
+
+class NativeScheduler:
+    """
+    Backtracking search written for the timetable itself instead of python-constraint.
+
+    Each subject/group is one variable over (slot index, room index) cells. Room,
+    professor/TA, cohort-lecture and split-group conflicts are kept as explicit
+    conflict graphs, so the search can use minimum-remaining-values ordering (ties
+    broken by degree), least-constraining-value ordering and arc-consistency
+    propagation on them.
+    getSolution() returns the same "<id>_slot" dict as the combined Problem model,
+    so grid.decode_solution() gives the usual "<id>_time"/"<id>_room" labels.
+
+    fixed pins subjects/groups to a (slot, room) cell and preferred makes the
+    search try a given cell first; both map subject_id -> (slot, room) and are
+    used to re-solve with as few changes as possible (see reschedule.py).
+    avoided maps subject_id -> {(slot, room): weight}: heavier cells are tried
+    later, which steers the search away from earlier schedules (see alternatives.py).
+    An optional profiling.SolverProfile records propagation work per constraint kind.
+    """
+
+    def __init__(self, all_subjects, grid, seed=None, time_limit=None, max_backtracks=None, should_stop=None,
+                 fixed=None, preferred=None, profile=None, avoided=None):
+        build_start = time.perf_counter()
+        self.profile = profile
+        self.subjects = all_subjects
+        self.grid = grid
+        self.rng = random.Random(seed)
+        self.time_limit = time_limit
+        self.max_backtracks = max_backtracks
+        self.should_stop = should_stop  # optional callable polled during search
+        # stopped is set when a limit ends the search, so None without it means proven infeasible
+        self.stats = {'nodes': 0, 'backtracks': 0, 'propagations': 0, 'solve_time': 0.0, 'stopped': False}
+
+        n = len(all_subjects)
+        self.variables = [f"{s['subject_id']}_slot" for s in all_subjects]
+
+        # domains[v] maps slot -> set of rooms still allowed
+        self.initial_domains = []
+        for available_slots, suitable_rooms in subject_domains(all_subjects, grid, typed=True):
+            self.initial_domains.append({slot: set(suitable_rooms) for slot in available_slots})
+        fixed = fixed or {}
+        for v, subject in enumerate(all_subjects):
+            if subject['subject_id'] in fixed:
+                slot, room = fixed[subject['subject_id']]
+                self.initial_domains[v] = {slot: {room}}
+        preferred = preferred or {}
+        self.preferred = [preferred.get(subject['subject_id']) for subject in all_subjects]
+        avoided = avoided or {}
+        self.avoided = [avoided.get(subject['subject_id'], {}) for subject in all_subjects]
+
+        # Conflict graphs
+        self.prof_neighbors = [[] for _ in range(n)]
+        self.split_neighbors = [[] for _ in range(n)]
+        self.consecutive_pair = [False] * n
+        by_professor = {}
+        by_original = {}
+        for v, subject in enumerate(all_subjects):
+            by_professor.setdefault(subject['professor'].lower(), []).append(v)
+            if subject.get('is_split_group'):
+                by_original.setdefault(subject['original_subject_id'], []).append(v)
+        for members in by_professor.values():
+            for v in members:
+                self.prof_neighbors[v] = [u for u in members if u != v]
+        for members in by_original.values():
+            for v in members:
+                self.split_neighbors[v] = [u for u in members if u != v]
+                self.consecutive_pair[v] = len(members) == 2
+        # Cohort lectures need distinct slots too; pairs already sharing a professor are skipped
+        self.cohort_neighbors = [[] for _ in range(n)]
+        for members in lecture_cohorts(all_subjects).values():
+            for v in members:
+                same_professor = set(self.prof_neighbors[v])
+                self.cohort_neighbors[v] = [u for u in members if u != v and u not in same_professor]
+
+        # Room clique: every variable that can use a given cell
+        self.cell_users = {}
+        for v, domain in enumerate(self.initial_domains):
+            for slot, rooms in domain.items():
+                for room in rooms:
+                    self.cell_users.setdefault((slot, room), []).append(v)
+
+        self.degree = [len(self.prof_neighbors[v]) + len(self.cohort_neighbors[v]) + len(self.split_neighbors[v])
+                       for v in range(n)]
+        self.adjacent_slots = [[t for t in (grid.slot_prev[s], grid.slot_next[s]) if t >= 0] for s in range(len(grid))]
+
+        if profile is not None:
+            # Room type is part of the domains, so it has no constraints to check
+            profile.add_constraint('professor_conflict', sum(map(len, self.prof_neighbors)) // 2)
+            profile.add_constraint('cohort_conflict', sum(map(len, self.cohort_neighbors)) // 2)
+            profile.add_constraint('room_double_booking', sum(1 for users in self.cell_users.values() if len(users) > 1))
+            for v in range(n):
+                kind = 'split_consecutive' if self.consecutive_pair[v] else 'split_same_day'
+                profile.add_constraint(kind, sum(1 for u in self.split_neighbors[v] if u > v))
+            profile.build_time = time.perf_counter() - build_start
+
+    def getSolution(self):
+        """Return {"<id>_slot": (slot, room)} or None if no schedule exists within the limits"""
+        start = time.perf_counter()
+        solution = next(self._search(), None)
+        self.stats['solve_time'] = time.perf_counter() - start
+        if self.profile is not None:
+            self.profile.solve_time = self.stats['solve_time']
+        return solution
+
+    def getSolutionIter(self):
+        """Lazily yield every distinct solution in search order until the search space or a limit runs out"""
+        start = time.perf_counter()
+        for solution in self._search():
+            self.stats['solve_time'] = time.perf_counter() - start
+            yield solution
+        self.stats['solve_time'] = time.perf_counter() - start
+
+    # --- domain bookkeeping -------------------------------------------------
+
+    def _remove(self, v, slot, room):
+        rooms = self.domains[v].get(slot)
+        if rooms is None or room not in rooms:
+            return False
+        rooms.discard(room)
+        if not rooms:
+            del self.domains[v][slot]
+        self.sizes[v] -= 1
+        self.cell_demand[(slot, room)] -= 1
+        self.trail.append((v, slot, room))
+        return True
+
+    def _remove_slot(self, v, slot):
+        rooms = self.domains[v].get(slot)
+        if not rooms:
+            return False
+        for room in list(rooms):
+            self._remove(v, slot, room)
+        return True
+
+    def _undo(self, mark):
+        trail = self.trail
+        while len(trail) > mark:
+            v, slot, room = trail.pop()
+            self.domains[v].setdefault(slot, set()).add(room)
+            self.sizes[v] += 1
+            self.cell_demand[(slot, room)] += 1
+
+    # --- propagation ----------------------------------------------------------
+
+    def _revise_split(self, y, x):
+        """Drop cells of y that have no same-day (or adjacent, for 2 groups) support in x"""
+        grid = self.grid
+        x_slots = self.domains[x]
+        changed = False
+        if self.consecutive_pair[y]:
+            for slot in list(self.domains[y]):
+                if not any(t in x_slots for t in self.adjacent_slots[slot]):
+                    changed = self._remove_slot(y, slot) or changed
+        else:
+            x_days = set(grid.slot_day[t] for t in x_slots)
+            for slot in list(self.domains[y]):
+                if grid.slot_day[slot] not in x_days:
+                    changed = self._remove_slot(y, slot) or changed
+        return changed
+
+    def _propagate(self, queue):
+        """AC-3 style propagation over the room, professor, cohort and split-group graphs"""
+        pending = set(queue)
+        queue = list(queue)
+        while queue:
+            x = queue.pop()
+            pending.discard(x)
+            self.stats['propagations'] += 1
+            if self.sizes[x] == 0:
+                return False
+            touched = []
+            profile = self.profile
+            if profile is not None:
+                checked = time.perf_counter()
+
+            if self.sizes[x] == 1:
+                # x is fixed to a single cell: nobody else may use it
+                (slot, rooms), = self.domains[x].items()
+                cell = (slot, next(iter(rooms)))
+                for u in self.cell_users[cell]:
+                    if u != x and self._remove(u, cell[0], cell[1]):
+                        touched.append(u)
+                if profile is not None:
+                    now = time.perf_counter()
+                    profile.record_check('room_double_booking', now - checked)
+                    checked = now
+
+            if len(self.domains[x]) == 1:
+                # x is fixed to a single slot: its professor is busy then
+                slot = next(iter(self.domains[x]))
+                for u in self.prof_neighbors[x]:
+                    if self._remove_slot(u, slot):
+                        touched.append(u)
+                if profile is not None:
+                    now = time.perf_counter()
+                    profile.record_check('professor_conflict', now - checked)
+                    checked = now
+                # ... and so are the other lectures of its cohort
+                for u in self.cohort_neighbors[x]:
+                    if self._remove_slot(u, slot):
+                        touched.append(u)
+                if profile is not None and self.cohort_neighbors[x]:
+                    now = time.perf_counter()
+                    profile.record_check('cohort_conflict', now - checked)
+                    checked = now
+
+            for u in self.split_neighbors[x]:
+                if self._revise_split(u, x):
+                    touched.append(u)
+                if profile is not None:
+                    now = time.perf_counter()
+                    profile.record_check('split_consecutive' if self.consecutive_pair[u] else 'split_same_day',
+                                         now - checked, self.sizes[u] > 0)
+                    checked = now
+
+            for u in touched:
+                if self.sizes[u] == 0:
+                    return False
+                if u not in pending:
+                    pending.add(u)
+                    queue.append(u)
+        return True
+
+    # --- heuristics -----------------------------------------------------------
+
+    def _select_variable(self):
+        """Minimum remaining values, then highest degree, then random"""
+        best = None
+        best_key = None
+        for v in range(len(self.variables)):
+            if self.assigned[v] is not None:
+                continue
+            key = (self.sizes[v], -self.degree[v], self.rng.random())
+            if best_key is None or key < best_key:
+                best, best_key = v, key
+        return best
+
+    def _order_values(self, v):
+        """
+        Preferred cell first, then the least avoided, then least-constraining: cells
+        that remove the fewest neighbour options
+        """
+        avoided = self.avoided[v]
+        scored = []
+        for slot, rooms in self.domains[v].items():
+            busy = 0
+            for neighbors in (self.prof_neighbors[v], self.cohort_neighbors[v]):
+                for u in neighbors:
+                    if self.assigned[u] is None:
+                        busy += len(self.domains[u].get(slot, ()))
+            for room in rooms:
+                scored.append(((slot, room) != self.preferred[v], avoided.get((slot, room), 0),
+                               busy + self.cell_demand[(slot, room)], self.rng.random(), slot, room))
+        scored.sort()
+        return [(slot, room) for *_, slot, room in scored]
+
+    # --- search ---------------------------------------------------------------
+
+    def _out_of_budget(self, start):
+        if self.time_limit is not None and time.perf_counter() - start > self.time_limit:
+            self.stats['stopped'] = True
+        elif self.max_backtracks is not None and self.stats['backtracks'] > self.max_backtracks:
+            self.stats['stopped'] = True
+        elif self.should_stop is not None and self.should_stop():
+            self.stats['stopped'] = True
+        return self.stats['stopped']
+
+    def _assign(self, v, cell):
+        self.assigned[v] = cell
+        slot, room = cell
+        for other_slot in list(self.domains[v]):
+            for other_room in list(self.domains[v][other_slot]):
+                if (other_slot, other_room) != cell:
+                    self._remove(v, other_slot, other_room)
+        return self._propagate([v])
+
+    def _search(self):
+        """Generator over solutions; the search state lives in the generator frame"""
+        n = len(self.variables)
+        self.domains = [{slot: set(rooms) for slot, rooms in d.items()} for d in self.initial_domains]
+        self.sizes = [sum(len(rooms) for rooms in d.values()) for d in self.domains]
+        self.assigned = [None] * n
+        self.trail = []
+        self.cell_demand = {cell: len(users) for cell, users in self.cell_users.items()}
+        self.stats['stopped'] = False
+
+        if any(size == 0 for size in self.sizes) or not self._propagate(list(range(n))):
+            return
+
+        start = time.perf_counter()
+        stack = []  # (variable, ordered values, next value index, trail mark)
+        v = self._select_variable()
+        if v is None:
+            yield {self.variables[u]: self.assigned[u] for u in range(n)}
+            return
+        frame = [v, self._order_values(v), 0, len(self.trail)]
+
+        while True:
+            v, values, index, mark = frame
+            placed = False
+            while index < len(values):
+                cell = values[index]
+                index += 1
+                self.stats['nodes'] += 1
+                if self._assign(v, cell):
+                    placed = True
+                    break
+                self.assigned[v] = None
+                self._undo(mark)
+            frame[2] = index
+
+            if placed:
+                stack.append(frame)
+                if self.profile is not None:
+                    self.profile.record_node(len(stack), [self.sizes[u] for u in range(n) if self.assigned[u] is None])
+                if self.stats['nodes'] % 256 == 0 and self._out_of_budget(start):
+                    return
+                nxt = self._select_variable()
+                if nxt is None:
+                    yield {self.variables[u]: self.assigned[u] for u in range(n)}
+                    # Resume with the next value of the last variable
+                    frame = stack.pop()
+                    self.assigned[frame[0]] = None
+                    self._undo(frame[3])
+                    continue
+                frame = [nxt, self._order_values(nxt), 0, len(self.trail)]
+                continue
+
+            # Dead end: go back to the previous variable and try its next value
+            self.stats['backtracks'] += 1
+            if self.profile is not None:
+                self.profile.record_backtrack()
+            if self._out_of_budget(start) or not stack:
+                return
+            frame = stack.pop()
+            self.assigned[frame[0]] = None
+            self._undo(frame[3])
+
+def create_native_scheduler(subjects, rooms, seed=None, time_limit=None, max_backtracks=None,
+                            time_slots=None, should_stop=None, profile=None):
+    """Drop-in alternative to create_basic_scheduler(..., combined=True) using NativeScheduler"""
+    grid = TimeGrid(time_slots or generate_time_slots(), rooms)
+    all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+    scheduler = NativeScheduler(all_subjects, grid, seed=seed, time_limit=time_limit,
+                                max_backtracks=max_backtracks, should_stop=should_stop, profile=profile)
+    return scheduler, grid, all_subjects
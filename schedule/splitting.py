@@ -0,0 +1,153 @@
+import math
+
+# Each group beyond the minimum costs this many wasted seats' worth: an extra
+# group takes another professor slot and another consecutive period
+EXTRA_GROUP_COST = 100
+MAX_EXTRA_GROUPS = 2
+
+def compatible_capacities(subject, rooms):
+    """
+    Capacities of the rooms a subject/group is planned against: rooms of its type if
+    one of them holds it, else all rooms. Room type is a soft preference, so it never
+    forces a split that a room of another type would avoid.
+    """
+    required = (subject.get('required_room_type') or '').lower()
+    typed = [room['capacity'] for room in rooms if room['room_type'].lower() == required]
+    if required and typed and max(typed) >= subject['students']:
+        return typed
+    return [room['capacity'] for room in rooms]
+
+def group_sizes(students, capacities):
+    """Divide students over groups in proportion to their room capacities, no group above its room"""
+    total = sum(capacities)
+    sizes = [min(capacity, students * capacity // total) for capacity in capacities]
+    # Hand out the rounding remainder to the groups with the most free seats
+    for _ in range(students - sum(sizes)):
+        i = max(range(len(sizes)), key=lambda i: capacities[i] - sizes[i])
+        sizes[i] += 1
+    return sizes
+
+class SplitPlanner:
+    """
+    Chooses how many groups each oversized subject is split into and how big
+    they are, looking at all subjects and the room mix together.
+
+    Every subject/group reserves the smallest room capacity it fits (its tier);
+    a tier can host (rooms of that capacity) x num_slots groups. A split is a
+    multiset of tiers whose seats cover the subject, scored by wasted seats plus
+    the load already on those tiers, and students are divided in proportion to
+    the chosen tiers (group_sizes()). The cheapest split is built tier by tier,
+    so many distinct room sizes do not make it exponential. With 350-, 120- and
+    50-seat rooms a 400-student course becomes 350 + 50 while the hall has room,
+    or 118 + 117 + 117 + 48 once it is taken, instead of two 200-student groups
+    that both need the largest hall. Extra groups beyond
+    ceil(students / largest room) are only used when they pay for themselves,
+    and never more than fit in one day.
+    """
+
+    def __init__(self, rooms, num_slots):
+        self.rooms = list(rooms)
+        self.num_slots = max(1, num_slots)
+        self.supply = {}
+        for room in self.rooms:
+            self.supply[room['capacity']] = self.supply.get(room['capacity'], 0) + self.num_slots
+        self.load = {capacity: 0 for capacity in self.supply}
+
+    def _tier(self, students, capacities):
+        fitting = [capacity for capacity in capacities if capacity >= students]
+        return min(fitting) if fitting else max(capacities)
+
+    def reserve(self, students, capacities):
+        tier = self._tier(students, capacities)
+        self.load[tier] += 1
+        return tier
+
+    def _cheapest(self, students, fewest, most, tiers):
+        """
+        Cheapest multiset of fewest..most tiers covering students, scored as in the
+        class docstring. Partial splits are keyed by (groups, seats) with seats capped
+        at students; of those with the same group count only the ones that no split
+        with at least as many seats beats on cost are kept.
+        """
+        largest = tiers[-1]
+        splits = {(0, 0): (0.0, ())}
+        for tier in tiers:
+            # Cost of k groups on this tier: their seats plus the pressure they add
+            steps = [0.0]
+            for added in range(1, most + 1):
+                used = self.load[tier] + added
+                step = tier + tier * used / self.supply[tier] + (tier * 10 if used > self.supply[tier] else 0)
+                steps.append(steps[-1] + step)
+            extended = dict(splits)
+            for (groups, seats), (cost, chosen) in splits.items():
+                for k in range(1, most - groups + 1):
+                    if seats + k * tier + (most - groups - k) * largest < students:
+                        continue  # the groups left cannot cover the rest
+                    key = (groups + k, min(students, seats + k * tier))
+                    candidate = cost + steps[k]
+                    if key not in extended or candidate < extended[key][0]:
+                        extended[key] = (candidate, chosen + (tier,) * k)
+            splits = {}
+            best_by_groups = {}
+            for key in sorted(extended, key=lambda key: (key[0], -key[1])):
+                cost = extended[key][0]
+                if cost < best_by_groups.get(key[0], float('inf')):
+                    best_by_groups[key[0]] = cost
+                    splits[key] = extended[key]
+
+        best, best_cost = None, None
+        for count in range(fewest, most + 1):
+            if (count, students) in splits:
+                cost = splits[(count, students)][0] - students + (count - fewest) * EXTRA_GROUP_COST
+                if best_cost is None or cost < best_cost:
+                    best, best_cost = splits[(count, students)][1], cost
+        return best
+
+    def plan(self, subject, max_groups=None):
+        """
+        List of group sizes for subject ([students] if it fits a room), reserving
+        their tiers. max_groups caps the group count (the periods it can use in one day).
+        """
+        students = subject['students']
+        capacities = compatible_capacities(subject, self.rooms)
+        largest = max(capacities)
+        if students <= largest:
+            self.reserve(students, capacities)
+            return [students]
+
+        fewest = math.ceil(students / largest)
+        if max_groups is not None and fewest > max_groups:
+            # Even the largest rooms need more groups than fit in a day: nothing to choose
+            best = (largest,) * fewest
+        else:
+            most = fewest + MAX_EXTRA_GROUPS
+            if max_groups is not None:
+                most = min(most, max_groups)
+            best = self._cheapest(students, fewest, most, sorted(set(capacities)))
+
+        chosen = sorted(best, reverse=True)
+        sizes = group_sizes(students, chosen)
+        for size in sizes:
+            self.reserve(size, capacities)
+        return sizes
+
+def plan_splits(subjects, rooms, num_slots, max_groups=None):
+    """
+    Map subject_id -> list of group sizes for every subject (one entry for subjects
+    that are not split). Subjects that fit a room reserve capacity first, then the
+    oversized ones are planned largest first against what is left.
+    max_groups optionally maps subject_id -> most groups that subject can take.
+    """
+    max_groups = max_groups or {}
+    planner = SplitPlanner(rooms, num_slots)
+    plans = {}
+    largest = {}
+    for subject in subjects:
+        largest[subject['subject_id']] = max(compatible_capacities(subject, rooms))
+    oversized = [s for s in subjects if s['students'] > largest[s['subject_id']]]
+    for subject in subjects:
+        if subject['students'] <= largest[subject['subject_id']]:
+            plans[subject['subject_id']] = planner.plan(subject)
+    for subject in sorted(oversized, key=lambda s: -s['students']):
+        plans[subject['subject_id']] = planner.plan(subject, max_groups.get(subject['subject_id']))
+    return plans
@@ -0,0 +1,29 @@
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+# The modules import each other as top-level siblings (python ali_test.py, python -m schedule)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ali_test import generate_time_slots, split_all_subjects
+from generator import generate_profile
+from time_grid import TimeGrid
+
+def build_instance(profile='baseline', size=30, seed=0):
+    """(subjects, rooms, grid, all_subjects) for a generated instance, with the splitting notes silenced"""
+    subjects, rooms = generate_profile(profile, size, seed=seed)
+    grid = TimeGrid(generate_time_slots(), rooms)
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+    return subjects, rooms, grid, all_subjects
+
+@pytest.fixture
+def instance():
+    return build_instance()
+
+@pytest.fixture
+def make_instance():
+    return build_instance
@@ -0,0 +1,37 @@
+from alternatives import assignment_difference, iter_alternatives, top_alternatives
+from evaluator import HARD_CONSTRAINTS, ScheduleEvaluator
+
+def assignments(results, all_subjects):
+    return [[solution[f"{s['subject_id']}_slot"] for s in all_subjects] for solution, _ in results]
+
+def test_top_alternatives_are_feasible_diverse_and_sorted(make_instance):
+    _, _, grid, all_subjects = make_instance('baseline', 15, seed=1)
+    results = top_alternatives(all_subjects, grid, k=4, min_difference=3, time_limit=None, max_candidates=8)
+    assert len(results) == 4
+    penalties = [penalty for _, penalty in results]
+    assert penalties == sorted(penalties)
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    found = assignments(results, all_subjects)
+    for assignment, penalty in zip(found, penalties):
+        evaluator.reset(assignment)
+        assert evaluator.total == penalty
+        assert not any(evaluator.breakdown()[kind] for kind in HARD_CONSTRAINTS)
+    for i, first in enumerate(found):
+        for second in found[i + 1:]:
+            assert assignment_difference(first, second) >= 3
+
+def test_top_alternatives_keeps_the_best_candidates(make_instance):
+    _, _, grid, all_subjects = make_instance('baseline', 15, seed=1)
+    streamed = sorted(penalty for _, penalty in iter_alternatives(all_subjects, grid, min_difference=3, max_count=8))
+    kept = top_alternatives(all_subjects, grid, k=3, min_difference=3, time_limit=None, max_candidates=8)
+    assert [penalty for _, penalty in kept] == streamed[:3]
+
+def test_max_penalty_and_exhaustion(make_instance):
+    _, _, grid, all_subjects = make_instance('baseline', 15, seed=1)
+    results = list(iter_alternatives(all_subjects, grid, max_penalty=0, max_count=3))
+    assert len(results) == 3 and all(penalty == 0 for _, penalty in results)
+    # A single subject with one room has only as many schedules as slots
+    subject = dict(all_subjects[0], day_off=None, time_preference=None)
+    lone = list(iter_alternatives([subject], grid, max_count=1000))
+    assert 0 < len(lone) <= len(grid.time_slots) * len(grid.rooms)
+    assert len(set(tuple(a) for a in assignments(lone, [subject]))) == len(lone)
@@ -0,0 +1,71 @@
+import contextlib
+import gzip
+import io
+import json
+
+import pytest
+
+from anytime import CHECKPOINT_VERSION, AnytimeSolver, load_checkpoint, save_checkpoint
+from optimizer import Annealer
+
+def stop_after(checks):
+    """should_stop() for Annealer.run that is true from the given check on (checks come every 256 iterations)"""
+    count = [0]
+
+    def should_stop():
+        count[0] += 1
+        return count[0] >= checks
+    return should_stop
+
+def test_snapshot_restore_continues_the_same_search(make_instance):
+    _, _, grid, all_subjects = make_instance('strict', 60, seed=6)
+    continuous = Annealer(all_subjects, grid, seed=7)
+    continuous.run(3600, should_stop=stop_after(80))
+    assert continuous.best_total > 0, "the search must still be running after 80 checks"
+
+    first = Annealer(all_subjects, grid, seed=7)
+    first.run(3600, should_stop=stop_after(40))
+    state = json.loads(json.dumps(first.snapshot()))
+    resumed = Annealer.restore(state, all_subjects, grid)
+    # The stopped iteration has not moved yet, so the resumed run repeats its check
+    resumed.run(3600, should_stop=stop_after(41))
+    assert [list(cell) for cell in resumed.best] == [list(cell) for cell in continuous.best]
+    assert [list(cell) for cell in resumed.model.assignment] == [list(cell) for cell in continuous.model.assignment]
+    assert (resumed.best_total, resumed.model.total, resumed.temperature, resumed.iteration) == \
+           (continuous.best_total, continuous.model.total, continuous.temperature, continuous.iteration)
+
+def test_anytime_solver_resumes_from_its_checkpoint(make_instance, tmp_path):
+    _, _, grid, all_subjects = make_instance('strict', 40, seed=6)
+    path = str(tmp_path / 'ck.gz')
+    solver = AnytimeSolver(all_subjects, grid, seed=1, checkpoint_path=path, checkpoint_every=0.05)
+    solver.start(time_limit=0.3).result()
+    assert solver.error is None
+    saved = load_checkpoint(path)
+    assert saved['best_penalty'] == solver.best()[1]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        resumed = AnytimeSolver(all_subjects, grid, checkpoint_path=path, resume=True)
+    state = resumed.annealer.snapshot()
+    for key in ('current', 'penalty', 'best', 'best_penalty', 'temperature', 'iteration', 'elapsed', 'rng'):
+        assert state[key] == saved[key]
+    assert resumed.best() == solver.best()
+    resumed.start(time_limit=0.1).result()
+    assert resumed.error is None and resumed.best()[1] <= saved['best_penalty']
+
+def test_checkpoint_errors(make_instance, tmp_path):
+    _, _, grid, all_subjects = make_instance('baseline', 20, seed=6)
+    garbage = tmp_path / 'garbage.gz'
+    garbage.write_bytes(b'not a checkpoint')
+    with pytest.raises(ValueError):
+        load_checkpoint(str(garbage))
+    old = tmp_path / 'old.gz'
+    old.write_bytes(gzip.compress(json.dumps({'version': CHECKPOINT_VERSION + 1}).encode()))
+    with pytest.raises(ValueError):
+        load_checkpoint(str(old))
+
+    path = str(tmp_path / 'ck.gz')
+    solver = AnytimeSolver(all_subjects, grid, seed=1, checkpoint_path=path)
+    save_checkpoint(path, dict(solver.annealer.snapshot(), instance=solver.key))
+    _, _, other_grid, other_subjects = make_instance('baseline', 21, seed=6)
+    with pytest.raises(ValueError):
+        AnytimeSolver(other_subjects, other_grid, checkpoint_path=path, resume=True)
@@ -0,0 +1,48 @@
+import contextlib
+import io
+import json
+import math
+
+from benchmark import compare_reports, run_suite, run_with_timeout, write_report
+from generator import BASE_ROOMS, generate_instance, generate_profile
+
+def test_generator_is_reproducible_and_sized():
+    subjects, rooms = generate_instance(100, seed=4)
+    assert (subjects, rooms) == generate_instance(100, seed=4)
+    assert subjects != generate_instance(100, seed=5)[0]
+    assert len(set(s['subject_id'] for s in subjects)) == 100
+    assert len(set(r['room_id'] for r in rooms)) == len(rooms)
+    largest = max(capacity for capacity, _ in BASE_ROOMS)
+    groups = sum(math.ceil(s['students'] / largest) for s in subjects)
+    # About room_slack (2) cells per subject/group on the 20-slot week
+    assert 1.5 <= len(rooms) * 20 / groups <= 3
+    professors = {}
+    for subject in subjects:
+        professors.setdefault(subject['professor'], set()).add((subject['day_off'], subject['time_preference']))
+    assert all(len(settings) == 1 for settings in professors.values())
+
+def test_generator_knobs():
+    subjects, rooms = generate_instance(50, seed=1, split_ratio=1.0, day_off_rate=1.0,
+                                        preferences={'morning': 1})
+    largest = max(room['capacity'] for room in rooms)
+    assert all(s['students'] > largest for s in subjects)
+    assert all(s['day_off'] and s['time_preference'] == 'morning' for s in subjects)
+    _, small_rooms = generate_profile('small_rooms', 50, seed=1)
+    assert max(room['capacity'] for room in small_rooms) == 120
+
+def test_suite_report_and_comparison(tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = run_suite(sizes=(20,), solvers=('native', 'anneal'), timeout=30)
+    assert [row['solver'] for row in results] == ['native', 'anneal']
+    assert all(row['found'] and not row['timed_out'] and row['penalty'] is not None for row in results)
+    path = str(tmp_path / 'report.json')
+    write_report(path, results, sizes=[20])
+    assert json.load(open(path))['settings'] == {'sizes': [20]}
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        compare_reports(path, results)
+    assert output.getvalue().count('solve x1.00') == 2
+
+def test_stuck_solver_is_killed():
+    # The python-constraint model searches this instance for minutes
+    subjects, rooms = generate_profile('small_rooms', 60, seed=5)
+    assert run_with_timeout('constraint', subjects, rooms, timeout=1) is None
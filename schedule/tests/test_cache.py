@@ -0,0 +1,82 @@
+import contextlib
+import io
+import json
+import os
+
+from ali_test import split_all_subjects
+from cache import INDEX_NAME, SolutionCache, changed_records, instance_fingerprint, solve_cached
+
+def split_instance(subjects, rooms, grid):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return split_all_subjects(subjects, rooms, grid.time_slots), rooms
+
+def test_fingerprint_ignores_order(instance):
+    _, rooms, grid, all_subjects = instance
+    first = instance_fingerprint(all_subjects, rooms, grid.time_slots, {'solver': 'native'})
+    second = instance_fingerprint(all_subjects[::-1], rooms[::-1], grid.time_slots[::-1], {'solver': 'native'})
+    assert first == second
+    assert first != instance_fingerprint(all_subjects, rooms, grid.time_slots, {'solver': 'milp'})
+
+def test_round_trip_and_index(tmp_path, instance):
+    _, rooms, grid, all_subjects = instance
+    cache = SolutionCache(str(tmp_path))
+    solution = {f"{s['subject_id']}_time": grid.time_slots[0] for s in all_subjects}
+    cache.put('feasible', solution, all_subjects, rooms)
+    cache.put('infeasible', None, all_subjects, rooms)
+    assert cache.get('feasible')['solution'] == solution
+    assert cache.get('infeasible')['feasible'] is False
+    assert cache.get('missing') is None
+    with open(os.path.join(str(tmp_path), INDEX_NAME), encoding='utf-8') as f:
+        assert set(json.load(f)) == {'feasible'}
+    assert cache.nearest(all_subjects[:-1], rooms)['solution'] == solution
+    assert cache.nearest(all_subjects[:1], rooms[:1]) is None
+
+def test_index_is_rebuilt_and_follows_eviction(tmp_path, instance):
+    _, rooms, grid, all_subjects = instance
+    cache = SolutionCache(str(tmp_path))
+    cache.put('old', {'x': 1}, all_subjects, rooms)
+    os.remove(os.path.join(str(tmp_path), INDEX_NAME))
+    assert cache.nearest(all_subjects, rooms)['solution'] == {'x': 1}
+    cache.max_bytes = 0
+    cache.evict()
+    assert cache.nearest(all_subjects, rooms) is None
+
+def test_solve_cached_hits_and_keeps_solver_results(tmp_path, instance):
+    subjects, rooms, _, _ = instance
+    cache = SolutionCache(str(tmp_path))
+    solution, _, _, source = solve_cached(subjects, rooms, cache, settings={'solver': 'native'}, seed=0)
+    assert solution and source == 'solved'
+    again, _, _, source = solve_cached(subjects, rooms, cache, settings={'solver': 'native'}, seed=0)
+    assert again == solution and source == 'hit'
+
+    # A similar instance with a solve callable never goes through the native near-hit path
+    calls = []
+
+    def solve():
+        calls.append(1)
+        return solve_cached(subjects[:-1], rooms, SolutionCache(str(tmp_path / 'other')), seed=0)[:3]
+
+    _, _, _, source = solve_cached(subjects[:-1], rooms, cache, solve=solve, settings={'solver': 'milp'})
+    assert source == 'solved' and calls == [1]
+    _, _, _, source = solve_cached(subjects[:-1], rooms, cache, settings={'solver': 'native'}, seed=0)
+    assert source == 'near'
+
+def test_near_hit_frees_edited_subjects(tmp_path, instance):
+    subjects, rooms, _, _ = instance
+    cache = SolutionCache(str(tmp_path))
+    solution, grid, _, _ = solve_cached(subjects, rooms, cache, seed=0)
+    # Same ids, but one professor now prefers the other half of the day. A time
+    # preference is soft, so only the changed record frees the subject's cell
+    target = next(s for s in subjects if f"{s['subject_id']}_time" in solution)
+    slot = grid.slot_index[solution[f"{target['subject_id']}_time"]]
+    preference = 'afternoon' if grid.slot_start[slot] < 12 else 'morning'
+    edited = [dict(s, time_preference=preference) if s['professor'] == target['professor'] else s
+              for s in subjects]
+    assert changed_records(cache.nearest(edited, rooms), *split_instance(edited, rooms, grid)) == (
+        set(s['subject_id'] for s in edited if s['professor'] == target['professor']), set())
+    moved, _, all_subjects, source = solve_cached(edited, rooms, cache, seed=0)
+    assert source == 'near'
+    assert grid.matches_preference(grid.slot_index[moved[f"{target['subject_id']}_time"]], preference)
+    # The stored answer for the edited instance is the corrected one
+    again, _, _, source = solve_cached(edited, rooms, cache, seed=0)
+    assert source == 'hit' and again == moved
@@ -0,0 +1,77 @@
+import csv
+import json
+import time
+
+import pytest
+
+from cli import main
+from loader import load_instance, load_solution
+
+SUBJECT_FIELDS = ['subject_id', 'subject_name', 'students', 'professor', 'required_room_type', 'day_off',
+                  'time_preference']
+
+def write_csv(path, fields, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+def write_instance(tmp_path, subjects, rooms):
+    return (write_csv(tmp_path / 'subjects.csv', SUBJECT_FIELDS, subjects),
+            write_csv(tmp_path / 'rooms.csv', ['room_id', 'capacity', 'room_type'], rooms))
+
+def test_load_instance_normalises_like_the_prompt(tmp_path):
+    subjects_path, rooms_path = write_instance(
+        tmp_path,
+        [{'subject_id': 'cs101', 'subject_name': 'Intro', 'students': ' 80 ', 'professor': 'dr. ada lovelace',
+          'required_room_type': 'Lab', 'day_off': 'mon', 'time_preference': '1'}],
+        [{'room_id': 'r1', 'capacity': '100', 'room_type': 'LAB'}])
+    subjects, rooms = load_instance(subjects_path, rooms_path)
+    subject = subjects[0]
+    assert (subject['subject_id'], subject['students'], subject['required_room_type'], subject['day_off'],
+            subject['time_preference']) == ('CS101', 80, 'lab', 'Mon', 'morning')
+    assert rooms == [{'room_id': 'R1', 'capacity': 100, 'room_type': 'lab'}]
+
+def test_load_instance_reports_every_problem(tmp_path):
+    subjects_path = tmp_path / 'subjects.json'
+    subjects_path.write_text(json.dumps({'subjects': [
+        {'subject_id': 'A', 'subject_name': 'A', 'students': 'many', 'professor': 'p'},
+        {'subject_id': 'a', 'subject_name': 'A', 'students': 10, 'professor': 'p', 'day_off': 'Someday'}]}))
+    rooms_path = tmp_path / 'rooms.jsonl'
+    rooms_path.write_text('{"room_id": "R1", "capacity": 0, "room_type": "lab"}\n')
+    with pytest.raises(ValueError) as error:
+        load_instance(str(subjects_path), str(rooms_path))
+    message = str(error.value)
+    for problem in ("subjects.json:1: students is not a whole number", "subjects.json:2: duplicate subject_id A",
+                    "unknown day_off 'Someday'", "rooms.jsonl:1: capacity must be positive"):
+        assert problem in message
+
+def test_cli_writes_a_schedule(tmp_path, make_instance):
+    subjects, rooms, _, _ = make_instance('baseline', 15, seed=1)
+    subjects_path, rooms_path = write_instance(tmp_path, subjects, rooms)
+    out = str(tmp_path / 'schedule.json')
+    assert main(['--subjects', subjects_path, '--rooms', rooms_path, '--solver', 'native', '--out', out,
+                 '--quiet']) == 0
+    written = json.load(open(out))
+    assert written['solver'] == 'native' and written['violations']['room_clash'] == 0
+    solution = load_solution(out)
+    assert len(solution) == 2 * len(written['schedule'])
+
+def test_cli_rejects_bad_input_and_flags(tmp_path, capsys):
+    subjects_path, rooms_path = write_instance(tmp_path, [], [])
+    assert main(['--subjects', subjects_path, '--rooms', rooms_path]) == 2
+    assert 'no rooms' in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(['--subjects', subjects_path, '--rooms', rooms_path, '--changes', 'changes.json'])
+
+@pytest.mark.parametrize('solver', ['constraint', 'two_phase'])
+def test_cli_time_limit_stops_python_constraint_searches(tmp_path, make_instance, capsys, solver):
+    # A 60-subject instance both python-constraint models search for minutes
+    subjects, rooms, _, _ = make_instance('small_rooms', 60, seed=5)
+    subjects_path, rooms_path = write_instance(tmp_path, subjects, rooms)
+    start = time.perf_counter()
+    assert main(['--subjects', subjects_path, '--rooms', rooms_path, '--solver', solver, '--time-limit', '1',
+                 '--quiet']) == 1
+    assert time.perf_counter() - start < 10
+    assert 'No feasible schedule found' in capsys.readouterr().err
@@ -0,0 +1,76 @@
+import contextlib
+import io
+
+import pytest
+
+from ali_test import generate_time_slots, subject_domains
+from decompose import conflict_components, solve_decomposed
+from evaluator import HARD_CONSTRAINTS, ScheduleEvaluator
+from time_grid import TimeGrid
+
+def reference_components(all_subjects, grid):
+    """Components by pairwise checks: shared professor, cohort lectures, split subject or (slot, room) cell"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        domains = subject_domains(all_subjects, grid, typed=True)
+    cells = [set((slot, room) for slot in slots for room in rooms) for slots, rooms in domains]
+
+    def connected(u, v):
+        a, b = all_subjects[u], all_subjects[v]
+        return (a['professor'].lower() == b['professor'].lower()
+                or (a.get('cohort') and a.get('cohort') == b.get('cohort')
+                    and a.get('kind', 'lecture') == b.get('kind', 'lecture') == 'lecture')
+                or (a.get('is_split_group') and a.get('original_subject_id') == b.get('original_subject_id'))
+                or bool(cells[u] & cells[v]))
+
+    component = {}
+    for start in range(len(all_subjects)):
+        if start in component:
+            continue
+        component[start] = start
+        stack = [start]
+        while stack:
+            u = stack.pop()
+            for v in range(len(all_subjects)):
+                if v not in component and connected(u, v):
+                    component[v] = start
+                    stack.append(v)
+    groups = {}
+    for v, root in component.items():
+        groups.setdefault(root, []).append(v)
+    return sorted(sorted(group) for group in groups.values())
+
+@pytest.mark.parametrize('profile', ['baseline', 'strict', 'many_splits'])
+def test_components_match_pairwise_reference(make_instance, profile):
+    _, _, grid, all_subjects = make_instance(profile, 40, seed=3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        components = conflict_components(all_subjects, grid)
+    assert sorted(sorted(c) for c in components) == reference_components(all_subjects, grid)
+
+def test_disjoint_departments_are_solved_separately():
+    rooms = [{'room_id': 'LAB', 'capacity': 40, 'room_type': 'lab'},
+             {'room_id': 'HALL', 'capacity': 200, 'room_type': 'lecture_hall'}]
+    subjects = []
+    for i in range(4):
+        subjects.append({'subject_id': f"LAB{i}", 'subject_name': 'Lab', 'students': 30, 'professor': f"lab {i % 2}",
+                         'required_room_type': 'lab', 'day_off': None, 'time_preference': 'morning'})
+        subjects.append({'subject_id': f"LEC{i}", 'subject_name': 'Lecture', 'students': 150,
+                         'professor': f"lecturer {i % 2}", 'required_room_type': 'lecture_hall', 'day_off': None,
+                         'time_preference': 'any'})
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution, grid, all_subjects, components = solve_decomposed(subjects, rooms, seed=0)
+    # Labs only share the lab and lectures only the hall
+    assert sorted(sorted(all_subjects[v]['subject_id'][:3] for v in c) for c in components) == [['LAB'] * 4,
+                                                                                                ['LEC'] * 4]
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    evaluator.load_solution(solution)
+    assert not any(evaluator.breakdown()[kind] for kind in HARD_CONSTRAINTS)
+
+def test_shared_room_without_shared_slots_is_independent():
+    rooms = [{'room_id': 'R1', 'capacity': 100, 'room_type': 'lecture_hall'}]
+    all_subjects = [{'subject_id': name, 'students': 50, 'professor': name, 'required_room_type': '',
+                     'day_off': None, 'time_preference': preference, 'kind': 'lecture', 'cohort': None}
+                    for name, preference in (('AM1', 'morning'), ('PM1', 'afternoon'), ('AM2', 'before_11'))]
+    grid = TimeGrid(generate_time_slots(), rooms)
+    with contextlib.redirect_stdout(io.StringIO()):
+        components = conflict_components(all_subjects, grid)
+    assert sorted(sorted(c) for c in components) == [[0, 2], [1]]
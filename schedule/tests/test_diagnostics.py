@@ -0,0 +1,74 @@
+import contextlib
+import io
+import itertools
+import random
+
+from ali_test import split_all_subjects
+from diagnostics import (_cell_blocks, explain_infeasibility, hall_violator, precheck, quickxplain,
+                         supply_violator)
+from time_grid import TimeGrid
+
+SLOTS = ['Monday_08:00-09:30', 'Monday_09:45-11:15', 'Tuesday_08:00-09:30', 'Tuesday_09:45-11:15']
+
+def subject(subject_id, professor, students=30, **extra):
+    return dict({'subject_id': subject_id, 'subject_name': subject_id, 'students': students,
+                 'professor': professor, 'required_room_type': '', 'day_off': None,
+                 'time_preference': 'any'}, **extra)
+
+def build(subjects, rooms):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return split_all_subjects(subjects, rooms, SLOTS), TimeGrid(SLOTS, rooms)
+
+def test_hall_violator():
+    assert hall_violator([[1, 2], [2], [1, 3]]) is None
+    assert sorted(hall_violator([[1], [1], [1, 2, 3]])) in ([0, 1], [0, 1, 2])
+
+def test_supply_violator_matches_cell_matching():
+    rng = random.Random(0)
+    for _ in range(300):
+        num_slots, num_rooms = rng.randint(1, 5), rng.randint(1, 4)
+        slot_sets = [frozenset(rng.sample(range(num_slots), rng.randint(1, num_slots))) for _ in range(2)]
+        room_sets = [frozenset(rng.sample(range(num_rooms), rng.randint(1, num_rooms))) for _ in range(2)]
+        classes = {key: rng.randint(1, 4) for key in itertools.product(range(2), range(2)) if rng.random() < 0.7}
+        keys = list(classes)
+        supply, inside = _cell_blocks(slot_sets, room_sets, num_slots, num_rooms)
+        violator = supply_violator([classes[key] for key in keys], supply, [inside.get(key, []) for key in keys])
+        domains = [[(slot, room) for slot in slot_sets[a] for room in room_sets[b]]
+                   for (a, b) in keys for _ in range(classes[(a, b)])]
+        assert (violator is None) == (hall_violator(domains) is None)
+        if violator:
+            demand = sum(classes[keys[i]] for i in violator)
+            cells = set(cell for i in violator for cell in itertools.product(slot_sets[keys[i][0]],
+                                                                             room_sets[keys[i][1]]))
+            assert demand > len(cells)
+
+def test_precheck_finds_overloads():
+    rooms = [{'room_id': 'R1', 'capacity': 50, 'room_type': 'classroom'}]
+    feasible, grid = build([subject(f'S{i}', f'P{i}') for i in range(4)], rooms)
+    assert not [issue for issue in precheck(feasible, grid) if issue['severity'] == 'error']
+
+    crowded, grid = build([subject(f'S{i}', f'P{i}') for i in range(5)], rooms)
+    assert 'room_supply' in [issue['kind'] for issue in precheck(crowded, grid)]
+
+    overloaded, grid = build([subject(f'S{i}', 'Busy') for i in range(3)], rooms * 3)
+    overloaded[0]['day_off'] = overloaded[1]['day_off'] = overloaded[2]['day_off'] = 'Monday'
+    issues = precheck(overloaded, grid)
+    assert [issue['kind'] for issue in issues if issue['severity'] == 'error'] == ['professor_overload']
+
+def test_quickxplain_returns_minimal_core():
+    conflict = {3, 7}
+    core = quickxplain(list(range(10)), lambda items: not conflict <= set(items))
+    assert sorted(core) == [3, 7]
+    assert quickxplain(list(range(10)), lambda items: True) is None
+
+def test_explain_infeasibility_core_is_proven():
+    rooms = [{'room_id': 'R1', 'capacity': 60, 'room_type': 'classroom'},
+             {'room_id': 'R2', 'capacity': 40, 'room_type': 'classroom'}]
+    # Five subjects need the only 60-seat room, which has four slots; the small ones fit anywhere
+    subjects = [subject(f'L{i}', f'P{i}', students=55) for i in range(5)]
+    subjects += [subject(f'S{i}', f'Q{i}', students=20) for i in range(2)]
+    all_subjects, grid = build(subjects, rooms)
+    core = explain_infeasibility(all_subjects, grid, check_time_limit=1.0, time_limit=30.0)
+    assert sorted(core) == [f'L{i}' for i in range(5)]
+    conflict = [s for s in all_subjects if s['subject_id'] in core]
+    assert [issue for issue in precheck(conflict, grid) if issue['severity'] == 'error']
@@ -0,0 +1,46 @@
+import random
+
+from evaluator import HARD_CONSTRAINTS, ScheduleEvaluator
+
+def random_assignment(all_subjects, grid, rng):
+    return [(rng.randrange(len(grid)), rng.randrange(len(grid.rooms))) for _ in all_subjects]
+
+def test_delta_matches_full_evaluation(make_instance):
+    _, _, grid, all_subjects = make_instance('many_splits', 40, seed=3)
+    rng = random.Random(0)
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    evaluator.reset(random_assignment(all_subjects, grid, rng))
+    check = ScheduleEvaluator(all_subjects, grid)
+    for _ in range(500):
+        v = rng.randrange(len(all_subjects))
+        cell = (rng.randrange(len(grid)), rng.randrange(len(grid.rooms)))
+        change = evaluator.delta(v, cell)
+        trial = list(evaluator.assignment)
+        trial[v] = cell
+        check.reset(trial)
+        assert change == check.total - evaluator.total
+        evaluator.move(v, cell, change)
+        assert evaluator.total == check.total
+
+def test_delta_places_unscheduled_subjects(instance):
+    _, _, grid, all_subjects = instance
+    rng = random.Random(1)
+    full = random_assignment(all_subjects, grid, rng)
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    evaluator.reset([None] * len(all_subjects))
+    assert evaluator.total == 0
+    for v, cell in enumerate(full):
+        evaluator.move(v, cell)
+    check = ScheduleEvaluator(all_subjects, grid)
+    check.reset(full)
+    assert evaluator.total == check.total
+
+def test_breakdown_and_violations_agree(instance):
+    _, _, grid, all_subjects = instance
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    evaluator.reset([(0, 0)] * len(all_subjects))
+    counts = evaluator.breakdown()
+    assert counts['room_clash'] > 0
+    hard = [record for record in evaluator.violations() if record['severity'] == 'hard']
+    assert {record['kind'] for record in hard} <= set(HARD_CONSTRAINTS)
+    assert any(record['kind'] == 'room_clash' for record in hard)
@@ -0,0 +1,39 @@
+import contextlib
+import io
+import random
+
+import pytest
+
+pytest.importorskip('numpy', reason="the vectorised model needs NumPy")
+
+from ali_test import get_subject_domain
+from evaluator import HARD_CONSTRAINTS, ScheduleEvaluator
+from feasibility import FeasibilityModel, score_solutions
+from generator import PROFILES
+
+@pytest.mark.parametrize('profile', sorted(PROFILES))
+@pytest.mark.parametrize('typed', [False, True])
+def test_domains_match_get_subject_domain(make_instance, profile, typed):
+    _, _, grid, all_subjects = make_instance(profile, 40, seed=4)
+    with contextlib.redirect_stdout(io.StringIO()) as vectorised_notes:
+        vectorised = FeasibilityModel(all_subjects, grid).domains(typed)
+    with contextlib.redirect_stdout(io.StringIO()) as notes:
+        expected = [get_subject_domain(subject, grid, typed) for subject in all_subjects]
+    assert [(list(slots), list(rooms)) for slots, rooms in vectorised] == \
+           [(list(slots), list(rooms)) for slots, rooms in expected]
+    assert sorted(vectorised_notes.getvalue().splitlines()) == sorted(notes.getvalue().splitlines())
+
+@pytest.mark.parametrize('profile', ['baseline', 'many_splits', 'strict'])
+def test_score_solutions_matches_the_evaluator(make_instance, profile):
+    _, _, grid, all_subjects = make_instance(profile, 30, seed=5)
+    rng = random.Random(0)
+    # Random schedules on a few slots and rooms, so every kind of violation shows up
+    solutions = [{f"{s['subject_id']}_slot": (rng.randrange(4), rng.randrange(len(grid.rooms))) for s in all_subjects}
+                 for _ in range(20)]
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    for solution, score in zip(solutions, score_solutions(solutions, all_subjects, grid)):
+        evaluator.reset([solution[f"{s['subject_id']}_slot"] for s in all_subjects])
+        counts = evaluator.breakdown()
+        assert score['counts'] == counts
+        assert score['penalty'] == evaluator.total
+        assert score['feasible'] == (not any(counts[kind] for kind in HARD_CONSTRAINTS))
@@ -0,0 +1,41 @@
+import contextlib
+import io
+
+import pytest
+
+pytest.importorskip('scipy.optimize', reason="the MILP back end needs SciPy")
+
+from evaluator import HARD_CONSTRAINTS, ScheduleEvaluator
+from milp import create_milp_scheduler
+from optimizer import optimize_schedule
+
+def solve(subjects, rooms, hint=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler, grid, all_subjects = create_milp_scheduler(subjects, rooms, time_limit=60, hint=hint)
+        solution = scheduler.getSolution()
+    return scheduler, solution, grid, all_subjects
+
+def test_objective_is_the_evaluator_penalty(make_instance):
+    subjects, rooms, _, _ = make_instance('baseline', 15, seed=3)
+    scheduler, solution, grid, all_subjects = solve(subjects, rooms)
+    assert scheduler.stats['status'] == 'optimal'
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    evaluator.load_solution(grid.decode_solution(solution))
+    assert not any(evaluator.breakdown()[kind] for kind in HARD_CONSTRAINTS)
+    assert scheduler.stats['objective'] == evaluator.total
+    # Optimal, so no annealed schedule can do better
+    with contextlib.redirect_stdout(io.StringIO()):
+        annealed, _ = optimize_schedule(all_subjects, grid, time_limit=2.0, seed=0)
+    evaluator.load_solution(grid.decode_solution(annealed))
+    assert evaluator.total >= scheduler.stats['objective']
+
+def test_hint_breaks_ties(make_instance):
+    subjects, rooms, _, _ = make_instance('baseline', 15, seed=3)
+    first, solution, grid, _ = solve(subjects, rooms)
+    # R101 and R102 are identical halls, so swapping them gives another optimal schedule
+    swap = {grid.room_index['R101']: grid.room_index['R102'], grid.room_index['R102']: grid.room_index['R101']}
+    swapped = {key: (slot, swap.get(room, room)) for key, (slot, room) in solution.items()}
+    assert swapped != solution
+    second, hinted, _, _ = solve(subjects, rooms, hint=swapped)
+    assert second.stats['objective'] == first.stats['objective']
+    assert hinted == swapped
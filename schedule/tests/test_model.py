@@ -0,0 +1,73 @@
+import contextlib
+import io
+import itertools
+
+from constraint import Domain, Problem
+
+from ali_test import RoomOccupancyConstraint, create_basic_scheduler
+
+def occupancy_problem(num_subjects, times, rooms):
+    problem = Problem()
+    variables = []
+    for v in range(num_subjects):
+        problem.addVariable(f"S{v}_time", list(times))
+        problem.addVariable(f"S{v}_room", list(rooms))
+        variables += [f"S{v}_time", f"S{v}_room"]
+    problem.addConstraint(RoomOccupancyConstraint(), variables)
+    return problem
+
+def test_room_occupancy_matches_pairwise_lambdas():
+    solutions = occupancy_problem(4, range(2), range(3)).getSolutions()
+    cells = [tuple((s[f"S{v}_time"], s[f"S{v}_room"]) for v in range(4)) for s in solutions]
+    expected = [c for c in itertools.product(itertools.product(range(2), range(3)), repeat=4) if len(set(c)) == 4]
+    assert sorted(cells) == sorted(expected)
+
+def test_room_occupancy_tracks_unassignment():
+    constraint = RoomOccupancyConstraint()
+    variables = ['A_time', 'A_room', 'B_time', 'B_room']
+    domains = {variable: Domain([0, 1]) for variable in variables}
+    assert not constraint(variables, domains, {'A_time': 0, 'A_room': 1, 'B_time': 0, 'B_room': 1})
+    # Backtracking B off the clashing cell clears it
+    assert constraint(variables, domains, {'A_time': 0, 'A_room': 1, 'B_time': 0})
+    assert constraint(variables, domains, {'A_time': 0, 'A_room': 1, 'B_time': 0}, forwardcheck=True)
+    assert list(domains['B_room']) == [0]
+    assert constraint(variables, domains, {'A_time': 1, 'A_room': 1, 'B_time': 0, 'B_room': 1})
+
+def test_time_room_model_has_no_double_booking(make_instance):
+    subjects, rooms, _, _ = make_instance('baseline', 15, seed=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        problem, grid, all_subjects = create_basic_scheduler(subjects, rooms, seed=0)
+    solution = problem.getSolution()
+    cells = [(solution[f"{s['subject_id']}_time"], solution[f"{s['subject_id']}_room"]) for s in all_subjects]
+    assert len(set(cells)) == len(cells)
+
+def test_combined_domains_are_prefiltered(make_instance):
+    subjects, rooms, _, _ = make_instance('strict', 20, seed=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        problem, grid, all_subjects = create_basic_scheduler(subjects, rooms, combined=True)
+    domains = problem._variables
+    for subject in all_subjects:
+        cells = set(domains[f"{subject['subject_id']}_slot"])
+        required = grid.type_code(subject['required_room_type']) if subject.get('required_room_type') else -1
+        day_off = grid.day_index(subject['day_off']) if subject.get('day_off') else -1
+        for slot, room in cells:
+            assert grid.room_capacity[room] >= subject['students']
+            assert required < 0 or grid.room_type[room] == required
+            assert grid.slot_day[slot] != day_off
+            assert grid.matches_preference(slot, subject['time_preference'])
+        # Every (slot, room) pair of the two separate domains, nothing dropped
+        slots = set(slot for slot, _ in cells)
+        rooms_used = set(room for _, room in cells)
+        assert cells == set(itertools.product(slots, rooms_used))
+
+def test_combined_model_solution_decodes(make_instance):
+    subjects, rooms, _, _ = make_instance('baseline', 15, seed=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        problem, grid, all_subjects = create_basic_scheduler(subjects, rooms, combined=True, seed=0)
+    solution = problem.getSolution()
+    decoded = grid.decode_solution(solution)
+    for subject in all_subjects:
+        slot, room = solution[f"{subject['subject_id']}_slot"]
+        assert decoded[f"{subject['subject_id']}_time"] == grid.time_slots[slot]
+        assert decoded[f"{subject['subject_id']}_room"] == grid.room_ids[room]
+    assert len(set(solution.values())) == len(all_subjects)
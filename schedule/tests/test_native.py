@@ -0,0 +1,57 @@
+import contextlib
+import io
+
+from ali_test import create_basic_scheduler, generate_time_slots, split_all_subjects
+from solver import NativeScheduler
+
+ROOMS = [{'room_id': 'R1', 'capacity': 100, 'room_type': 'lecture_hall'},
+         {'room_id': 'R2', 'capacity': 100, 'room_type': 'lecture_hall'}]
+
+def subject(subject_id, professor, **fields):
+    return dict({'subject_id': subject_id, 'subject_name': subject_id, 'students': 50, 'professor': professor,
+                 'required_room_type': '', 'day_off': None, 'time_preference': 'any'}, **fields)
+
+def tiny_instance(subjects, days=('Sun',)):
+    from time_grid import TimeGrid
+    grid = TimeGrid(generate_time_slots(days=days), ROOMS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_subjects = split_all_subjects(subjects, ROOMS, grid.time_slots)
+    return all_subjects, grid
+
+def test_enumerates_the_same_solutions_as_python_constraint():
+    subjects = [subject('A', 'p1'), subject('B', 'p1'), subject('C', 'p2', time_preference='morning')]
+    all_subjects, grid = tiny_instance(subjects)
+    native = list(NativeScheduler(all_subjects, grid, seed=0).getSolutionIter())
+    with contextlib.redirect_stdout(io.StringIO()):
+        problem, reference_grid, _ = create_basic_scheduler(subjects, ROOMS, combined=True,
+                                                            time_slots=grid.time_slots)
+    expected = problem.getSolutions()
+    canonical = lambda solutions: sorted(tuple(sorted(s.items())) for s in solutions)
+    assert len(native) == len(expected) > 0
+    assert canonical(native) == canonical(expected)
+
+def test_proves_infeasibility():
+    # One professor, five subjects, four slots
+    all_subjects, grid = tiny_instance([subject(f"S{i}", 'p1') for i in range(5)])
+    scheduler = NativeScheduler(all_subjects, grid, seed=0)
+    assert scheduler.getSolution() is None
+    assert not scheduler.stats['stopped']
+
+def test_fixed_and_preferred_cells(make_instance):
+    _, _, grid, all_subjects = make_instance('baseline', 20, seed=1)
+    first = NativeScheduler(all_subjects, grid, seed=0).getSolution()
+    pinned = all_subjects[0]['subject_id']
+    other = next(cell for cell in ((slot, room) for slot in range(len(grid)) for room in range(len(grid.rooms)))
+                 if cell not in first.values() and grid.room_capacity[cell[1]] >= all_subjects[0]['students'])
+    fixed = NativeScheduler(all_subjects, grid, seed=1, fixed={pinned: other}).getSolution()
+    assert fixed[f"{pinned}_slot"] == other
+    preferred = {s['subject_id']: first[f"{s['subject_id']}_slot"] for s in all_subjects}
+    again = NativeScheduler(all_subjects, grid, seed=2, preferred=preferred).getSolution()
+    assert again == first
+
+def test_limits_mark_the_search_stopped(make_instance):
+    _, _, grid, all_subjects = make_instance('strict', 60, seed=1)
+    for limits in ({'max_backtracks': 0}, {'should_stop': lambda: True}):
+        scheduler = NativeScheduler(all_subjects, grid, seed=0, **limits)
+        assert scheduler.getSolution() is None
+        assert scheduler.stats['stopped']
@@ -0,0 +1,35 @@
+import threading
+import time
+
+from ali_test import generate_time_slots
+from portfolio import _run_worker, solve_portfolio
+
+ROOMS = [{'room_id': 'R1', 'capacity': 100, 'room_type': 'lecture_hall'},
+         {'room_id': 'R2', 'capacity': 100, 'room_type': 'lecture_hall'}]
+
+def one_professor(count):
+    return [{'subject_id': f"S{i}", 'subject_name': f"S{i}", 'students': 50, 'professor': 'p1',
+             'required_room_type': '', 'day_off': None, 'time_preference': 'any'} for i in range(count)]
+
+def test_native_worker_returns_once_infeasibility_is_proven():
+    # Five subjects of one professor, four slots
+    start = time.perf_counter()
+    config, solution, _, _, proven = _run_worker({'solver': 'native', 'seed': 0}, one_professor(5), ROOMS,
+                                                 generate_time_slots(days=['Sun']), 30, threading.Event())
+    assert solution is None and proven
+    assert time.perf_counter() - start < 5
+
+def test_portfolio_reports_proven_infeasibility():
+    configs = [{'solver': 'native', 'seed': 0}, {'solver': 'anneal', 'seed': 1}]
+    start = time.perf_counter()
+    solution, _, _, info = solve_portfolio(one_professor(5), ROOMS, workers=2, time_limit=30, configs=configs,
+                                           time_slots=generate_time_slots(days=['Sun']))
+    assert time.perf_counter() - start < 15
+    assert info['infeasible']
+    assert solution is None or not info['feasible']
+
+def test_portfolio_first_feasible(make_instance):
+    subjects, rooms, _, _ = make_instance('baseline', 20, seed=1)
+    solution, grid, all_subjects, info = solve_portfolio(subjects, rooms, workers=2, time_limit=30)
+    assert info['feasible'] and not info['infeasible']
+    assert set(solution) == set(f"{s['subject_id']}_{part}" for s in all_subjects for part in ('time', 'room'))
@@ -0,0 +1,41 @@
+import contextlib
+import io
+import json
+
+from ali_test import create_basic_scheduler
+from profiling import SolverProfile
+from solver import NativeScheduler
+
+def test_profile_counts_constraint_model_checks(make_instance, tmp_path):
+    subjects, rooms, _, _ = make_instance('baseline', 15, seed=1)
+    snapshots = []
+    profile = SolverProfile(hook=snapshots.append, hook_every=5)
+    with contextlib.redirect_stdout(io.StringIO()):
+        problem, grid, all_subjects = create_basic_scheduler(subjects, rooms, combined=True, profile=profile,
+                                                             seed=0)
+        plain, _, _ = create_basic_scheduler(subjects, rooms, combined=True, seed=0)
+    assert sum(stats['constraints'] for stats in profile.kinds.values()) == len(problem._constraints)
+    assert profile.kinds['room_double_booking']['constraints'] == 1
+    solution = profile.time_solve(problem.getSolution)
+    # Instrumentation must not change the search
+    assert solution == plain.getSolution()
+    assert profile.solve_time > 0 and profile.build_time > 0
+    assert profile.max_depth == len(all_subjects) and profile.nodes >= len(all_subjects)
+    assert profile.kinds['professor_conflict']['checks'] > 0
+    assert snapshots and snapshots[-1]['nodes'] == 5 * len(snapshots)
+
+    data = json.loads(profile.to_json(str(tmp_path / 'profile.json')))
+    assert data == json.load(open(tmp_path / 'profile.json'))
+    assert data['nodes'] == profile.nodes and set(data['depth_domains']) <= set(map(str, range(1, len(all_subjects) + 1)))
+
+def test_profile_records_native_search(make_instance):
+    _, _, grid, all_subjects = make_instance('baseline', 15, seed=1)
+    profile = SolverProfile()
+    scheduler = NativeScheduler(all_subjects, grid, seed=0, profile=profile)
+    solution = scheduler.getSolution()
+    assert solution == NativeScheduler(all_subjects, grid, seed=0).getSolution()
+    assert profile.nodes == scheduler.stats['nodes'] and profile.backtracks == scheduler.stats['backtracks']
+    assert profile.kinds['professor_conflict']['constraints'] > 0
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        profile.print_summary()
+    assert 'PROFILE:' in output.getvalue()
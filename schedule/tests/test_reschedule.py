@@ -0,0 +1,61 @@
+import contextlib
+import io
+
+from evaluator import HARD_CONSTRAINTS, ScheduleEvaluator
+from reschedule import apply_changes, reschedule
+from solver import NativeScheduler
+
+def solve(all_subjects, grid):
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution = NativeScheduler(all_subjects, grid, seed=0).getSolution()
+    return grid.decode_solution(solution)
+
+def hard_violations(solution, all_subjects, grid):
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    evaluator.load_solution(solution)
+    counts = evaluator.breakdown()
+    return sum(counts[kind] for kind in HARD_CONSTRAINTS)
+
+def test_apply_changes_leaves_inputs_alone():
+    subjects = [{'subject_id': 'A', 'students': 10}, {'subject_id': 'B', 'students': 20}]
+    rooms = [{'room_id': 'R1', 'capacity': 30}]
+    changes = {'subjects': {'update': [{'subject_id': 'A', 'students': 15}], 'remove': ['B']},
+               'rooms': {'add': [{'room_id': 'R2', 'capacity': 40}]}}
+    new_subjects, new_rooms, changed_subjects, changed_rooms = apply_changes(subjects, rooms, changes)
+    assert new_subjects == [{'subject_id': 'A', 'students': 15}]
+    assert [room['room_id'] for room in new_rooms] == ['R1', 'R2']
+    assert changed_subjects == {'A', 'B'} and changed_rooms == {'R2'}
+    assert subjects[0]['students'] == 10 and len(subjects) == 2
+
+def test_unchanged_instance_keeps_every_cell(instance):
+    subjects, rooms, grid, all_subjects = instance
+    previous = solve(all_subjects, grid)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution, _, _, info = reschedule(previous, subjects, rooms, seed=0)
+    assert solution == previous
+    assert info['moved'] == [] and info['round'] == 0
+
+def test_broken_split_group_is_repaired_without_full_resolve(make_instance):
+    subjects, rooms, grid, all_subjects = make_instance('many_splits', 60, seed=2)
+    previous = solve(all_subjects, grid)
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    evaluator.load_solution(previous)
+    # Move one split group to another day, breaking nothing NativeScheduler could not keep pinned
+    v = next(v for v, subject in enumerate(all_subjects) if subject.get('group_number') == 2)
+    slot, room = evaluator.assignment[v]
+    for other in range(len(grid)):
+        if grid.slot_day[other] != grid.slot_day[slot] and not evaluator.occupants((other, room)):
+            evaluator.move(v, (other, room))
+            if hard_violations(evaluator.solution(), all_subjects, grid) == 0:
+                break
+            evaluator.move(v, (slot, room))
+    broken = evaluator.solution()
+    assert evaluator.breakdown()['split_same_day'] > 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution, grid, all_subjects, info = reschedule(broken, subjects, rooms, seed=0)
+    assert solution is not None
+    assert info['round'] < 2 and info['freed'] < len(all_subjects)
+    evaluator.load_solution(solution)
+    assert evaluator.breakdown()['split_same_day'] == 0
+    assert hard_violations(solution, all_subjects, grid) == 0
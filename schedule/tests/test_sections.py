@@ -0,0 +1,70 @@
+import contextlib
+import io
+import json
+
+import pytest
+
+from ali_test import generate_time_slots, lecture_cohorts, split_all_subjects, split_sections, subject_cohort
+from loader import load_instance
+
+def subject(subject_id='CS301', students=60, **fields):
+    return dict({'subject_id': subject_id, 'subject_name': subject_id, 'students': students, 'professor': 'Dr. A',
+                 'required_room_type': '', 'day_off': None, 'time_preference': 'any'}, **fields)
+
+def test_cohort_comes_from_the_field_or_the_course_code():
+    assert subject_cohort(subject('CS401')) == '4'
+    assert subject_cohort(subject('math 205')) == '2'
+    assert subject_cohort(subject('CS401', cohort=' 1 ')) == '1'
+    assert subject_cohort(subject('CS40')) is None and subject_cohort(subject('SEMINAR')) is None
+
+@pytest.mark.parametrize('students,count', [(5, 4), (60, 4), (61, 4), (3, 3), (100, 7)])
+def test_sections_spread_students_evenly(students, count):
+    sizes = [section['students'] for section in split_sections(subject(students=students, sections=count), {})]
+    assert len(sizes) == count and sum(sizes) == students
+    assert max(sizes) - min(sizes) <= 1 and min(sizes) > 0
+    assert split_sections(subject(sections=0), {}) == []
+
+def test_sections_go_to_the_least_loaded_assistant():
+    assistants = [{'name': 'Eng. B', 'priority': 1, 'day_off': 'Sun'}, {'name': 'Eng. A', 'priority': 0}]
+    load = {'eng. a': 2}
+    sections = split_sections(subject(sections=3, teaching_assistants=assistants), load)
+    # A already has two sections elsewhere, so B takes the first two and A (higher priority) wins the tie
+    assert [s['professor'] for s in sections] == ['Eng. B', 'Eng. B', 'Eng. A']
+    assert [s['day_off'] for s in sections] == ['Sun', 'Sun', None]
+    assert load == {'eng. a': 3, 'eng. b': 2}
+    assert all(s['kind'] == 'section' and s['cohort'] == '3' and s['required_room_type'] == 'lab' for s in sections)
+    untaught = split_sections(subject(sections=1), {})
+    assert untaught[0]['professor'] == 'TA CS301'
+
+def test_split_subjects_carry_cohorts_and_sections():
+    rooms = [{'room_id': 'H1', 'capacity': 100, 'room_type': 'lecture_hall'},
+             {'room_id': 'L1', 'capacity': 30, 'room_type': 'lab'}]
+    subjects = [subject('CS301', sections=2, teaching_assistants=['Eng. A']), subject('CS302', professor='Dr. B'),
+                subject('CS101', professor='Dr. C')]
+    with contextlib.redirect_stdout(io.StringIO()):
+        all_subjects = split_all_subjects(subjects, rooms, generate_time_slots())
+    ids = [s['subject_id'] for s in all_subjects]
+    assert ids == ['CS301', 'CS301_S1', 'CS301_S2', 'CS302', 'CS101']
+    assert all_subjects[0]['required_room_type'] == 'lecture_hall' and 'sections' not in all_subjects[0]
+    # Sections share the cohort but are not lectures, so they do not clash with the cohort's lectures
+    assert lecture_cohorts(all_subjects) == {'3': [0, 3], '1': [4]}
+
+def test_loader_rejects_more_sections_than_students_and_resolves_assistants(tmp_path):
+    rooms_path = tmp_path / 'rooms.json'
+    rooms_path.write_text(json.dumps([{'room_id': 'L1', 'capacity': 30, 'room_type': 'lab'}]))
+    subjects_path = tmp_path / 'subjects.json'
+    subjects_path.write_text(json.dumps([dict(subject(students=5), sections=6)]))
+    with pytest.raises(ValueError, match=r"subjects.json:1: sections \(6\) must not exceed students \(5\)"):
+        load_instance(str(subjects_path), str(rooms_path))
+
+    subjects_path.write_text(json.dumps([dict(subject(), sections=2, teaching_assistants='eng. b; eng. a')]))
+    assistants_path = tmp_path / 'tas.json'
+    assistants_path.write_text(json.dumps([{'name': 'Eng. A', 'day_off': 'thu', 'priority': '0'},
+                                           {'name': 'eng. b', 'priority': '3'}, {'name': 'Eng. C'}]))
+    subjects, _ = load_instance(str(subjects_path), str(rooms_path), str(assistants_path))
+    # The file's priority outranks list order
+    assert subjects[0]['teaching_assistants'] == [
+        {'name': 'Eng. B', 'day_off': None, 'time_preference': 'any', 'priority': 3},
+        {'name': 'Eng. A', 'day_off': 'Thu', 'time_preference': 'any', 'priority': 0}]
+    sections = split_sections(subjects[0], {})
+    assert [(s['professor'], s['day_off']) for s in sections] == [('Eng. A', 'Thu'), ('Eng. B', None)]
@@ -0,0 +1,122 @@
+import asyncio
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from server import JobServer
+
+@pytest.fixture
+def job_server():
+    server = JobServer(workers=1, max_queue=1, time_limit=30.0)
+    started = threading.Event()
+    state = {}
+
+    def ready(address):
+        state['address'] = address
+        started.set()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        state['loop'] = loop
+        state['task'] = loop.create_task(server.serve(port=0, ready=ready))
+        try:
+            loop.run_until_complete(state['task'])
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(30)
+    yield server, state['address']
+    state['loop'].call_soon_threadsafe(state['task'].cancel)
+    thread.join(30)
+
+def request(address, method, path, payload=None):
+    connection = http.client.HTTPConnection(*address, timeout=60)
+    body = None if payload is None else json.dumps(payload)
+    connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    data = json.loads(response.read() or b'null')
+    connection.close()
+    return response.status, data
+
+def wait_for(address, job_id, states, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        _, job = request(address, 'GET', f'/jobs/{job_id}')
+        if job['state'] in states:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} never reached {states}")
+
+@pytest.fixture
+def body(make_instance):
+    # Annealing keeps going until its time limit while the penalty stays above zero
+    subjects, rooms, _, _ = make_instance('strict', 60, seed=1)
+    return {'subjects': subjects, 'rooms': rooms, 'solver': 'anneal', 'time_limit': 30}
+
+def test_identical_requests_share_a_job_until_every_client_withdraws(job_server, body):
+    _, address = job_server
+    status, first = request(address, 'POST', '/jobs', body)
+    assert status == 202 and first['duplicate'] is False
+    status, second = request(address, 'POST', '/jobs', body)
+    assert status == 202 and second['duplicate'] is True and second['id'] == first['id']
+    assert second['clients'] == 2
+    _, other = request(address, 'POST', '/jobs', dict(body, seed=1))
+    assert other['id'] != first['id']
+    assert request(address, 'DELETE', f"/jobs/{other['id']}")[1]['state'] == 'cancelled'
+
+    # One of two clients leaving keeps the job going
+    status, job = request(address, 'DELETE', f"/jobs/{first['id']}")
+    assert status == 200 and job['clients'] == 1 and job['state'] in ('queued', 'running')
+    wait_for(address, first['id'], ('running',))
+    status, job = request(address, 'DELETE', f"/jobs/{first['id']}")
+    assert job['clients'] == 0
+    # An identical request after the last client left starts over instead of joining the cancelled job
+    status, fresh = request(address, 'POST', '/jobs', body)
+    assert status == 202 and fresh['duplicate'] is False and fresh['id'] != first['id']
+    assert wait_for(address, first['id'], ('cancelled',), timeout=10)['state'] == 'cancelled'
+
+def test_withdrawing_a_queued_job_cancels_it_at_once(job_server, body):
+    _, address = job_server
+    _, running = request(address, 'POST', '/jobs', body)
+    wait_for(address, running['id'], ('running',))
+    _, queued = request(address, 'POST', '/jobs', dict(body, seed=1))
+    status, job = request(address, 'DELETE', f"/jobs/{queued['id']}")
+    assert status == 200 and job['state'] == 'cancelled'
+    assert request(address, 'GET', '/jobs')[1]['jobs'][1]['state'] == 'cancelled'
+    request(address, 'DELETE', f"/jobs/{running['id']}")
+
+def test_full_queue_is_refused(job_server, body):
+    _, address = job_server
+    _, running = request(address, 'POST', '/jobs', body)
+    wait_for(address, running['id'], ('running',))
+    assert request(address, 'POST', '/jobs', dict(body, seed=1))[0] == 202
+    status, error = request(address, 'POST', '/jobs', dict(body, seed=2))
+    assert status == 503 and 'queue is full' in error['error']
+    assert request(address, 'GET', '/health')[1] == {'workers': 1, 'queued': 1, 'running': 1}
+    assert request(address, 'POST', '/jobs', dict(body, solver='simplex'))[0] == 400
+    assert request(address, 'GET', '/jobs/999')[0] == 404
+    request(address, 'DELETE', f"/jobs/{running['id']}")
+
+def test_events_stream_progress_until_the_job_ends(job_server, body):
+    _, address = job_server
+    _, job = request(address, 'POST', '/jobs', dict(body, time_limit=2))
+    connection = http.client.HTTPConnection(*address, timeout=60)
+    connection.request('GET', f"/jobs/{job['id']}/events")
+    response = connection.getresponse()
+    assert response.status == 200 and response.getheader('Content-Type') == 'application/x-ndjson'
+    events = [json.loads(line) for line in response.read().splitlines()]
+    connection.close()
+    assert events[0]['event'] == 'state' and events[0]['id'] == job['id']
+    progress = [event for event in events if event['event'] == 'progress']
+    assert progress and all('penalty' in event for event in progress)
+    finished = events[-1]
+    assert finished['event'] == 'finished' and finished['state'] == 'done'
+    assert finished['result']['found'] and finished['progress']['best_penalty'] == min(e['penalty'] for e in progress)
+    assert finished['result']['penalty'] <= finished['progress']['best_penalty']
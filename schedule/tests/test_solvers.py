@@ -0,0 +1,61 @@
+import contextlib
+import io
+
+import pytest
+
+from ali_test import create_basic_scheduler
+from evaluator import HARD_CONSTRAINTS, ScheduleEvaluator
+
+def solve_constraint(subjects, rooms):
+    problem, grid, all_subjects = create_basic_scheduler(subjects, rooms, combined=True, seed=0)
+    return grid.decode_solution(problem.getSolution()), grid, all_subjects
+
+def solve_two_phase(subjects, rooms):
+    from two_phase import create_two_phase_scheduler
+    scheduler, grid, all_subjects = create_two_phase_scheduler(subjects, rooms, seed=0)
+    return grid.decode_solution(scheduler.getSolution()), grid, all_subjects
+
+def solve_milp(subjects, rooms):
+    pytest.importorskip('scipy.optimize', reason="the MILP back end needs SciPy")
+    from milp import create_milp_scheduler
+    scheduler, grid, all_subjects = create_milp_scheduler(subjects, rooms, time_limit=30)
+    return grid.decode_solution(scheduler.getSolution()), grid, all_subjects
+
+def solve_native(subjects, rooms):
+    from solver import create_native_scheduler
+    scheduler, grid, all_subjects = create_native_scheduler(subjects, rooms, seed=0, time_limit=30)
+    return grid.decode_solution(scheduler.getSolution()), grid, all_subjects
+
+def solve_anneal(subjects, rooms):
+    from ali_test import generate_time_slots, split_all_subjects
+    from optimizer import optimize_schedule
+    from time_grid import TimeGrid
+    grid = TimeGrid(generate_time_slots(), rooms)
+    all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+    solution, _ = optimize_schedule(all_subjects, grid, time_limit=5.0, seed=0)
+    return grid.decode_solution(solution), grid, all_subjects
+
+def solve_decompose(subjects, rooms):
+    from decompose import solve_decomposed
+    solution, grid, all_subjects, _ = solve_decomposed(subjects, rooms, seed=0, time_limit=30)
+    return solution, grid, all_subjects
+
+def solve_portfolio(subjects, rooms):
+    from portfolio import solve_portfolio
+    solution, grid, all_subjects, _ = solve_portfolio(subjects, rooms, workers=1, time_limit=30)
+    return solution, grid, all_subjects
+
+BACK_ENDS = [solve_constraint, solve_two_phase, solve_milp, solve_native, solve_anneal, solve_decompose,
+             solve_portfolio]
+
+@pytest.mark.parametrize('solve', BACK_ENDS, ids=lambda solve: solve.__name__[len('solve_'):])
+def test_back_end_meets_hard_constraints(solve, make_instance):
+    subjects, rooms, _, _ = make_instance('baseline', 25, seed=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        solution, grid, all_subjects = solve(subjects, rooms)
+    assert solution
+    evaluator = ScheduleEvaluator(all_subjects, grid)
+    evaluator.load_solution(solution)
+    assert all(f"{subject['subject_id']}_time" in solution for subject in all_subjects)
+    counts = evaluator.breakdown()
+    assert {kind: counts[kind] for kind in HARD_CONSTRAINTS if counts[kind]} == {}
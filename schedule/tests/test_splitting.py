@@ -0,0 +1,56 @@
+import contextlib
+import io
+import time
+
+from ali_test import split_all_subjects
+from splitting import SplitPlanner, compatible_capacities, group_sizes, plan_splits
+
+def room(room_id, capacity, room_type='lecture_hall'):
+    return {'room_id': room_id, 'capacity': capacity, 'room_type': room_type}
+
+def test_group_sizes_are_proportional_and_fit():
+    assert group_sizes(400, [350, 50]) == [350, 50]
+    sizes = group_sizes(400, [350, 120])
+    assert sum(sizes) == 400 and sizes[0] <= 350 and sizes[1] <= 120
+    assert sizes == [298, 102]
+
+def test_planner_docstring_examples():
+    rooms = [room('H', 350)] + [room(f'M{i}', 120) for i in range(3)] + [room(f'C{i}', 50, 'classroom')
+                                                                         for i in range(6)]
+    course = {'subject_id': 'BIG', 'students': 400}
+    assert plan_splits([course], rooms, 30) == {'BIG': [350, 50]}
+    busy = [{'subject_id': f'B{i}', 'students': 300} for i in range(25)]
+    assert plan_splits([course] + busy, rooms, 30)['BIG'] == [118, 117, 117, 48]
+
+def test_room_type_never_forces_a_split():
+    rooms = [room('HALL', 350), room('LAB1', 40, 'lab'), room('LAB2', 40, 'lab')]
+    lab = {'subject_id': 'L', 'students': 100, 'required_room_type': 'lab'}
+    small_lab = {'subject_id': 'S', 'students': 30, 'required_room_type': 'lab'}
+    assert compatible_capacities(lab, rooms) == [350, 40, 40]
+    assert compatible_capacities(small_lab, rooms) == [40, 40]
+    assert plan_splits([lab, small_lab], rooms, 30) == {'L': [100], 'S': [30]}
+
+def test_split_is_capped_by_periods_per_day():
+    rooms = [room('H', 100)] + [room(f'C{i}', 20, 'classroom') for i in range(10)]
+    planner = SplitPlanner(rooms, 30)
+    sizes = planner.plan({'subject_id': 'X', 'students': 150}, max_groups=2)
+    assert len(sizes) == 2 and sum(sizes) == 150
+
+def test_many_room_sizes_plan_quickly():
+    rooms = [room(f'R{capacity}', capacity) for capacity in range(40, 120, 2)]
+    subject = {'subject_id': 'HUGE', 'students': 1300}
+    start = time.perf_counter()
+    # Twelve groups are needed even in the largest rooms, more than fit in a day
+    assert SplitPlanner(rooms, 30).plan(subject, max_groups=4) == group_sizes(1300, [118] * 12)
+    sizes = SplitPlanner(rooms, 30).plan(subject)
+    assert time.perf_counter() - start < 5
+    assert len(sizes) == 12 and sum(sizes) == 1300
+
+def test_split_all_subjects_uses_the_plan():
+    rooms = [room('H', 350)] + [room(f'C{i}', 50, 'classroom') for i in range(6)]
+    subjects = [{'subject_id': 'BIG', 'subject_name': 'Big', 'students': 400, 'professor': 'Ada Lovelace',
+                 'required_room_type': '', 'day_off': None, 'time_preference': 'any'}]
+    with contextlib.redirect_stdout(io.StringIO()):
+        groups = split_all_subjects(subjects, rooms)
+    assert [group['students'] for group in groups] == [350, 50]
+    assert all(group['original_subject_id'] == 'BIG' and group['total_groups'] == 2 for group in groups)
@@ -0,0 +1,100 @@
+import contextlib
+import io
+import json
+
+import pytest
+
+from ali_test import generate_time_slots
+from loader import load_grid_config
+from solver import NativeScheduler
+from time_grid import DEFAULT_GRID_CONFIG, TimeGrid, build_time_slots
+
+ROOMS = [{'room_id': 'R1', 'capacity': 100, 'room_type': 'Lecture_Hall'},
+         {'room_id': 'R2', 'capacity': 30, 'room_type': 'lab'}]
+
+def test_default_week_indices():
+    grid = TimeGrid(generate_time_slots(), ROOMS)
+    assert len(grid) == 20 and grid.days == ['Sun', 'Mon', 'Tue', 'Wed', 'Thu']
+    first = grid.slot_index['Sun_9:00-10:30']
+    second = grid.slot_index['Sun_10:30-12:00']
+    assert grid.consecutive(first, second) and grid.consecutive(second, first)
+    assert not grid.consecutive(first, grid.slot_index['Mon_10:30-12:00'])
+    assert grid.slot_period[second] == 1 and grid.slot_duration[first] == 1.5
+    assert grid.room_capacity.tolist() == [100, 30]
+    assert grid.type_code('LAB') == grid.room_type[1] and grid.type_code('studio') == -1
+    assert grid.day_index('mon') == 1 and grid.day_index('Fri') == -1
+
+def test_shuffled_labels_keep_week_order_metadata():
+    labels = generate_time_slots()[::-1]
+    grid = TimeGrid(labels, ROOMS)
+    assert grid.days[0] == 'Sun'
+    assert grid.consecutive(grid.slot_index['Thu_12:00-13:30'], grid.slot_index['Thu_13:30-15:00'])
+    assert grid.slot_period[grid.slot_index['Thu_9:00-10:30']] == 0
+
+def test_allowed_slots_and_decoding():
+    grid = TimeGrid(generate_time_slots(), ROOMS)
+    allowed = grid.allowed_slots(day_off='sun', preference='morning')
+    assert allowed == [i for i, label in enumerate(grid.time_slots)
+                       if not label.startswith('Sun') and grid.slot_start[i] < 12]
+    assert grid.allowed_slots(day_off='Sun', preference='morning') is allowed
+    assert grid.decode_solution({'A_slot': (allowed[0], 1), 'B_time': 0, 'B_room': 0, 'x': 1}) == {
+        'A_time': grid.time_slots[allowed[0]], 'A_room': 'R2', 'B_time': 'Sun_9:00-10:30', 'B_room': 'R1', 'x': 1}
+
+GRID_CONFIG = {'days': ['Sun', 'Thu'], 'start': '8:00', 'end': '16:00', 'period': 1.5,
+               'breaks': [{'start': '11:00', 'end': '11:30'}],
+               'sessions': [{'start': '11:30', 'periods': 2}],
+               'hours': {'Thu': {'end': '12:30', 'breaks': [], 'sessions': []}}}
+
+def test_default_config_is_the_old_week():
+    assert build_time_slots() == build_time_slots(DEFAULT_GRID_CONFIG) == generate_time_slots()
+
+def test_breaks_sessions_and_per_day_hours():
+    time_slots = build_time_slots(GRID_CONFIG)
+    assert time_slots == ['Sun_8:00-9:30', 'Sun_9:30-11:00', 'Sun_11:30-14:30', 'Sun_14:30-16:00',
+                          'Thu_8:00-9:30', 'Thu_9:30-11:00', 'Thu_11:00-12:30']
+    grid = TimeGrid(time_slots, ROOMS)
+    # The break separates periods, the session is one slot that still chains to the next
+    assert not grid.consecutive(grid.slot_index['Sun_9:30-11:00'], grid.slot_index['Sun_11:30-14:30'])
+    assert grid.consecutive(grid.slot_index['Sun_11:30-14:30'], grid.slot_index['Sun_14:30-16:00'])
+    assert grid.allowed_slots(duration=3) == [grid.slot_index['Sun_11:30-14:30']]
+
+    # A period overlapping a break resumes after it; a session that would run into a break or past
+    # the end of the day stays a single period
+    assert build_time_slots({'days': ['Mon'], 'breaks': [{'start': '10:00', 'end': '10:15'}],
+                             'sessions': [{'start': '13:15', 'periods': 2}]}) == [
+        'Mon_10:15-11:45', 'Mon_11:45-13:15', 'Mon_13:15-14:45']
+    assert build_time_slots({'days': ['Mon'], 'start': 9, 'end': 12, 'breaks': [{'start': '11:00', 'end': '11:30'}],
+                             'sessions': [{'start': '9:00', 'periods': 2}]}) == ['Mon_9:00-10:30']
+
+@pytest.mark.parametrize('config,message', [
+    ({'days': ['Sun', 'Fri', 'Funday']}, 'Unknown day'),
+    ({'hours': {'Sunday': {'end': '12:00'}}}, 'Unknown day'),
+    ({'hours': {'Mon': {'start': '15:00', 'end': '9:00'}}}, 'Invalid hours for Mon'),
+    ({'period': 0}, 'Invalid hours for Sun'),
+])
+def test_invalid_configs_raise(config, message):
+    with pytest.raises(ValueError, match=message):
+        build_time_slots(config)
+
+def test_load_grid_config(tmp_path):
+    path = tmp_path / 'grid.json'
+    path.write_text(json.dumps({'time_grid': GRID_CONFIG}))
+    assert load_grid_config(str(path)) == build_time_slots(GRID_CONFIG)
+    path.write_text(json.dumps({'days': ['Mon'], 'end': '12:00'}))
+    assert load_grid_config(str(path)) == ['Mon_9:00-10:30', 'Mon_10:30-12:00']
+    path.write_text(json.dumps({'days': ['Someday']}))
+    with pytest.raises(ValueError, match=r"grid.json.*Unknown day"):
+        load_grid_config(str(path))
+    with pytest.raises(ValueError, match='Unsupported time grid file type'):
+        load_grid_config(str(path.rename(tmp_path / 'grid.txt')))
+
+def test_long_sessions_get_a_long_slot():
+    grid = TimeGrid(build_time_slots(GRID_CONFIG), ROOMS)
+    subjects = [{'subject_id': 'LAB1', 'subject_name': 'Lab', 'students': 20, 'professor': 'A',
+                 'required_room_type': 'lab', 'day_off': None, 'time_preference': 'any', 'duration': 3},
+                {'subject_id': 'LEC1', 'subject_name': 'Lecture', 'students': 20, 'professor': 'A',
+                 'required_room_type': 'lab', 'day_off': None, 'time_preference': 'any'}]
+    with contextlib.redirect_stdout(io.StringIO()):
+        solutions = list(NativeScheduler(subjects, grid, seed=0).getSolutionIter())
+    assert solutions and all(grid.time_slots[s['LAB1_slot'][0]] == 'Sun_11:30-14:30' for s in solutions)
+    assert len(solutions) == len(grid) - 1
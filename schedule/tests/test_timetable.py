@@ -0,0 +1,68 @@
+import contextlib
+import io
+
+import pytest
+
+from ali_test import create_basic_scheduler
+from timetable import BookingError, create_timetable
+
+ROOMS = [{'room_id': 'BIG', 'capacity': 200, 'room_type': 'lecture_hall'},
+         {'room_id': 'MID', 'capacity': 80, 'room_type': 'lecture_hall'},
+         {'room_id': 'LAB', 'capacity': 40, 'room_type': 'lab'}]
+
+def subject(subject_id, students=50, professor='Ada Lovelace', **fields):
+    return dict({'subject_id': subject_id, 'subject_name': subject_id, 'students': students,
+                 'professor': professor, 'required_room_type': '', 'day_off': None, 'time_preference': 'any'},
+                **fields)
+
+def test_smallest_fitting_room_and_release():
+    timetable = create_timetable(ROOMS)
+    assert timetable.book(subject('A', 60), 'Sun_9:00-10:30') == ('Sun_9:00-10:30', 'MID')
+    assert timetable.free_rooms('Sun_9:00-10:30') == ['LAB', 'BIG']
+    assert timetable.free_rooms('Sun_9:00-10:30', min_capacity=50) == ['BIG']
+    assert timetable.book(subject('B', 60, 'Grace Hopper'), 'Sun_9:00-10:30') == ('Sun_9:00-10:30', 'BIG')
+    with pytest.raises(BookingError, match='No free room fits C at Sun_9:00-10:30; try'):
+        timetable.book(subject('C', 60, 'Alan Turing'), 'Sun_9:00-10:30')
+    timetable.release('A')
+    assert timetable.book(subject('C', 60, 'Alan Turing'), 'Sun_9:00-10:30') == ('Sun_9:00-10:30', 'MID')
+
+def test_direct_bookings_are_validated():
+    timetable = create_timetable(ROOMS)
+    rejected = [
+        (subject('A', day_off='Sun'), 'Sun_9:00-10:30', 'MID', 'off on Sun'),
+        (subject('B', time_preference='afternoon'), 'Sun_9:00-10:30', 'MID', 'afternoon preference'),
+        (subject('C', 30, required_room_type='lab'), 'Sun_9:00-10:30', 'MID', 'needs a lab'),
+        (subject('D', duration=3.0), 'Sun_9:00-10:30', 'BIG', 'shorter than the 3h'),
+        (subject('E', 100), 'Sun_9:00-10:30', 'MID', 'has 80 seats'),
+    ]
+    for record, time_slot, room_id, message in rejected:
+        with pytest.raises(BookingError, match=message):
+            timetable.book(record, time_slot, room_id)
+    assert timetable.bookings == {}
+    timetable.book(subject('F'), 'Sun_9:00-10:30', 'BIG')
+    with pytest.raises(BookingError, match='already teaches'):
+        timetable.book(subject('G'), 'Sun_9:00-10:30', 'MID')
+    with pytest.raises(BookingError, match='already booked'):
+        timetable.book(subject('H', professor='Grace Hopper'), 'Sun_9:00-10:30', 'BIG')
+
+def test_suggestions_respect_the_subject():
+    timetable = create_timetable(ROOMS)
+    record = subject('A', 30, day_off='Sun', time_preference='afternoon', required_room_type='lab')
+    options = timetable.suggest(record, 'Sun_12:00-13:30', limit=3)
+    assert options == [('Mon_12:00-13:30', 'LAB'), ('Mon_13:30-15:00', 'LAB'), ('Tue_12:00-13:30', 'LAB')]
+    assert timetable.book(record) == options[0]
+
+def test_split_subject_is_booked_back_to_back(capsys):
+    timetable = create_timetable(ROOMS)
+    booked = timetable.book_subject(subject('BIG', 300))
+    assert capsys.readouterr().out == ''
+    assert booked == {'BIG_G1': ('Sun_9:00-10:30', 'BIG'), 'BIG_G2': ('Sun_10:30-12:00', 'BIG')}
+
+def test_solver_schedules_load(make_instance):
+    subjects, rooms, _, _ = make_instance('baseline', 15, seed=1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        problem, grid, all_subjects = create_basic_scheduler(subjects, rooms, combined=True, seed=0)
+    solution = grid.decode_solution(problem.getSolution())
+    timetable = create_timetable(rooms)
+    timetable.load_solution(solution, all_subjects)
+    assert timetable.solution() == solution
@@ -0,0 +1,54 @@
+import contextlib
+import io
+import itertools
+import random
+
+from constraint import Domain
+
+from two_phase import SlotCapacityConstraint, create_two_phase_scheduler, hopcroft_karp, match_rooms
+
+def brute_force_matching(adjacency, num_right):
+    """Size of a maximum matching, trying every subset of left vertices largest first"""
+    for size in range(len(adjacency), 0, -1):
+        for subset in itertools.combinations(range(len(adjacency)), size):
+            for rights in itertools.permutations(range(num_right), size):
+                if all(v in adjacency[u] for u, v in zip(subset, rights)):
+                    return size
+    return 0
+
+def test_hopcroft_karp_is_maximum():
+    rng = random.Random(0)
+    for _ in range(300):
+        num_left, num_right = rng.randint(1, 5), rng.randint(1, 5)
+        adjacency = [rng.sample(range(num_right), rng.randint(0, num_right)) for _ in range(num_left)]
+        match = hopcroft_karp(adjacency, num_right)
+        matched = [(u, v) for u, v in enumerate(match) if v is not None]
+        assert all(v in adjacency[u] for u, v in matched)
+        assert len(set(v for _, v in matched)) == len(matched)
+        assert len(matched) == brute_force_matching(adjacency, num_right)
+
+def test_match_rooms():
+    assert match_rooms([[0, 1], [0]], 2) == [1, 0]
+    assert match_rooms([[0], [0]], 2) is None
+
+def test_slot_capacity_forward_check():
+    # Two rooms; A and B only fit room 0, C fits either
+    constraint = SlotCapacityConstraint({'A': [0], 'B': [0], 'C': [0, 1]}, 2)
+    variables = ['A', 'B', 'C']
+    domains = {variable: Domain([0, 1]) for variable in variables}
+    assert constraint(variables, domains, {'A': 0, 'C': 0})
+    assert not constraint(variables, domains, {'A': 0, 'B': 0})
+    assert constraint(variables, domains, {'A': 0}, forwardcheck=True)
+    assert list(domains['B']) == [1] and list(domains['C']) == [0, 1]
+
+def test_iterator_closes_the_pool(make_instance):
+    subjects, rooms, _, _ = make_instance('baseline', 20, seed=2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler, grid, all_subjects = create_two_phase_scheduler(subjects, rooms, seed=0, workers=2)
+    iterator = scheduler.getSolutionIter()
+    solutions = list(itertools.islice(iterator, 3))
+    assert len(solutions) == 3 and scheduler._pool is not None
+    iterator.close()
+    assert scheduler._pool is None
+    cells = [cell for cell in solutions[0].values()]
+    assert len(cells) == len(all_subjects) == len(set(cells))
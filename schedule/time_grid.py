@@ -0,0 +1,220 @@
+from array import array
+
+WEEK_DAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+
+# The fixed week the scheduler always used: Sunday-Thursday, 9:00-15:00, 1.5h periods
+DEFAULT_GRID_CONFIG = {
+    'days': ['Sun', 'Mon', 'Tue', 'Wed', 'Thu'],
+    'start': '9:00',
+    'end': '15:00',
+    'period': 1.5,
+    'breaks': [],
+    'sessions': [],
+    'hours': {}
+}
+
+EPSILON = 1e-6
+
+def format_time(hour_float):
+    hours = int(hour_float)
+    minutes = int(round((hour_float - hours) * 60))
+    return f"{hours}:{minutes:02d}"
+
+def _hours(value):
+    return value if isinstance(value, (int, float)) else convert_time_to_float(str(value))
+
+def build_time_slots(config=None):
+    """
+    Time slot labels ("Sun_9:00-10:30") for a grid config, in week and time order.
+    config keys (all optional, see DEFAULT_GRID_CONFIG):
+      days      - working days
+      start/end - first start and last end time ("9:00" or 9.0)
+      period    - period length in hours
+      breaks    - [{"start", "end"}] times with no teaching; periods resume after a break
+      sessions  - [{"start", "periods"}] consecutive periods merged into one long slot
+                  (e.g. {"start": "12:00", "periods": 2} for a 3h lab block)
+      hours     - per-day overrides of any of the keys above, e.g. {"Thu": {"end": "12:00"}}
+    """
+    config = dict(DEFAULT_GRID_CONFIG, **(config or {}))
+    unknown = [day for day in list(config['days']) + list(config['hours']) if day not in WEEK_DAYS]
+    if unknown:
+        raise ValueError(f"Unknown day(s) in time grid config: {', '.join(unknown)}")
+
+    time_slots = []
+    for day in [d for d in WEEK_DAYS if d in config['days']]:
+        day_config = dict(config, **config['hours'].get(day, {}))
+        start, end, period = _hours(day_config['start']), _hours(day_config['end']), float(day_config['period'])
+        if period <= 0 or end <= start:
+            raise ValueError(f"Invalid hours for {day}: {day_config['start']}-{day_config['end']} "
+                             f"with {period}h periods")
+        breaks = sorted((_hours(b['start']), _hours(b['end'])) for b in day_config.get('breaks') or [])
+        sessions = {round(_hours(s['start']), 4): int(s.get('periods', 2)) for s in day_config.get('sessions') or []}
+
+        current = start
+        while current + period <= end + EPSILON:
+            blocking = [(b_start, b_end) for b_start, b_end in breaks if b_start < current + period - EPSILON
+                        and b_end > current + EPSILON]
+            if blocking:
+                current = max(b_end for _, b_end in blocking)
+                continue
+            length = period * sessions.get(round(current, 4), 1)
+            if current + length > end + EPSILON or any(b_start < current + length - EPSILON and b_end > current + EPSILON
+                                                      for b_start, b_end in breaks):
+                length = period
+            time_slots.append(f"{day}_{format_time(current)}-{format_time(current + length)}")
+            current += length
+    return time_slots
+
+def convert_time_to_float(time_str):
+    """Convert time string like '9:00' to float like 9.0"""
+    if ':' in time_str:
+        hours, minutes = map(int, time_str.split(':'))
+        return hours + minutes / 60.0
+    else:
+        return float(time_str)
+
+def preference_allows(preference, start_time):
+    """Check if a start time (in hours) matches a professor's time preference"""
+    if preference == 'morning':
+        return start_time < 12.0
+    elif preference == 'afternoon':
+        return start_time >= 12.0
+    elif preference == 'before_11':
+        return start_time < 11.0
+    elif preference == 'after_11':
+        return start_time >= 11.0
+    elif preference == 'any':
+        return True
+    else:
+        return True
+
+class TimeGrid:
+    """
+    Integer-indexed view of the time slots and rooms used by the scheduler.
+    Slot i maps to (slot_day[i], slot_period[i]) and room j to rooms[j]; string
+    labels are only needed when a solution is decoded for output.
+    Start, end, duration and the next/previous back-to-back slot are precomputed
+    per slot, and the slots allowed by a time preference, day off and session
+    length are memoised, so domain filtering is a lookup. Build one from a config
+    with TimeGrid.from_config().
+    """
+    __slots__ = ('time_slots', 'slot_index', 'slot_day', 'slot_period', 'slot_start', 'slot_end',
+                 'slot_duration', 'slot_next', 'slot_prev', 'days', 'rooms', 'room_ids', 'room_index',
+                 'room_capacity', 'room_type', 'room_types', '_preference_masks', '_allowed')
+
+    def __init__(self, time_slots, rooms=()):
+        self.time_slots = list(time_slots)
+        self.slot_index = {slot: i for i, slot in enumerate(self.time_slots)}
+
+        parsed = []
+        for slot in self.time_slots:
+            day, time_range = slot.split('_')
+            start, end = time_range.split('-')
+            parsed.append((day, convert_time_to_float(start), convert_time_to_float(end)))
+
+        # Days in week order, periods in start-time order within each day
+        day_names = set(day for day, _, _ in parsed)
+        self.days = [d for d in WEEK_DAYS if d in day_names] + sorted(day_names - set(WEEK_DAYS))
+        day_lookup = {day: i for i, day in enumerate(self.days)}
+        self.slot_day = array('h', (day_lookup[day] for day, _, _ in parsed))
+        self.slot_start = array('d', (start for _, start, _ in parsed))
+        self.slot_end = array('d', (end for _, _, end in parsed))
+        self.slot_period = array('h', [0] * len(parsed))
+        for d in range(len(self.days)):
+            day_slots = sorted((i for i in range(len(parsed)) if self.slot_day[i] == d),
+                               key=lambda i: self.slot_start[i])
+            for period, i in enumerate(day_slots):
+                self.slot_period[i] = period
+        self.slot_duration = array('d', (end - start for _, start, end in parsed))
+
+        # Back-to-back slots: same day, one ends when the next starts (a break separates them)
+        self.slot_next = array('i', [-1] * len(parsed))
+        self.slot_prev = array('i', [-1] * len(parsed))
+        starts = {(self.slot_day[i], round(self.slot_start[i], 4)): i for i in range(len(parsed))}
+        for i in range(len(parsed)):
+            following = starts.get((self.slot_day[i], round(self.slot_end[i], 4)))
+            if following is not None:
+                self.slot_next[i] = following
+                self.slot_prev[following] = i
+        self._preference_masks = {}
+        self._allowed = {}
+
+        self.rooms = list(rooms)
+        self.room_ids = [room['room_id'] for room in self.rooms]
+        self.room_index = {room_id: j for j, room_id in enumerate(self.room_ids)}
+        self.room_capacity = array('i', (room['capacity'] for room in self.rooms))
+        self.room_types = sorted(set(room['room_type'].lower() for room in self.rooms))
+        type_lookup = {room_type: k for k, room_type in enumerate(self.room_types)}
+        self.room_type = array('h', (type_lookup[room['room_type'].lower()] for room in self.rooms))
+
+    @classmethod
+    def from_config(cls, config=None, rooms=()):
+        """Grid for a time grid config (see build_time_slots()); None gives the default week"""
+        return cls(build_time_slots(config), rooms)
+
+    def __len__(self):
+        return len(self.time_slots)
+
+    def day_index(self, day):
+        """Index of a day name (case-insensitive), or -1 if the grid does not use it"""
+        for i, name in enumerate(self.days):
+            if name.lower() == day.lower():
+                return i
+        return -1
+
+    def type_code(self, room_type):
+        """Integer code of a room type, or -1 if no room has that type"""
+        room_type = room_type.lower()
+        return self.room_types.index(room_type) if room_type in self.room_types else -1
+
+    def same_day(self, slot1, slot2):
+        return self.slot_day[slot1] == self.slot_day[slot2]
+
+    def consecutive(self, slot1, slot2):
+        """Check if two slot indices are back to back on the same day"""
+        return self.slot_next[slot1] == slot2 or self.slot_prev[slot1] == slot2
+
+    def preference_mask(self, preference):
+        """Memoised tuple of booleans: does each slot match a time preference"""
+        mask = self._preference_masks.get(preference)
+        if mask is None:
+            mask = tuple(preference_allows(preference, start) for start in self.slot_start)
+            self._preference_masks[preference] = mask
+        return mask
+
+    def matches_preference(self, slot, preference):
+        return self.preference_mask(preference)[slot]
+
+    def fits_duration(self, slot, duration=None):
+        """Check if a slot is long enough for a session of duration hours (None: any slot)"""
+        return duration is None or self.slot_duration[slot] >= duration - EPSILON
+
+    def allowed_slots(self, day_off=None, preference='any', duration=None):
+        """Memoised list of slot indices off the day off, matching the preference and long enough"""
+        key = ((day_off or '').lower(), preference or 'any', duration)
+        slots = self._allowed.get(key)
+        if slots is None:
+            day = self.day_index(day_off) if day_off else -1
+            mask = self.preference_mask(key[1])
+            slots = [slot for slot in range(len(self.time_slots))
+                     if self.slot_day[slot] != day and mask[slot] and self.fits_duration(slot, duration)]
+            self._allowed[key] = slots
+        return slots
+
+    def decode_solution(self, solution):
+        """Turn an index-valued solution into the usual "<id>_time"/"<id>_room" label dict"""
+        if not solution:
+            return solution
+        decoded = {}
+        for key, value in solution.items():
+            if key.endswith('_slot'):
+                subject_id = key[:-len('_slot')]
+                decoded[f"{subject_id}_time"] = self.time_slots[value[0]]
+                decoded[f"{subject_id}_room"] = self.room_ids[value[1]]
+            elif key.endswith('_time'):
+                decoded[key] = self.time_slots[value]
+            elif key.endswith('_room'):
+                decoded[key] = self.room_ids[value]
+            else:
+                decoded[key] = value
+        return decoded
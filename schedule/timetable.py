@@ -0,0 +1,245 @@
+import contextlib
+import io
+from bisect import bisect_left, insort
+
+from ali_test import generate_time_slots, split_subject_if_needed
+from time_grid import TimeGrid
+
+class BookingError(ValueError):
+    """Raised when a booking cannot be made or released"""
+
+class Timetable:
+    """
+    Persistent timetable for live registration (see ali_Notes.txt).
+    For every slot the free rooms are kept sorted by (capacity, room index), both
+    overall and per room type, so the smallest free room that fits N students is
+    a single bisect. Bookings are made one subject/group at a time without
+    rebuilding any constraint problem.
+    """
+
+    def __init__(self, grid):
+        self.grid = grid
+        by_capacity = sorted((grid.room_capacity[j], j) for j in range(len(grid.rooms)))
+        self.free = [list(by_capacity) for _ in range(len(grid))]
+        self.free_by_type = [[[key for key in by_capacity if grid.room_type[key[1]] == code]
+                              for code in range(len(grid.room_types))]
+                             for _ in range(len(grid))]
+        self.max_capacity = [max((c for c, j in by_capacity if grid.room_type[j] == code), default=0)
+                             for code in range(len(grid.room_types))]
+        self.bookings = {}      # subject_id -> (slot, room, subject)
+        self.professor_slots = {}  # professor (lower case) -> set of slots
+
+        # Chronological slot order, used when suggesting alternatives
+        self.slot_order = sorted(range(len(grid)), key=lambda s: (grid.slot_day[s], grid.slot_start[s]))
+
+    def _type_code(self, subject):
+        """Required room type code, or -1 if the type is unknown or no room of it is big enough"""
+        if not subject.get('required_room_type'):
+            return -1
+        code = self.grid.type_code(subject['required_room_type'])
+        if code < 0 or self.max_capacity[code] < subject['students']:
+            return -1
+        return code
+
+    def _free_list(self, slot, code):
+        return self.free[slot] if code < 0 else self.free_by_type[slot][code]
+
+    def _slot_problem(self, subject, slot, strict=True):
+        """Why a subject/group cannot take a slot, or None if it can; strict adds the time preference"""
+        grid = self.grid
+        time_slot = grid.time_slots[slot]
+        if subject.get('day_off') and grid.day_index(subject['day_off']) == grid.slot_day[slot]:
+            return f"{subject['professor']} is off on {grid.days[grid.slot_day[slot]]}"
+        if strict and not grid.matches_preference(slot, subject.get('time_preference', 'any')):
+            return f"{time_slot} does not match the {subject['time_preference']} preference of {subject['subject_id']}"
+        if not grid.fits_duration(slot, subject.get('duration')):
+            return f"{time_slot} is shorter than the {subject['duration']:g}h {subject['subject_id']} needs"
+        if slot in self.professor_slots.get(subject['professor'].lower(), ()):
+            return f"{subject['professor']} already teaches at {time_slot}"
+        return None
+
+    def _slot_allowed(self, subject, slot):
+        return self._slot_problem(subject, slot) is None
+
+    def _best_room(self, subject, slot, code):
+        """Smallest free room in slot with enough capacity, or None"""
+        free = self._free_list(slot, code)
+        i = bisect_left(free, (subject['students'], -1))
+        return free[i][1] if i < len(free) else None
+
+    def _is_free(self, slot, room):
+        key = (self.grid.room_capacity[room], room)
+        free = self.free[slot]
+        i = bisect_left(free, key)
+        return i < len(free) and free[i] == key
+
+    def free_rooms(self, time_slot, min_capacity=0, room_type=None):
+        """Free room ids in a slot with at least min_capacity seats, smallest first"""
+        slot = self.grid.slot_index[time_slot]
+        code = self.grid.type_code(room_type) if room_type else -1
+        if room_type and code < 0:
+            return []
+        free = self._free_list(slot, code)
+        return [self.grid.room_ids[j] for _, j in free[bisect_left(free, (min_capacity, -1)):]]
+
+    def suggest(self, subject, time_slot=None, limit=5):
+        """
+        Offer (time_slot, room_id) options for a subject/group, best-fitting room first.
+        If time_slot is given its free rooms are offered first; when none fit, the
+        other periods of the same day and then the rest of the week are suggested,
+        one best-fitting room per slot.
+        """
+        grid = self.grid
+        code = self._type_code(subject)
+        options = []
+
+        if time_slot is not None:
+            slot = grid.slot_index[time_slot]
+            if self._slot_allowed(subject, slot):
+                free = self._free_list(slot, code)
+                for _, room in free[bisect_left(free, (subject['students'], -1)):][:limit]:
+                    options.append((time_slot, grid.room_ids[room]))
+            if options:
+                return options
+            day = grid.slot_day[slot]
+            order = sorted(self.slot_order, key=lambda s: (grid.slot_day[s] != day, abs(grid.slot_start[s] - grid.slot_start[slot])
+                                                           if grid.slot_day[s] == day else 0))
+        else:
+            order = self.slot_order
+
+        for slot in order:
+            if len(options) >= limit:
+                break
+            if not self._slot_allowed(subject, slot):
+                continue
+            room = self._best_room(subject, slot, code)
+            if room is not None:
+                options.append((grid.time_slots[slot], grid.room_ids[room]))
+        return options
+
+    def book(self, subject, time_slot=None, room_id=None, strict=True):
+        """
+        Book a subject/group and return its (time_slot, room_id).
+        Without a time_slot the first suggestion is used; without a room_id the
+        smallest free room that fits. Raises BookingError if the subject is already
+        booked, the room is too small or of the wrong type, the slot is on the day
+        off, outside the time preference or too short, or the booking clashes.
+        strict=False leaves out the time preference and room type, which the
+        solvers only penalise (see load_solution()).
+        """
+        grid = self.grid
+        if subject['subject_id'] in self.bookings:
+            raise BookingError(f"{subject['subject_id']} is already booked")
+
+        if time_slot is None and room_id is None:
+            options = self.suggest(subject, limit=1)
+            if not options:
+                raise BookingError(f"No free slot for {subject['subject_id']}")
+            time_slot, room_id = options[0]
+        elif time_slot is None:
+            room = grid.room_index[room_id]
+            slots = [s for s in self.slot_order if self._slot_allowed(subject, s) and self._is_free(s, room)]
+            if not slots:
+                raise BookingError(f"No free slot for {subject['subject_id']} in {room_id}")
+            time_slot = grid.time_slots[slots[0]]
+        elif room_id is None:
+            room = self._best_room(subject, grid.slot_index[time_slot], self._type_code(subject))
+            if room is None:
+                alternatives = ', '.join(f"{t} {r}" for t, r in self.suggest(subject, time_slot, limit=3))
+                raise BookingError(f"No free room fits {subject['subject_id']} at {time_slot}"
+                                   + (f"; try {alternatives}" if alternatives else ""))
+            room_id = grid.room_ids[room]
+
+        slot = grid.slot_index[time_slot]
+        room = grid.room_index[room_id]
+        if not self._is_free(slot, room):
+            raise BookingError(f"Room {room_id} is already booked at {time_slot}")
+        if grid.room_capacity[room] < subject['students']:
+            raise BookingError(f"Room {room_id} has {grid.room_capacity[room]} seats, {subject['subject_id']} needs {subject['students']}")
+        code = self._type_code(subject)
+        if strict and code >= 0 and grid.room_type[room] != code:
+            raise BookingError(f"Room {room_id} is a {grid.room_types[grid.room_type[room]]}, "
+                               f"{subject['subject_id']} needs a {subject['required_room_type']}")
+        problem = self._slot_problem(subject, slot, strict)
+        if problem:
+            raise BookingError(problem)
+        professor = subject['professor'].lower()
+
+        key = (grid.room_capacity[room], room)
+        for free in (self.free[slot], self.free_by_type[slot][grid.room_type[room]]):
+            del free[bisect_left(free, key)]
+        self.professor_slots.setdefault(professor, set()).add(slot)
+        self.bookings[subject['subject_id']] = (slot, room, subject)
+        return time_slot, room_id
+
+    def release(self, subject_id):
+        """Cancel a booking and free its room"""
+        if subject_id not in self.bookings:
+            raise BookingError(f"{subject_id} is not booked")
+        slot, room, subject = self.bookings.pop(subject_id)
+        key = (self.grid.room_capacity[room], room)
+        insort(self.free[slot], key)
+        insort(self.free_by_type[slot][self.grid.room_type[room]], key)
+        self.professor_slots[subject['professor'].lower()].discard(slot)
+
+    def book_subject(self, subject):
+        """
+        Split a subject if no room fits it and book every group, keeping split
+        groups on the same day in consecutive periods and the same room when possible.
+        Returns {subject_id: (time_slot, room_id)}; nothing is booked if any group fails.
+        """
+        with contextlib.redirect_stdout(io.StringIO()):
+            groups = split_subject_if_needed(subject, self.grid.rooms)
+        if len(groups) == 1:
+            return {subject['subject_id']: self.book(subject)}
+
+        grid = self.grid
+        for position, first in enumerate(self.slot_order):
+            run = [first]
+            for slot in self.slot_order[position + 1:]:
+                if len(run) == len(groups) or not grid.consecutive(run[-1], slot):
+                    break
+                run.append(slot)
+            if len(run) < len(groups) or not all(self._slot_allowed(g, s) for g, s in zip(groups, run)):
+                continue
+            # Prefer one room that is free for the whole run
+            code = self._type_code(groups[0])
+            shared = set.intersection(*(set(j for _, j in self._free_list(s, code)) for s in run))
+            shared = [j for j in shared if grid.room_capacity[j] >= max(g['students'] for g in groups)]
+            rooms = [min(shared, key=lambda j: grid.room_capacity[j])] * len(run) if shared else \
+                    [self._best_room(g, s, code) for g, s in zip(groups, run)]
+            if None in rooms:
+                continue
+            booked = {}
+            try:
+                for g, s, j in zip(groups, run, rooms):
+                    booked[g['subject_id']] = self.book(g, grid.time_slots[s], grid.room_ids[j])
+            except BookingError:
+                for subject_id in booked:
+                    self.release(subject_id)
+                raise
+            return booked
+        raise BookingError(f"No {len(groups)} consecutive free periods for {subject['subject_id']}")
+
+    def load_solution(self, solution, all_subjects):
+        """Book every subject/group of a "<id>_time"/"<id>_room" solution from one of the solvers"""
+        for subject in all_subjects:
+            time_slot = solution.get(f"{subject['subject_id']}_time")
+            if time_slot is not None:
+                self.book(subject, time_slot, solution[f"{subject['subject_id']}_room"], strict=False)
+
+    def solution(self):
+        """Current bookings as a "<id>_time"/"<id>_room" solution"""
+        solution = {}
+        for subject_id, (slot, room, _) in self.bookings.items():
+            solution[f"{subject_id}_time"] = self.grid.time_slots[slot]
+            solution[f"{subject_id}_room"] = self.grid.room_ids[room]
+        return solution
+
+    def subjects(self):
+        """Booked subjects/groups, in booking order"""
+        return [subject for _, _, subject in self.bookings.values()]
+
+def create_timetable(rooms, time_slots=None):
+    """Empty Timetable over the usual weekly slots"""
+    return Timetable(TimeGrid(time_slots or generate_time_slots(), rooms))
@@ -0,0 +1,276 @@
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from constraint import Constraint, Problem
+
+from ali_test import (DeadlineConstraint, SearchTimeout, add_slot_constraints, generate_time_slots,
+                      split_all_subjects, subject_domains)
+from time_grid import TimeGrid
+
+def hopcroft_karp(adjacency, num_right):
+    """
+    Maximum bipartite matching of left vertices 0..len(adjacency)-1 to right
+    vertices 0..num_right-1. adjacency[u] lists the right vertices u may take, in
+    order of preference. Returns match_left, the right vertex of each left vertex
+    (None if unmatched).
+    """
+    match_left = [None] * len(adjacency)
+    match_right = [None] * num_right
+    infinity = len(adjacency) + 1
+
+    while True:
+        # BFS: layer the free left vertices and everything reachable over alternating paths
+        layer = [infinity] * len(adjacency)
+        queue = deque()
+        for u in range(len(adjacency)):
+            if match_left[u] is None:
+                layer[u] = 0
+                queue.append(u)
+        shortest = infinity
+        while queue:
+            u = queue.popleft()
+            if layer[u] >= shortest:
+                continue
+            for v in adjacency[u]:
+                w = match_right[v]
+                if w is None:
+                    shortest = min(shortest, layer[u] + 1)
+                elif layer[w] == infinity:
+                    layer[w] = layer[u] + 1
+                    queue.append(w)
+        if shortest == infinity:
+            return match_left
+
+        # DFS: vertex-disjoint shortest augmenting paths along the layers
+        def augment(u):
+            for v in adjacency[u]:
+                w = match_right[v]
+                if (w is None and layer[u] + 1 == shortest) or (w is not None and layer[w] == layer[u] + 1
+                                                                  and augment(w)):
+                    match_left[u] = v
+                    match_right[v] = u
+                    return True
+            layer[u] = infinity
+            return False
+
+        for u in range(len(adjacency)):
+            if match_left[u] is None:
+                augment(u)
+
+def match_rooms(compatible_lists, num_rooms):
+    """Distinct room for each of a slot's subjects/groups (a list), or None if some cannot get one"""
+    rooms = hopcroft_karp(compatible_lists, num_rooms)
+    return None if None in rooms else rooms
+
+class SlotCapacityConstraint(Constraint):
+    """
+    Global phase-1 constraint over every "<id>_time" variable: the subjects/groups
+    sharing a slot must still be matchable to distinct compatible rooms.
+    Subjects are reduced to their set of compatible rooms, so each check is a
+    memoised Hopcroft-Karp run on a handful of room signatures. Forward checking
+    hides the slots an unassigned subject/group no longer fits into, using the
+    memoised set of signatures each slot's occupants block.
+    """
+
+    def __init__(self, compatible, num_rooms):
+        self.num_rooms = num_rooms
+        self.signatures = []
+        self.signature_of = {}
+        signature_ids = {}
+        for variable, rooms in compatible.items():
+            rooms = tuple(rooms)
+            if rooms not in signature_ids:
+                signature_ids[rooms] = len(self.signatures)
+                self.signatures.append(list(rooms))
+            self.signature_of[variable] = signature_ids[rooms]
+        self._feasible = {}
+        self._blocked = {}
+
+    def feasible(self, signatures):
+        """Whether subjects with these (sorted) room signatures fit one slot"""
+        result = self._feasible.get(signatures)
+        if result is None:
+            result = len(signatures) <= self.num_rooms and match_rooms(
+                [self.signatures[s] for s in signatures], self.num_rooms) is not None
+            self._feasible[signatures] = result
+        return result
+
+    def blocked(self, signatures):
+        """Signatures that no longer fit a slot already holding these ones"""
+        result = self._blocked.get(signatures)
+        if result is None:
+            result = frozenset(s for s in range(len(self.signatures))
+                               if not self.feasible(tuple(sorted(signatures + (s,)))))
+            self._blocked[signatures] = result
+        return result
+
+    def __call__(self, variables, domains, assignments, forwardcheck=False):
+        occupants = {}
+        for variable in variables:
+            slot = assignments.get(variable)
+            if slot is not None:
+                occupants.setdefault(slot, []).append(self.signature_of[variable])
+        full = {}  # slot -> signatures it cannot take any more
+        for slot, signatures in occupants.items():
+            key = tuple(sorted(signatures))
+            if not self.feasible(key):
+                return False
+            if forwardcheck:
+                blocked = self.blocked(key)
+                if blocked:
+                    full[slot] = blocked
+
+        if full:
+            for variable in variables:
+                if variable in assignments:
+                    continue
+                signature = self.signature_of[variable]
+                slots = [slot for slot, blocked in full.items() if signature in blocked]
+                if not slots:
+                    continue
+                domain = domains[variable]
+                for slot in slots:
+                    if slot in domain:
+                        domain.hideValue(slot)
+                if not domain:
+                    return False
+        return True
+
+def _match_slot(slot, subject_ids, compatible_lists, num_rooms):
+    return slot, subject_ids, match_rooms(compatible_lists, num_rooms)
+
+class TwoPhaseScheduler:
+    """
+    Times first, rooms second. problem is the phase-1 python-constraint model over
+    "<id>_time" slot indices only (professor/cohort/split constraints plus
+    SlotCapacityConstraint), so the search never branches on room permutations.
+    Phase 2 gives each slot's subjects/groups distinct rooms with Hopcroft-Karp;
+    slots are independent, so with workers they are matched in a process pool
+    that is started once and shut down by close() (or when getSolution() /
+    getSolutionIter() finish). Solutions are "<id>_slot" -> (slot index, room index)
+    like the combined model; stats['unmatched_slot'] names the slot that stopped
+    the last failed phase 2, and stats['stopped'] is set when the phase-1 search
+    ran out of its time limit.
+    """
+
+    def __init__(self, problem, grid, all_subjects, compatible, workers=None):
+        self.problem = problem
+        self.grid = grid
+        self.all_subjects = all_subjects
+        self.compatible = compatible  # subject_id -> room indices, tightest first
+        self.workers = workers
+        self._pool = None
+        self.stats = {'phase1_time': 0.0, 'phase2_time': 0.0, 'unmatched_slot': None, 'stopped': False}
+
+    def close(self):
+        """Shut down the phase-2 process pool, if one was started"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def assign_rooms(self, times):
+        """Phase 2: "<id>_slot" cells for a "<id>_time" assignment, or None if a slot cannot be matched"""
+        start = time.perf_counter()
+        by_slot = {}
+        for subject in self.all_subjects:
+            by_slot.setdefault(times[f"{subject['subject_id']}_time"], []).append(subject['subject_id'])
+        slots = list(by_slot)
+        lists = [[self.compatible[subject_id] for subject_id in by_slot[slot]] for slot in slots]
+        num_rooms = len(self.grid.rooms)
+        if self.workers and len(slots) > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            results = list(self._pool.map(_match_slot, slots, [by_slot[slot] for slot in slots], lists,
+                                          [num_rooms] * len(slots)))
+        else:
+            results = [_match_slot(slot, by_slot[slot], lists[i], num_rooms) for i, slot in enumerate(slots)]
+
+        solution = {}
+        for slot, subject_ids, rooms in results:
+            if rooms is None:
+                self.stats['unmatched_slot'] = self.grid.time_slots[slot]
+                solution = None
+                break
+            for subject_id, room in zip(subject_ids, rooms):
+                solution[f"{subject_id}_slot"] = (slot, room)
+        self.stats['phase2_time'] += time.perf_counter() - start
+        return solution
+
+    def getSolution(self):
+        start = time.perf_counter()
+        try:
+            times = self.problem.getSolution()
+        except SearchTimeout:
+            self.stats['stopped'] = True
+            times = None
+        self.stats['phase1_time'] += time.perf_counter() - start
+        if times is None:
+            self.close()
+            return None
+        try:
+            return self.assign_rooms(times)
+        finally:
+            self.close()
+
+    def getSolutionIter(self):
+        try:
+            for times in self.problem.getSolutionIter():
+                solution = self.assign_rooms(times)
+                if solution is not None:
+                    yield solution
+        except SearchTimeout:
+            self.stats['stopped'] = True
+        finally:
+            self.close()
+
+def create_two_phase_scheduler(subjects, rooms, profile=None, time_slots=None, seed=None, workers=None,
+                               time_limit=None):
+    """
+    Build a TwoPhaseScheduler, the alternative to create_basic_scheduler(combined=True).
+    Same splitting, domains and hard constraints; returns (scheduler, grid, all_subjects)
+    and scheduler.getSolution() gives "<id>_slot" cells, decoded with grid.decode_solution().
+    time_limit (seconds) bounds the phase-1 search; getSolution() then returns None
+    with stats['stopped'] set.
+    """
+    build_start = time.perf_counter()
+    time_slots = list(time_slots or generate_time_slots())
+    if seed is not None:
+        random.Random(seed).shuffle(time_slots)
+    grid = TimeGrid(time_slots, rooms)
+
+    problem = Problem()
+
+    def add_constraint(kind, constraint, variables):
+        if profile is not None:
+            constraint = profile.wrap(kind, constraint)
+        problem.addConstraint(constraint, variables)
+
+    all_subjects = split_all_subjects(subjects, rooms, grid.time_slots)
+
+    compatible = {}
+    for subject, (available_slots, suitable_rooms) in zip(all_subjects, subject_domains(all_subjects, grid,
+                                                                                        typed=True)):
+        problem.addVariable(f"{subject['subject_id']}_time", available_slots)
+        # Smallest rooms first so the matching prefers the tightest fit
+        compatible[subject['subject_id']] = sorted(suitable_rooms, key=lambda j: grid.room_capacity[j])
+
+    add_slot_constraints(add_constraint, all_subjects, grid)
+    add_constraint('slot_capacity',
+                   SlotCapacityConstraint({f"{s_id}_time": rooms for s_id, rooms in compatible.items()},
+                                          len(grid.rooms)),
+                   [f"{subject['subject_id']}_time" for subject in all_subjects])
+    if time_limit is not None:
+        problem.addConstraint(DeadlineConstraint(time_limit), [f"{subject['subject_id']}_time"
+                                                               for subject in all_subjects])
+
+    if profile is not None:
+        profile.build_time = time.perf_counter() - build_start
+    return TwoPhaseScheduler(problem, grid, all_subjects, compatible, workers), grid, all_subjects